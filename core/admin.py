@@ -1,4 +1,13 @@
 from django.contrib import admin
-from .models import Profile
+from .models import Job, Profile
 
 admin.site.register(Profile)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "priority", "attempts", "max_attempts", "run_at", "duration_ms", "locked_by")
+    list_filter = ("status", "name")
+    search_fields = ("name", "last_error")
+    readonly_fields = ("created_at", "started_at", "finished_at", "locked_at", "locked_by", "duration_ms", "last_error")
+    ordering = ("-id",)
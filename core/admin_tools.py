@@ -0,0 +1,151 @@
+import json
+
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.utils import get_last_value_from_parameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+
+# Admin untuk tabel besar (Attempt, AttemptAnswer, Choice, ...):
+# - EstimatedCountPaginator: COUNT(*) dibatasi EXACT_COUNT_LIMIT baris; di atas itu pakai
+#   estimasi database (Postgres: pg_class / EXPLAIN, SQLite: sqlite_stat1 / MAX(id)),
+#   halaman diambil per id dulu (deferred join)
+# - AutocompleteFilter: filter FK berupa select2 (autocomplete admin), bukan daftar semua pilihan
+# - LargeTableAdmin: mixin yang memasang keduanya + show_full_result_count = False
+
+EXACT_COUNT_LIMIT = 10000
+
+
+def estimate_count(queryset):
+    """Perkiraan jumlah baris dari statistik database, None kalau tidak tersedia."""
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    unfiltered = not queryset.query.where
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                if unfiltered:
+                    cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+                    row = cursor.fetchone()
+                    return row[0] if row and row[0] >= 0 else None
+                sql, params = queryset.order_by().query.sql_with_params()
+                cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]["Plan"]["Plan Rows"])
+            if connection.vendor == "sqlite" and unfiltered:
+                try:
+                    # kolom stat: "<jumlah baris> ..." untuk tiap index tabel
+                    cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+                    row = cursor.fetchone()
+                except DatabaseError:
+                    row = None  # belum pernah ANALYZE
+                if row:
+                    return int(row[0].split()[0])
+    except DatabaseError:
+        return None
+    if unfiltered:
+        # id auto increment: MAX(id) lewat index, mendekati jumlah baris kalau jarang ada delete
+        return queryset.order_by().aggregate(n=Max("pk"))["n"] or 0
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        # SELECT COUNT(*) FROM (... LIMIT n): berhenti setelah n+1 baris
+        exact = qs.order_by()[: EXACT_COUNT_LIMIT + 1].count()
+        if exact <= EXACT_COUNT_LIMIT:
+            return exact
+        return max(estimate_count(qs) or 0, exact)
+
+    def page(self, number):
+        """
+        Ambil id halaman dulu (OFFSET cukup lewat index, tanpa JOIN select_related),
+        baru baris lengkapnya dengan id__in: halaman jauh tidak ikut men-JOIN baris yang dilewati.
+        """
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        qs = self.object_list
+        ids = list(qs.values_list("pk", flat=True)[bottom:top])
+        return self._get_page(qs.filter(pk__in=ids), number, self)
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    list_filter = [("package", AutocompleteFilter)] / [("attempt__package", AutocompleteFilter)].
+    Pilihan dicari lewat autocomplete admin (ModelAdmin model tujuan wajib punya search_fields),
+    hanya pilihan terpilih yang di-query saat render.
+    """
+
+    template = "admin/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+        self.lookup_val = get_last_value_from_parameters(params, self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.admin_site = model_admin.admin_site
+        self.base_query_string = "?"
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def queryset(self, request, queryset):
+        prefix = self.field_path.rpartition("__")[0]
+        if self.lookup_val is None or not prefix:
+            return super().queryset(request, queryset)
+        # attempt__package=X -> attempt_id IN (SELECT id FROM attempt WHERE package_id = X):
+        # planner tetap bisa jalan lewat index urutan changelist, bukan JOIN + sort seluruh tabel
+        related = self.field.model._default_manager.filter(
+            **{f"{self.field.name}__{self.field.target_field.name}": self.lookup_val}
+        )
+        try:
+            return queryset.filter(**{f"{prefix}__in": related.values("pk")})
+        except (ValueError, ValidationError) as e:
+            raise IncorrectLookupParameters(e)
+
+    def get_facet_counts(self, pk_attname, filtered_qs):
+        return {}  # facet count per pilihan justru yang mau dihindari
+
+    def choices(self, changelist):
+        self.base_query_string = changelist.get_query_string(remove=[self.lookup_kwarg, "p"])
+        yield {
+            "selected": self.lookup_val is None,
+            "query_string": self.base_query_string,
+            "display": _("All"),
+        }
+
+    def rendered_widget(self):
+        remote = self.field.remote_field.model
+        choice = forms.ModelChoiceField(
+            queryset=remote._default_manager.all(),
+            widget=AutocompleteSelect(self.field, self.admin_site),
+            required=False,
+        )
+        return choice.widget.render(
+            self.lookup_kwarg, self.lookup_val,
+            attrs={"id": f"id_filter_{self.lookup_kwarg}", "style": "width: 100%"},
+        )
+
+
+class LargeTableAdmin:
+    """Mixin ModelAdmin untuk tabel jutaan baris."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        return super().media + AutocompleteSelect(None, self.admin_site).media
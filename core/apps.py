@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        # daftarkan task job queue dari <app>/tasks.py
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules("tasks")
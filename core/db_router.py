@@ -0,0 +1,110 @@
+from __future__ import annotations
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import List, Optional
+
+from django.conf import settings
+
+
+# Read replica: view yang hanya membaca diberi @replica_reads, query SELECT di
+# dalamnya dikirim ke salah satu alias "replica*" di DATABASES. Semua tulis tetap
+# ke "default".
+# Read-your-writes: setelah request yang menulis lewat ORM (autosave, submit, atau
+# view baca yang ternyata menulis), browser diberi cookie STICKY_COOKIE; selama
+# REPLICA_STICKY_SECONDS semua baca user tsb tetap ke primary (lag replikasi tidak
+# terlihat). Dalam satu request, begitu ada tulis, baca berikutnya juga ke primary.
+
+STICKY_COOKIE = "db_primary_until"
+
+# session & user selalu dari primary: request.user / session yang di-load lazy di dalam
+# view replica tidak boleh "hilang" karena lag (session kosong = cookie dihapus = logout)
+PRIMARY_ONLY_APPS = {"sessions", "auth", "contenttypes", "admin"}
+
+
+@dataclass
+class _ReadState:
+    use_replica: bool = False
+    wrote: bool = False
+
+
+_state: ContextVar[Optional[_ReadState]] = ContextVar("replica_read_state", default=None)
+
+
+def replica_aliases() -> List[str]:
+    return [alias for alias in settings.DATABASES if alias.startswith("replica")]
+
+
+def sticky_seconds() -> int:
+    return getattr(settings, "REPLICA_STICKY_SECONDS", 10)
+
+
+def _sticky(request) -> bool:
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or state.wrote:
+            return "default"
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return "default"
+        replicas = replica_aliases()
+        return random.choice(replicas) if replicas else "default"
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # sisa request ini baca dari primary, dan user jadi sticky
+            state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replica = salinan default, objek dari keduanya boleh saling berelasi
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == "default"
+
+
+def replica_reads(view_func):
+    """View read-only: baca dari replica kecuali user baru saja menulis."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        if state is None:
+            return view_func(request, *args, **kwargs)
+        state.use_replica = not _sticky(request)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            state.use_replica = False
+    return wrapper
+
+
+class ReplicaStickyMiddleware:
+    """Pasang state routing per request dan cookie sticky-primary setelah request yang menulis."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _ReadState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if state.wrote and replica_aliases():
+            seconds = sticky_seconds()
+            response.set_cookie(
+                STICKY_COOKIE, str(int(time.time()) + seconds), max_age=seconds, httponly=True, samesite="Lax"
+            )
+        return response
@@ -0,0 +1,313 @@
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import threading
+import time
+import traceback
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Avg, Count, F, Max, Q
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+
+# Antrian job di database, tanpa broker.
+# - Daftarkan fungsi dengan @task("app.nama") di modul <app>/tasks.py (di-import otomatis).
+# - enqueue("app.nama", {...}) menyimpan Job; `manage.py run_workers` yang menjalankan.
+# - JOBS_EAGER = True: job langsung dijalankan di enqueue (dev / tanpa worker). Exception
+#   hanya dicatat di log: enqueue biasanya dipanggil dari on_commit, data sudah tersimpan.
+# - Job RUNNING punya lease: worker memperbarui locked_at tiap JOBS_HEARTBEAT_SECONDS selama
+#   job jalan (sampai batas timeout task). requeue_stale hanya mengambil job yang lease-nya
+#   habis (tidak ada heartbeat selama JOBS_LEASE_SECONDS), bukan job yang sekadar lama.
+
+
+@dataclass
+class TaskSpec:
+    fn: Callable[..., Any]
+    max_attempts: int = 3
+    timeout: Optional[int] = None  # detik; None = JOBS_TIMEOUT_SECONDS
+
+
+REGISTRY: Dict[str, TaskSpec] = {}
+
+
+def task(name: str, max_attempts: int = 3, timeout: Optional[int] = None):
+    def decorator(fn):
+        REGISTRY[name] = TaskSpec(fn=fn, max_attempts=max_attempts, timeout=timeout)
+        return fn
+    return decorator
+
+
+def jobs_eager() -> bool:
+    return getattr(settings, "JOBS_EAGER", False)
+
+
+def _dedupe_key(name: str, payload: Dict[str, Any]) -> str:
+    raw = json.dumps([name, payload], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def enqueue(
+    name: str,
+    payload: Optional[Dict[str, Any]] = None,
+    priority: int = 0,
+    run_at=None,
+    unique: bool = False,
+) -> Optional[Job]:
+    """
+    Masukkan job ke antrian. unique=True: tidak ditambah kalau job yang sama
+    (nama + payload) masih QUEUED. Dicek dengan satu EXISTS, dan dijamin UniqueConstraint
+    pada Job.dedupe_key (INSERT yang kalah rebutan -> IntegrityError).
+    Return Job, atau None kalau dijalankan eager / duplikat.
+    """
+    if name not in REGISTRY:
+        raise KeyError(f"Unknown task: {name}")
+    payload = payload or {}
+
+    if jobs_eager():
+        try:
+            REGISTRY[name].fn(**payload)
+        except Exception:
+            logger.exception("Eager job %s failed (payload %r)", name, payload)
+        return None
+
+    job = Job(
+        name=name,
+        payload=payload,
+        priority=priority,
+        run_at=run_at or timezone.now(),
+        max_attempts=REGISTRY[name].max_attempts,
+    )
+    if not unique:
+        job.save()
+        return job
+
+    # cek di SQL (juga menangkap job sama yang diantrekan tanpa unique); yang menjamin
+    # tetap constraint dedupe_key kalau dua enqueue berjalan bersamaan
+    if Job.objects.filter(name=name, status=Job.Status.QUEUED, payload=payload).exists():
+        return None
+    job.dedupe_key = _dedupe_key(name, payload)
+    try:
+        # savepoint: duplikat tidak merusak transaksi pemanggil
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        return None
+    return job
+
+
+def _running_fields(worker_id: str, now) -> Dict[str, Any]:
+    # dedupe_key dilepas: job yang sama boleh diantrekan lagi, dan retry/requeue job ini
+    # tidak bentrok dengan duplikat yang masuk selama ia jalan
+    return {
+        "status": Job.Status.RUNNING, "locked_by": worker_id, "locked_at": now, "started_at": now,
+        "dedupe_key": None,
+    }
+
+
+def claim(worker_id: str, limit: int = 1) -> List[Job]:
+    """
+    Ambil sampai `limit` job yang siap jalan dan tandai RUNNING. locked_by = worker_id + token
+    per claim, supaya run lama yang lease-nya sudah habis tidak menimpa hasil run berikutnya.
+    Postgres/MySQL: SELECT ... FOR UPDATE SKIP LOCKED.
+    SQLite: UPDATE bersyarat per job (status masih QUEUED), yang kalah rebutan dilewati.
+    """
+    now = timezone.now()
+    lock = f"{worker_id}/{uuid.uuid4().hex[:12]}"
+    ready = (
+        Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=now)
+        .order_by("-priority", "run_at", "id")
+    )
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            jobs = list(ready.select_for_update(skip_locked=True)[:limit])
+            if jobs:
+                Job.objects.filter(id__in=[j.id for j in jobs]).update(**_running_fields(lock, now))
+    else:
+        candidates = list(ready[: limit * 2])
+        jobs = []
+        for job in candidates:
+            if len(jobs) >= limit:
+                break
+            if Job.objects.filter(id=job.id, status=Job.Status.QUEUED).update(**_running_fields(lock, now)):
+                jobs.append(job)
+
+    for job in jobs:
+        job.status = Job.Status.RUNNING
+        job.locked_by = lock
+        job.locked_at = now
+    return jobs
+
+
+class _Lease:
+    """
+    Heartbeat selama job jalan: perbarui locked_at tiap JOBS_HEARTBEAT_SECONDS (thread sendiri,
+    koneksi DB sendiri). Berhenti saat job selesai atau melewati timeout task; setelah itu lease
+    habis dalam JOBS_LEASE_SECONDS dan requeue_stale boleh mengambil alih.
+    """
+
+    def __init__(self, job: Job, timeout: int):
+        self.job = job
+        self.deadline = time.monotonic() + timeout
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._beat, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+
+    def _beat(self):
+        every = getattr(settings, "JOBS_HEARTBEAT_SECONDS", 30)
+        try:
+            while not self.stop.wait(every):
+                if time.monotonic() > self.deadline:
+                    logger.warning("Job %s #%s exceeded its timeout, lease not renewed", self.job.name, self.job.id)
+                    return
+                Job.objects.filter(id=self.job.id, status=Job.Status.RUNNING, locked_by=self.job.locked_by).update(
+                    locked_at=timezone.now()
+                )
+        finally:
+            connection.close()
+
+
+def run_job(job: Job) -> bool:
+    """Jalankan satu job yang sudah di-claim. Return True kalau sukses."""
+    spec = REGISTRY.get(job.name)
+    attempts = job.attempts + 1
+    started = time.monotonic()
+    error = ""
+    try:
+        if spec is None:
+            raise KeyError(f"Unknown task: {job.name}")
+        with _Lease(job, spec.timeout or getattr(settings, "JOBS_TIMEOUT_SECONDS", 15 * 60)):
+            spec.fn(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Job %s #%s failed (attempt %s)", job.name, job.id, attempts)
+
+    duration_ms = int((time.monotonic() - started) * 1000)
+    now = timezone.now()
+    fields: Dict[str, Any] = {
+        "attempts": attempts,
+        "duration_ms": duration_ms,
+        "finished_at": now,
+        "locked_by": "",
+        "locked_at": None,
+    }
+    if not error:
+        fields.update(status=Job.Status.DONE, last_error="")
+    elif attempts < job.max_attempts:
+        # retry dengan backoff eksponensial
+        backoff = getattr(settings, "JOBS_RETRY_BACKOFF_SECONDS", 10) * 2 ** (attempts - 1)
+        fields.update(status=Job.Status.QUEUED, run_at=now + timedelta(seconds=backoff), last_error=error)
+    else:
+        fields.update(status=Job.Status.FAILED, last_error=error)
+
+    # hanya kalau job masih milik claim ini (lease belum diambil alih requeue_stale)
+    Job.objects.filter(id=job.id, status=Job.Status.RUNNING, locked_by=job.locked_by).update(**fields)
+    return not error
+
+
+def requeue_stale() -> int:
+    """
+    Job RUNNING yang lease-nya habis (tidak ada heartbeat selama JOBS_LEASE_SECONDS:
+    worker mati, atau job melewati timeout task-nya) dikembalikan ke antrian,
+    atau FAILED kalau jatah percobaan habis.
+    """
+    lease = getattr(settings, "JOBS_LEASE_SECONDS", 120)
+    cutoff = timezone.now() - timedelta(seconds=lease)
+    stale = Job.objects.filter(status=Job.Status.RUNNING, locked_at__lt=cutoff)
+    msg = f"Lease expired (no heartbeat for {lease}s)"
+    reset = {"attempts": F("attempts") + 1, "last_error": msg, "locked_by": "", "locked_at": None}
+    failed = stale.filter(attempts__gte=F("max_attempts") - 1).update(status=Job.Status.FAILED, **reset)
+    requeued = stale.update(status=Job.Status.QUEUED, **reset)
+    return failed + requeued
+
+
+def job_stats(since=None) -> List[Dict[str, Any]]:
+    """Ringkasan per nama job: jumlah per status + durasi rata-rata/maks (ms)."""
+    qs = Job.objects.all()
+    if since is not None:
+        qs = qs.filter(created_at__gte=since)
+    return list(
+        qs.values("name")
+        .annotate(
+            total=Count("id"),
+            queued=Count("id", filter=Q(status=Job.Status.QUEUED)),
+            running=Count("id", filter=Q(status=Job.Status.RUNNING)),
+            done=Count("id", filter=Q(status=Job.Status.DONE)),
+            failed=Count("id", filter=Q(status=Job.Status.FAILED)),
+            avg_ms=Avg("duration_ms"),
+            max_ms=Max("duration_ms"),
+        )
+        .order_by("name")
+    )
+
+
+def _run_and_close(job: Job) -> bool:
+    # thread pool: tiap thread punya koneksi DB sendiri, tutup setelah selesai
+    try:
+        return run_job(job)
+    finally:
+        connection.close()
+
+
+def work(worker_id: str, threads: int = 1, sleep: float = 1.0, once: bool = False) -> int:
+    """
+    Loop worker: claim job sebanyak jumlah thread, jalankan paralel, ulangi.
+    Job periodik (JOBS_PERIODIC = {"nama": detik}) di-enqueue sendiri oleh loop ini.
+    once=True: berhenti saat antrian kosong. Return jumlah job yang dijalankan.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    periodic: Dict[str, int] = getattr(settings, "JOBS_PERIODIC", {})
+    last_enqueued: Dict[str, float] = {}
+    last_reap = 0.0
+    done = 0
+    # threads=1: jalan di thread ini saja (tanpa pool, koneksi DB tetap satu)
+    pool = ThreadPoolExecutor(max_workers=threads) if threads > 1 else None
+
+    try:
+        while True:
+            now = time.monotonic()
+            for name, every in periodic.items():
+                if name in REGISTRY and now - last_enqueued.get(name, -every) >= every:
+                    enqueue(name, unique=True)
+                    last_enqueued[name] = now
+            if now - last_reap >= 60:
+                requeue_stale()
+                last_reap = now
+
+            jobs = claim(worker_id, limit=max(1, threads))
+            if jobs:
+                results = pool.map(_run_and_close, jobs) if pool else map(run_job, jobs)
+                done += sum(1 for _ in results)
+                continue
+            if once:
+                return done
+            time.sleep(sleep)
+    finally:
+        if pool:
+            pool.shutdown()
+
+
+@task("core.purge_jobs")
+def purge_jobs(days: Optional[int] = None):
+    """Hapus job DONE yang lebih tua dari JOBS_KEEP_DAYS (job FAILED dibiarkan untuk diperiksa)."""
+    days = getattr(settings, "JOBS_KEEP_DAYS", 7) if days is None else days
+    Job.objects.filter(status=Job.Status.DONE, finished_at__lt=timezone.now() - timedelta(days=days)).delete()
@@ -0,0 +1,46 @@
+import os
+import socket
+from multiprocessing import Process
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from core.jobs import job_stats, work
+
+
+def _worker(index, threads, sleep, once):
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    work(worker_id, threads=threads, sleep=sleep, once=once)
+
+
+class Command(BaseCommand):
+    help = "Run background job workers from the database job queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument("--threads", type=int, default=1, help="Threads per process")
+        parser.add_argument("--sleep", type=float, default=1.0, help="Idle wait between polls (seconds)")
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+        parser.add_argument("--stats", action="store_true", help="Print per-job counts and timings, then exit")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            for row in job_stats():
+                self.stdout.write(
+                    f"{row['name']}: total={row['total']} queued={row['queued']} running={row['running']} "
+                    f"done={row['done']} failed={row['failed']} "
+                    f"avg={row['avg_ms'] or 0:.0f}ms max={row['max_ms'] or 0}ms"
+                )
+            return
+
+        args = (options["threads"], options["sleep"], options["once"])
+        if options["processes"] <= 1:
+            _worker(0, *args)
+            return
+
+        # koneksi DB tidak boleh dipakai bersama antar proses
+        connections.close_all()
+        procs = [Process(target=_worker, args=(i, *args)) for i in range(options["processes"])]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
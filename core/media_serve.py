@@ -0,0 +1,118 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_safe
+
+
+# Serve MEDIA_ROOT dengan dukungan Range (seek audio tanpa download ulang) + ETag kuat.
+# MEDIA_SENDFILE_HEADER = "X-Accel-Redirect" (nginx) / "X-Sendfile" (Apache, lighttpd):
+# Django hanya cek file & header, isi file dikirim web server (zero-copy, Range ditangani server).
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def _etag(st) -> str:
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+class _RangeNotSatisfiable(Exception):
+    pass
+
+
+def _parse_range(header: str, size: int):
+    """
+    Satu range "bytes=a-b" / "bytes=a-" / "bytes=-n" -> (start, end) inklusif.
+    None = header diabaikan, file dikirim utuh (RFC 9110 14.2): multi-range
+    ("bytes=0-1,5-9", tidak didukung) dan sintaks tidak valid.
+    _RangeNotSatisfiable = range valid tapi di luar ukuran file (416).
+    """
+    m = RANGE_RE.match(header.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    if not m.group(1):
+        length = int(m.group(2))
+        if length == 0:
+            raise _RangeNotSatisfiable
+        return max(0, size - length), size - 1
+    start = int(m.group(1))
+    end = int(m.group(2)) if m.group(2) else None
+    if end is not None and end < start:
+        return None
+    if start >= size:
+        raise _RangeNotSatisfiable
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def _read_range(path: str, start: int, length: int):
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    # path di luar MEDIA_ROOT -> SuspiciousFileOperation (400)
+    full_path = safe_join(settings.MEDIA_ROOT, path)
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+
+    st = os.stat(full_path)
+    etag = _etag(st)
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(st.st_mtime),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": f"public, max-age={getattr(settings, 'MEDIA_MAX_AGE', 24 * 60 * 60)}",
+    }
+
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+        for k, v in headers.items():
+            response[k] = v
+        return response
+
+    sendfile_header = getattr(settings, "MEDIA_SENDFILE_HEADER", "")
+    if sendfile_header:
+        response = HttpResponse(content_type=content_type)
+        prefix = getattr(settings, "MEDIA_SENDFILE_PREFIX", "/protected-media/")
+        response[sendfile_header] = prefix + path if sendfile_header == "X-Accel-Redirect" else full_path
+        for k, v in headers.items():
+            response[k] = v
+        return response
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    # If-Range: range hanya berlaku kalau file belum berubah, selain itu kirim utuh
+    if range_header and request.headers.get("If-Range", etag) == etag:
+        try:
+            byte_range = _parse_range(range_header, st.st_size)
+        except _RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{st.st_size}"
+            return response
+
+    if byte_range is None:
+        # file utuh: FileResponse -> wsgi.file_wrapper (sendfile di gunicorn/uwsgi)
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(full_path, start, end - start + 1), status=206,
+                                         content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+        response["Content-Length"] = str(end - start + 1)
+
+    for k, v in headers.items():
+        response[k] = v
+    return response
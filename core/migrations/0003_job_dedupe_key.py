@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='dedupe_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('dedupe_key__isnull', False), ('status', 'QUEUED')), fields=('dedupe_key',), name='core_job_unique_queued'),
+        ),
+    ]
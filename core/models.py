@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class Profile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='profile')
@@ -7,3 +8,49 @@ class Profile(models.Model):
 
     def __str__(self):
         return f"Profile of {self.user.username}"
+
+
+class Job(models.Model):
+    """
+    Antrian job sederhana di database (lihat core/jobs.py, manage.py run_workers).
+    Dijalankan berdasarkan priority (besar dulu), lalu run_at.
+    """
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    name = models.CharField(max_length=100, db_index=True)
+    payload = models.JSONField(default=dict, blank=True)
+    # enqueue(unique=True): hash nama + payload, unik selama job masih QUEUED (dikosongkan saat di-claim)
+    dedupe_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    priority = models.SmallIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)  # durasi run terakhir
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "-priority", "run_at"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedupe_key"],
+                condition=models.Q(status="QUEUED", dedupe_key__isnull=False),
+                name="core_job_unique_queued",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
@@ -2,10 +2,14 @@ from django.shortcuts import render, redirect
 from django.http import HttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Avg, Q
+from django.db.models import Q
 
+from core.db_router import replica_reads
+from exam.archive import recent_attempts
+from exam.stats import user_average_score
 from exam.models import ExamCategory, Package, Question, Section, UserPackage, Attempt 
 
+@replica_reads
 def home(request):
     # Statistics for Landing Page
     stats = {
@@ -18,6 +22,7 @@ def home(request):
     return render(request, "core/home.html", {"stats": stats})
 
 @login_required
+@replica_reads
 def dashboard(request):
     # Filter
     q = request.GET.get("q", "")
@@ -43,13 +48,8 @@ def dashboard(request):
     favorites = [x for x in ups if x.is_favorite]
     purchased = [x for x in ups if x.is_purchased]
 
-    # Attempt history (terbaru)
-    attempts = (
-        Attempt.objects
-        .filter(user=request.user)
-        .select_related("package", "package__category")
-        .order_by("-created_at")[:50]
-    )
+    # Attempt history (terbaru), lanjut ke arsip kalau tabel aktif kurang dari 50
+    attempts = recent_attempts(request.user, limit=50)
 
     # Attempt yang masih berjalan (buat tombol continue cepat)
     in_progress = (
@@ -60,10 +60,7 @@ def dashboard(request):
     )
 
     # Statistics
-    avg_score = Attempt.objects.filter(
-        user=request.user, 
-        status=Attempt.Status.SUBMITTED
-    ).aggregate(Avg("score"))["score__avg"] or 0
+    avg_score = user_average_score(request.user)
 
     return render(
         request,
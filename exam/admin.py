@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.contrib.admin import helpers
 
 from .models import (
     ExamCategory,
@@ -8,19 +9,25 @@ from .models import (
     Choice,
     Attempt,
     AttemptAnswer,
+    ArchivedAttempt,
+    PackageRankEntry,
+    QuestionStats,
+    SamplingRule,
     UserPackage,
 )
 from django.urls import path
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django import forms
-from django.db import transaction
 import csv
-import os
-import mimetypes
-import urllib.request
-from urllib.parse import urlparse
-from django.core.files.base import ContentFile
+from django.utils.html import format_html, format_html_join
+from django.http import StreamingHttpResponse
+
+from core.admin_tools import AutocompleteFilter, LargeTableAdmin
+from .bank import BankError
+from .cloning import clone_package
+from .csv_import import group_rows, import_groups, validate_question_group
+from .export import KINDS, csv_lines, iter_rows
 
 
 # ---------- Inlines ----------
@@ -32,6 +39,14 @@ class ChoiceInline(admin.TabularInline):
     show_change_link = True
 
 
+class SamplingRuleInline(admin.TabularInline):
+    model = SamplingRule
+    extra = 0
+    fields = ("order_index", "section", "count", "stratify_by_difficulty")
+    ordering = ("order_index", "id")
+    autocomplete_fields = ("section",)
+
+
 # ---------- Admins ----------
 @admin.register(ExamCategory)
 class ExamCategoryAdmin(admin.ModelAdmin):
@@ -49,6 +64,33 @@ class PackageAdmin(admin.ModelAdmin):
     ordering = ("order_index", "title")
     list_editable = ("order_index", "is_active")
     autocomplete_fields = ("category",)
+    inlines = [SamplingRuleInline]
+    actions = ["export_answers_csv", "export_attempts_csv", "clone_packages"]
+
+    def _export_csv(self, queryset, kind):
+        # streaming: baris ditulis sambil dibaca, tidak ada yang ditampung di memori
+        package_ids = list(queryset.values_list("id", flat=True))
+        response = StreamingHttpResponse(
+            csv_lines(KINDS[kind], iter_rows(kind, package_ids)), content_type="text/csv; charset=utf-8"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{kind}-{"-".join(map(str, package_ids))}.csv"'
+        return response
+
+    @admin.action(description="Export answers (CSV)")
+    def export_answers_csv(self, request, queryset):
+        return self._export_csv(queryset, "answers")
+
+    @admin.action(description="Export attempts (CSV)")
+    def export_attempts_csv(self, request, queryset):
+        return self._export_csv(queryset, "attempts")
+
+    @admin.action(description="Clone paket (section, soal, pilihan; nonaktif)")
+    def clone_packages(self, request, queryset):
+        for package in queryset:
+            clone = clone_package(package)
+            self.message_user(
+                request, f"{package.title} -> {clone.title} ({clone.question_count} soal)", level=messages.SUCCESS,
+            )
 
 
 @admin.register(Section)
@@ -60,137 +102,6 @@ class SectionAdmin(admin.ModelAdmin):
     list_editable = ("order_index",)
     autocomplete_fields = ("package",)
 
-VALID_ANSWER_TYPES = {"SINGLE", "MULTI", "WEIGHTED"}
-
-def validate_question_group(rows, line_numbers):
-
-    def _is_valid_http_url(u: str) -> bool:
-        u = (u or "").strip()
-        return (not u) or u.startswith("http://") or u.startswith("https://")
-
-    for i, r in enumerate(rows):
-        ci = (r.get("choice_image_url") or "").strip()
-        ca = (r.get("choice_audio_url") or "").strip()
-
-        if ci and not ci.startswith(("http://", "https://")):
-            errors.append(f"Invalid choice_image_url at line {line_numbers[i]}")
-
-        if ca and not ca.startswith(("http://", "https://")):
-            errors.append(f"Invalid choice_audio_url at line {line_numbers[i]}")
-
-
-    errors = []
-    if not rows:
-        return errors
-
-    atype = rows[0].get("answer_type")
-    if atype not in VALID_ANSWER_TYPES:
-        errors.append(f"Invalid answer_type: {atype}")
-
-    # pastikan field inti konsisten dalam 1 group
-    base = rows[0]
-    for idx, r in enumerate(rows[1:], start=1):
-        for field in ("package_slug", "section_title", "order_index", "answer_type", "stem"):
-            if (r.get(field, "") or "") != (base.get(field, "") or ""):
-                errors.append(f"Inconsistent '{field}' inside same question group (line {line_numbers[idx]})")
-                break
-
-    correct_count = sum(1 for r in rows if str(r.get("is_correct", "0")) == "1")
-
-    if atype == "SINGLE":
-        if correct_count != 1:
-            errors.append(f"SINGLE must have exactly 1 correct answer (found {correct_count})")
-    elif atype == "MULTI":
-        if correct_count < 1:
-            errors.append("MULTI must have at least 1 correct answer")
-    elif atype == "WEIGHTED":
-        if correct_count > 0:
-            errors.append("WEIGHTED should not use is_correct (set all to 0)")
-
-    for i, r in enumerate(rows):
-        if not r.get("stem"):
-            errors.append(f"Empty stem at line {line_numbers[i]}")
-        if not r.get("choice_label"):
-            errors.append(f"Empty choice_label at line {line_numbers[i]}")
-        choice_text = (r.get("choice_text") or "").strip()
-        choice_img = (r.get("choice_image_url") or "").strip()
-        choice_aud = (r.get("choice_audio_url") or "").strip()
-        # wajib minimal ada teks ATAU media
-        if not choice_text and not choice_img and not choice_aud:
-            errors.append(f"Choice must have text or media (line {line_numbers[i]})")
-
-    # optional media url validation (only check scheme)
-    img = (rows[0].get("image_url") or "").strip()
-    aud = (rows[0].get("audio_url") or "").strip()
-    if not _is_valid_http_url(img):
-        errors.append(f"Invalid image_url (must start with http/https): {img}")
-    if not _is_valid_http_url(aud):
-        errors.append(f"Invalid audio_url (must start with http/https): {aud}")
-
-    return errors
-
-ALLOWED_IMAGE_EXT = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
-ALLOWED_AUDIO_EXT = {".mp3", ".wav", ".ogg", ".m4a", ".aac"}
-
-def _safe_filename_from_url(url: str, fallback_prefix: str) -> str:
-    parsed = urlparse(url)
-    base = os.path.basename(parsed.path) or fallback_prefix
-    # remove weird chars
-    base = "".join(ch for ch in base if ch.isalnum() or ch in ("-", "_", ".", " "))
-    base = base.replace(" ", "_")
-    if "." not in base:
-        base += ".bin"
-    return base
-
-
-def download_to_field(instance, field_name: str, url: str, timeout: int = 15):
-    """
-    Download URL and save into instance.<field_name> (Django FileField/ImageField).
-    Raises ValueError on failure.
-    """
-    url = (url or "").strip()
-    if not url:
-        return
-
-    if not (url.startswith("http://") or url.startswith("https://")):
-        raise ValueError(f"Invalid URL for {field_name}: {url}")
-
-    # Download bytes
-    try:
-        req = urllib.request.Request(url, headers={"User-Agent": "tryout-csv-import/1.0"})
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            data = resp.read()
-            content_type = resp.headers.get("Content-Type", "")
-    except Exception as e:
-        raise ValueError(f"Failed to download {field_name} from {url}: {e}")
-
-    if not data:
-        raise ValueError(f"Empty download for {field_name}: {url}")
-
-    filename = _safe_filename_from_url(url, f"{field_name}_{instance.pk or 'new'}")
-    ext = os.path.splitext(filename)[1].lower()
-
-    # Validate by extension (basic safety)
-    if field_name == "image":
-        if ext not in ALLOWED_IMAGE_EXT:
-            # try guess from content-type
-            guessed_ext = mimetypes.guess_extension(content_type.split(";")[0].strip()) or ""
-            if guessed_ext.lower() in ALLOWED_IMAGE_EXT:
-                filename = os.path.splitext(filename)[0] + guessed_ext
-            else:
-                raise ValueError(f"Unsupported image extension '{ext}' for URL: {url}")
-    if field_name == "audio":
-        if ext not in ALLOWED_AUDIO_EXT:
-            guessed_ext = mimetypes.guess_extension(content_type.split(";")[0].strip()) or ""
-            if guessed_ext.lower() in ALLOWED_AUDIO_EXT:
-                filename = os.path.splitext(filename)[0] + guessed_ext
-            else:
-                raise ValueError(f"Unsupported audio extension '{ext}' for URL: {url}")
-
-    # Save to field
-    f = ContentFile(data)
-    getattr(instance, field_name).save(filename, f, save=False)
-
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
@@ -202,21 +113,68 @@ class QuestionAdmin(admin.ModelAdmin):
         "section",
         "answer_type",
         "has_media",
+        "p_value",
+        "discrimination",
         "is_active",
         "order_index",
     )
     list_filter = ("package", "section", "answer_type", "is_active")
-    search_fields = ("stem", "package__title", "section__title")
+    search_fields = ("stem", "=key", "package__title", "section__title")
     ordering = ("package", "order_index", "id")
     list_editable = ("order_index", "is_active")
     autocomplete_fields = ("package", "section")
+    actions = ["renumber_order_index", "move_to_section", "activate_questions", "deactivate_questions"]
 
     fieldsets = (
         ("Konten Soal", {
-            "fields": ("package", "section", "order_index", "is_active", "answer_type", "stem", "explanation")
+            "fields": ("package", "section", "key", "order_index", "is_active", "answer_type", "stem", "explanation")
         }),
         ("Media", {"fields": ("image", "audio")}),
+        ("Item Analysis", {"fields": ("item_stats",)}),
     )
+    readonly_fields = ("item_stats",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("package", "section", "stats")
+
+    def _stats(self, obj):
+        try:
+            return obj.stats
+        except QuestionStats.DoesNotExist:
+            return None
+
+    @admin.display(description="P", ordering="stats__difficulty")
+    def p_value(self, obj):
+        st = self._stats(obj)
+        return "-" if st is None or st.difficulty is None else f"{st.difficulty:.2f}"
+
+    @admin.display(description="Daya beda", ordering="stats__discrimination")
+    def discrimination(self, obj):
+        st = self._stats(obj)
+        return "-" if st is None or st.discrimination is None else f"{st.discrimination:.2f}"
+
+    @admin.display(description="Statistik")
+    def item_stats(self, obj):
+        st = self._stats(obj) if obj.pk else None
+        if st is None or not st.n:
+            return "Belum ada data (jalankan manage.py analyze_items)."
+        rows = format_html_join(
+            "",
+            "<tr><td>{}</td><td>{}</td><td>{}</td></tr>",
+            (
+                (c.label or "-", "✔" if c.is_correct else "", f"{st.selection_rate(c.id):.0%}")
+                for c in obj.choices.all()
+            ),
+        )
+        return format_html(
+            "<div>N = {} &bull; P = {} &bull; Daya beda = {} &bull; Kosong = {}</div>"
+            "<table><tr><th>Pilihan</th><th>Kunci</th><th>Dipilih</th></tr>{}</table>",
+            st.n,
+            "-" if st.difficulty is None else f"{st.difficulty:.2f}",
+            "-" if st.discrimination is None else f"{st.discrimination:.2f}",
+            f"{st.blank_count / st.n:.0%}",
+            rows,
+        )
 
     @admin.display(description="Soal")
     def short_stem(self, obj):
@@ -231,6 +189,58 @@ class QuestionAdmin(admin.ModelAdmin):
             return "AUDIO"
         return "-"
 
+    # ---------- bulk actions: satu UPDATE / bulk_update, content_version tiap paket naik sekali ----------
+
+    @admin.action(description="Nomori ulang order_index paket soal terpilih (1, 2, 3, ...)")
+    def renumber_order_index(self, request, queryset):
+        # seluruh soal paket ikut dinomori (bukan hanya yang dipilih), supaya tidak ada nomor kembar
+        package_ids = list(queryset.order_by().values_list("package_id", flat=True).distinct())
+        n = Package.renumber_questions(package_ids)
+        self.message_user(
+            request, f"{len(package_ids)} paket dinomori ulang ({n} soal berubah nomor).", level=messages.SUCCESS,
+        )
+
+    @admin.action(description="Pindahkan ke section...")
+    def move_to_section(self, request, queryset):
+        package_ids = set(queryset.values_list("package_id", flat=True).distinct())
+        if len(package_ids) != 1:
+            self.message_user(request, "Pilih soal dari satu paket saja.", level=messages.ERROR)
+            return None
+        package_id = package_ids.pop()
+        form = MoveToSectionForm(request.POST if "apply" in request.POST else None, package_id=package_id)
+
+        if form.is_valid():
+            section = form.cleaned_data["section"]
+            n = queryset.update(section=section)
+            Package.bump_content_version(pk=package_id)
+            self.message_user(request, f"{n} soal dipindah ke {section or 'tanpa section'}.", level=messages.SUCCESS)
+            return None
+
+        context = dict(
+            self.admin_site.each_context(request),
+            title="Pindahkan soal ke section",
+            form=form,
+            queryset=queryset,
+            opts=self.model._meta,
+            action_checkbox_name=helpers.ACTION_CHECKBOX_NAME,
+        )
+        return render(request, "admin/move_questions_section.html", context)
+
+    def _set_active(self, request, queryset, active):
+        package_ids = list(queryset.values_list("package_id", flat=True).distinct())
+        n = queryset.exclude(is_active=active).update(is_active=active)
+        if n:
+            Package.sync_question_count(id__in=package_ids)
+        self.message_user(request, f"{n} soal {'diaktifkan' if active else 'dinonaktifkan'}.", level=messages.SUCCESS)
+
+    @admin.action(description="Aktifkan soal terpilih")
+    def activate_questions(self, request, queryset):
+        self._set_active(request, queryset, True)
+
+    @admin.action(description="Nonaktifkan soal terpilih")
+    def deactivate_questions(self, request, queryset):
+        self._set_active(request, queryset, False)
+
     change_list_template = "admin/question_changelist.html"
 
     def get_urls(self):
@@ -251,21 +261,8 @@ class QuestionAdmin(admin.ModelAdmin):
             if form.is_valid():
                 file = request.FILES["csv_file"]
                 decoded = file.read().decode("utf-8").splitlines()
-                reader = csv.DictReader(decoded)
-
-                grouped = {}   # key_str -> [rows]
-                line_map = {}  # key_str -> [line_numbers]
-
-                for i, row in enumerate(reader, start=2):
-                    qkey = (row.get("question_key") or "").strip()
-                    if qkey:
-                        key_str = qkey
-                    else:
-                        # fallback (tidak ideal), tapi mengurangi risiko stem sama:
-                        key_str = f"{row['package_slug']}||{row.get('section_title','')}||{row.get('order_index','')}||{row.get('answer_type','')}||{row.get('stem','')}"
-
-                    grouped.setdefault(key_str, []).append(row)
-                    line_map.setdefault(key_str, []).append(i)
+                grouped, line_map = group_rows(csv.DictReader(decoded))
+                deactivate_missing = form.cleaned_data["deactivate_missing"]
 
                 errors = []
                 preview = []
@@ -287,8 +284,17 @@ class QuestionAdmin(admin.ModelAdmin):
                             "choice_count": len(rows),
                         })
 
+                # perubahan terhadap isi database (dry run, di-rollback)
+                changes = {}
+                if not errors:
+                    try:
+                        changes = import_groups(grouped, deactivate_missing=deactivate_missing, dry_run=True)
+                    except (BankError, ValueError) as e:
+                        errors.append(str(e))
+
                 # simpan ke session (session-safe: key string)
                 request.session["csv_import_data"] = grouped
+                request.session["csv_import_deactivate"] = deactivate_missing
 
                 context = dict(
                     self.admin_site.each_context(request),
@@ -296,6 +302,7 @@ class QuestionAdmin(admin.ModelAdmin):
                     preview=preview,
                     total_questions=len(grouped),
                     total_choices=total_choices,
+                    changes=changes,
                     errors=errors,
                 )
                 return render(request, "admin/import_questions_preview.html", context)
@@ -309,80 +316,18 @@ class QuestionAdmin(admin.ModelAdmin):
                 return redirect("..")
 
             try:
-                with transaction.atomic():
-                    for key_str, rows in grouped.items():
-                        row0 = rows[0]
-                        package_slug = row0["package_slug"]
-                        section_title = (row0.get("section_title") or "").strip()
-                        stem = row0.get("stem", "")
-
-
-                        try:
-                            package = Package.objects.get(slug=package_slug)
-                        except Package.DoesNotExist:
-                            raise ValueError(f"Package not found: {package_slug}")
-
-                        section = None
-                        if section_title:
-                            section, _ = Section.objects.get_or_create(
-                                title=section_title,
-                                package=package,
-                                defaults={"order_index": 0},
-                            )
-
-                        q = Question.objects.create(
-                            package=package,
-                            section=section,
-                            stem=stem,
-                            explanation=row0.get("explanation", ""),
-                            answer_type=row0["answer_type"],
-                            order_index=int(row0.get("order_index") or 0),
-                            is_active=True,
-                        )
-
-                        # Import media (optional) from URLs
-                        image_url = (row0.get("image_url") or "").strip()
-                        audio_url = (row0.get("audio_url") or "").strip()
-
-                        if image_url:
-                            download_to_field(q, "image", image_url)
-
-                        if audio_url:
-                            download_to_field(q, "audio", audio_url)
-
-                        # save q once after attaching files
-                        q.save()
-
-                        for r in rows:
-                            choice = Choice.objects.create(
-                                question=q,
-                                label=r.get("choice_label", ""),
-                                text=r.get("choice_text", ""),
-                                points=int(r.get("choice_points") or 0),
-                                is_correct=str(r.get("is_correct", "0")) == "1",
-                            )
-
-                            # import choice media
-                            cimg = (r.get("choice_image_url") or "").strip()
-                            caud = (r.get("choice_audio_url") or "").strip()
-
-                            if cimg:
-                                download_to_field(choice, "image", cimg)
-
-                            if caud:
-                                download_to_field(choice, "audio", caud)
-
-                            choice.save()
-
-
-                del request.session["csv_import_data"]
-                self.message_user(request, "Import CSV berhasil!", level=messages.SUCCESS)
-                return redirect("..")
-
+                results = import_groups(grouped, deactivate_missing=request.session.get("csv_import_deactivate", False))
             except Exception as e:
                 self.message_user(request, f"Error saat import: {e}", level=messages.ERROR)
                 return redirect("..")
 
+            del request.session["csv_import_data"]
+            request.session.pop("csv_import_deactivate", None)
+            for slug, result in results.items():
+                self.message_user(request, f"{slug}: {result}", level=messages.INFO)
+            self.message_user(request, "Import CSV berhasil!", level=messages.SUCCESS)
+            return redirect("..")
+
         # ===== UPLOAD FORM =====
         form = CSVImportForm()
         context = dict(
@@ -394,11 +339,14 @@ class QuestionAdmin(admin.ModelAdmin):
 
 
 @admin.register(Choice)
-class ChoiceAdmin(admin.ModelAdmin):
+class ChoiceAdmin(LargeTableAdmin, admin.ModelAdmin):
     list_display = ("question", "order_index", "label", "text_short", "has_media", "points", "is_correct")
-    list_filter = ("is_correct", "question__package", "question__answer_type")
+    list_filter = ("is_correct", ("question__package", AutocompleteFilter), "question__answer_type")
     search_fields = ("label", "text", "question__stem", "question__package__title")
-    ordering = ("question", "order_index", "id")
+    # Question.__str__ membaca package.title
+    list_select_related = ("question__package",)
+    ordering = ("question_id", "order_index", "id")
+    raw_id_fields = ("question",)
     list_editable = ("order_index", "is_correct", "points")
 
     @admin.display(description="Text")
@@ -415,20 +363,47 @@ class ChoiceAdmin(admin.ModelAdmin):
         return "-"
 
 
+# Attempt/AttemptAnswer/ArchivedAttempt bisa jutaan baris: urut per id (index primary key,
+# sama dengan urutan waktu dibuat), tanpa COUNT(*) penuh, filter paket lewat autocomplete.
+
 @admin.register(Attempt)
-class AttemptAdmin(admin.ModelAdmin):
+class AttemptAdmin(LargeTableAdmin, admin.ModelAdmin):
     list_display = ("id", "user", "package", "mode", "status", "score", "created_at")
-    list_filter = ("mode", "status", "package")
+    list_filter = ("mode", "status", ("package", AutocompleteFilter))
     search_fields = ("user__username", "package__title")
-    ordering = ("-created_at",)
+    list_select_related = ("user", "package")
+    ordering = ("-id",)
+    raw_id_fields = ("user", "package")
 
 
 @admin.register(AttemptAnswer)
-class AttemptAnswerAdmin(admin.ModelAdmin):
+class AttemptAnswerAdmin(LargeTableAdmin, admin.ModelAdmin):
     list_display = ("attempt", "question", "flagged", "answered_at")
-    list_filter = ("flagged", "attempt__package")
+    list_filter = ("flagged", ("attempt__package", AutocompleteFilter))
     search_fields = ("attempt__user__username", "question__stem")
-    ordering = ("-answered_at",)
+    # Attempt.__str__ = user + package, Question.__str__ = package
+    list_select_related = ("attempt__user", "attempt__package", "question__package")
+    ordering = ("-id",)
+    raw_id_fields = ("attempt", "question", "choices")
+
+
+@admin.register(ArchivedAttempt)
+class ArchivedAttemptAdmin(LargeTableAdmin, admin.ModelAdmin):
+    list_display = ("id", "user", "package", "mode", "status", "score", "submitted_at", "archived_at")
+    list_filter = ("mode", "status", ("package", AutocompleteFilter))
+    search_fields = ("user__username", "package__title")
+    list_select_related = ("user", "package")
+    ordering = ("-id",)
+    raw_id_fields = ("user", "package")
+    readonly_fields = ("answers", "flagged")
+
+
+@admin.register(PackageRankEntry)
+class PackageRankEntryAdmin(admin.ModelAdmin):
+    list_display = ("package", "user", "best_score", "achieved_at")
+    list_filter = ("package",)
+    search_fields = ("user__username", "package__title")
+    ordering = ("package", "-best_score", "achieved_at")
 
 
 @admin.register(UserPackage)
@@ -438,5 +413,18 @@ class UserPackageAdmin(admin.ModelAdmin):
     search_fields = ("user__username", "package__title")
     ordering = ("-created_at",)
 
+class MoveToSectionForm(forms.Form):
+    section = forms.ModelChoiceField(queryset=Section.objects.none(), required=False, empty_label="(tanpa section)")
+
+    def __init__(self, *args, package_id=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["section"].queryset = Section.objects.filter(package_id=package_id)
+
+
 class CSVImportForm(forms.Form):
-    csv_file = forms.FileField()
\ No newline at end of file
+    csv_file = forms.FileField()
+    deactivate_missing = forms.BooleanField(
+        required=False,
+        label="Nonaktifkan soal yang tidak ada di CSV",
+        help_text="Per paket yang ada di CSV. Soal dicocokkan lewat question_key.",
+    )
\ No newline at end of file
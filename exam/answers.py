@@ -0,0 +1,202 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db.models import F, Q
+
+from .models import CHOICE_ORDINAL_LIMIT, ArchivedAttempt, AttemptAnswer, Choice
+
+
+# bit ke-i = pilihan dengan Choice.ordinal == i (dibagikan sekali per soal, tidak ikut berubah
+# saat pilihan diurutkan ulang / dihapus). "choice_order" di modul ini = question_id -> slot:
+# list dengan posisi = ordinal, None untuk ordinal pilihan yang sudah dihapus.
+MAX_PACKED_CHOICES = CHOICE_ORDINAL_LIMIT
+
+
+def packed_storage() -> bool:
+    """
+    EXAM_ANSWER_STORAGE = "packed": pilihan jawaban hanya disimpan di
+    AttemptAnswer.choice_mask (tanpa baris di tabel M2M).
+    Default "m2m": tetap tulis M2M (+ choice_mask, supaya bisa pindah mode kapan saja).
+    """
+    return getattr(settings, "EXAM_ANSWER_STORAGE", "m2m") == "packed"
+
+
+def ordinal_slots(pairs: Iterable[Tuple[int, int]]) -> List[Optional[int]]:
+    """[(choice_id, ordinal), ...] -> slot list (posisi = ordinal)."""
+    slots: List[Optional[int]] = []
+    for cid, ordinal in pairs:
+        if ordinal >= len(slots):
+            slots.extend([None] * (ordinal + 1 - len(slots)))
+        slots[ordinal] = cid
+    return slots
+
+
+def choice_slots(question_ids: Iterable[int]) -> Dict[int, List[Optional[int]]]:
+    """Slot ordinal pilihan untuk soal-soal tsb (satu query)."""
+    pairs: Dict[int, List[Tuple[int, int]]] = {qid: [] for qid in question_ids}
+    for cid, qid, ordinal in Choice.objects.filter(question_id__in=list(pairs)).values_list(
+        "id", "question_id", "ordinal"
+    ):
+        pairs[qid].append((cid, ordinal))
+    return {qid: ordinal_slots(p) for qid, p in pairs.items()}
+
+
+def pack_choice_ids(selected: Iterable[int], slots: List[Optional[int]]) -> int:
+    if len(slots) > MAX_PACKED_CHOICES:
+        raise ValueError(f"Pilihan dengan ordinal >= {MAX_PACKED_CHOICES} tidak muat di choice_mask")
+    pos = {cid: i for i, cid in enumerate(slots) if cid is not None}
+    mask = 0
+    for cid in selected:
+        if cid in pos:
+            mask |= 1 << pos[cid]
+    return mask
+
+
+def unpack_choice_ids(mask: int, slots: List[Optional[int]]) -> List[int]:
+    return [cid for i, cid in enumerate(slots) if cid is not None and mask >> i & 1]
+
+
+def choice_order_from_manifest(manifest: Dict[str, Any]) -> Dict[int, List[Optional[int]]]:
+    """question_id -> slot ordinal pilihan (manifest menyimpan ordinal tiap pilihan)."""
+    return {
+        q["id"]: ordinal_slots((c["id"], c["ordinal"]) for c in q["choices"])
+        for q in manifest["questions"]
+    }
+
+
+def answered_choice_ids(choices: Iterable[Tuple[int, int, int]]) -> Set[int]:
+    """
+    (choice_id, question_id, ordinal) -> id pilihan yang pernah dipilih di jawaban mana pun:
+    baris M2M, bit choice_mask (dua-duanya dicek, apa pun modenya) atau attempt arsip.
+    Dipakai sebelum menghapus pilihan.
+    """
+    choices = list(choices)
+    if not choices:
+        return set()
+    Through = AttemptAnswer.choices.through
+    found = set(
+        Through.objects.filter(choice_id__in=[c[0] for c in choices]).values_list("choice_id", flat=True).distinct()
+    )
+
+    bits: Dict[int, Dict[int, int]] = {}
+    for cid, qid, ordinal in choices:
+        if cid not in found:
+            bits.setdefault(qid, {})[cid] = 1 << ordinal
+    for qid, per_choice in bits.items():
+        mask = 0
+        for bit in per_choice.values():
+            mask |= bit
+        hits = (
+            AttemptAnswer.objects.filter(question_id=qid)
+            .annotate(hit=F("choice_mask").bitand(mask))
+            .exclude(hit=0)
+            .values_list("hit", flat=True)
+            .distinct()
+        )
+        for hit in hits:
+            found.update(cid for cid, bit in per_choice.items() if hit & bit)
+
+    # arsip: answers = {"<question_id>": [choice_id, ...]}
+    by_question: Dict[str, Set[int]] = {}
+    for cid, qid, _ in choices:
+        by_question.setdefault(str(qid), set()).add(cid)
+    has_any = Q()
+    for key in by_question:
+        has_any |= Q(answers__has_key=key)
+    for answers in ArchivedAttempt.objects.filter(has_any).values_list("answers", flat=True).iterator():
+        for key, ids in by_question.items():
+            found.update(ids.intersection(answers.get(key, ())))
+    return found
+
+
+def set_selection(answer: AttemptAnswer, selected_ids: Iterable[int], slots: List[Optional[int]], now=None):
+    """
+    Ganti pilihan pada satu AttemptAnswer. selected_ids harus sudah divalidasi
+    milik soal tsb. Caller tetap harus answer.save().
+    """
+    wanted = set(selected_ids)
+    selected = [cid for cid in slots if cid is not None and cid in wanted]
+    answer.choice_mask = pack_choice_ids(selected, slots)
+    answer.answered_at = now if selected else None
+    if not packed_storage():
+        answer.choices.set(selected)
+
+
+def load_answers(
+    attempt_id: int,
+    choice_order: Dict[int, List[int]],
+    question_ids: Optional[Iterable[int]] = None,
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Jawaban satu attempt: question_id -> {"choices": [...], "flagged", "client_seq"}.
+    Maksimal dua query (mode m2m), satu query (mode packed).
+    """
+    qids = list(choice_order) if question_ids is None else list(question_ids)
+    rows = AttemptAnswer.objects.filter(attempt_id=attempt_id, question_id__in=qids).values_list(
+        "id", "question_id", "flagged", "client_seq", "choice_mask"
+    )
+
+    state: Dict[int, Dict[str, Any]] = {}
+    by_answer_id: Dict[int, Dict[str, Any]] = {}
+    for answer_id, qid, flagged, client_seq, mask in rows:
+        st = {"choices": [], "flagged": flagged, "client_seq": client_seq}
+        if packed_storage():
+            st["choices"] = unpack_choice_ids(mask, choice_order.get(qid, []))
+        state[qid] = st
+        by_answer_id[answer_id] = st
+
+    if not packed_storage() and by_answer_id:
+        Through = AttemptAnswer.choices.through
+        for answer_id, choice_id in (
+            Through.objects.filter(attemptanswer_id__in=by_answer_id.keys())
+            .values_list("attemptanswer_id", "choice_id")
+        ):
+            by_answer_id[answer_id]["choices"].append(choice_id)
+        for qid, st in state.items():
+            pos = {cid: i for i, cid in enumerate(choice_order.get(qid, [])) if cid is not None}
+            st["choices"].sort(key=lambda cid: pos.get(cid, len(pos)))
+
+    return state
+
+
+def load_answers_bulk(attempt_ids: Iterable[int]) -> Dict[int, Dict[int, Dict[str, Any]]]:
+    """
+    Seperti load_answers tapi untuk banyak attempt sekaligus (arsip, export, analitik).
+    Urutan pilihan diambil sendiri dari tabel Choice untuk soal yang terlibat.
+    Return attempt_id -> question_id -> {"choices", "flagged", "client_seq"}.
+    """
+    rows = list(
+        AttemptAnswer.objects.filter(attempt_id__in=list(attempt_ids)).values_list(
+            "id", "attempt_id", "question_id", "flagged", "client_seq", "choice_mask"
+        )
+    )
+    result: Dict[int, Dict[int, Dict[str, Any]]] = {}
+    by_answer_id: Dict[int, Dict[str, Any]] = {}
+    masks: Dict[int, tuple] = {}
+    for answer_id, attempt_id, qid, flagged, client_seq, mask in rows:
+        st = {"choices": [], "flagged": flagged, "client_seq": client_seq}
+        result.setdefault(attempt_id, {})[qid] = st
+        by_answer_id[answer_id] = st
+        masks[answer_id] = (qid, mask)
+
+    if not rows:
+        return result
+
+    order = choice_slots({m[0] for m in masks.values()})
+
+    if packed_storage():
+        for answer_id, (qid, mask) in masks.items():
+            by_answer_id[answer_id]["choices"] = unpack_choice_ids(mask, order.get(qid, []))
+    else:
+        Through = AttemptAnswer.choices.through
+        for answer_id, choice_id in (
+            Through.objects.filter(attemptanswer_id__in=by_answer_id.keys())
+            .values_list("attemptanswer_id", "choice_id")
+        ):
+            by_answer_id[answer_id]["choices"].append(choice_id)
+        for answer_id, (qid, _) in masks.items():
+            pos = {cid: i for i, cid in enumerate(order.get(qid, [])) if cid is not None}
+            by_answer_id[answer_id]["choices"].sort(key=lambda cid: pos.get(cid, len(pos)))
+
+    return result
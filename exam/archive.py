@@ -0,0 +1,112 @@
+from __future__ import annotations
+from datetime import timedelta
+from typing import List, Optional, Union
+
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404
+from django.utils import timezone
+
+from .answers import load_answers_bulk
+from .manifest import get_attempt_manifest
+from .models import ArchivedAttempt, Attempt, Package
+
+
+AnyAttempt = Union[Attempt, ArchivedAttempt]
+
+
+def archivable_attempts(older_than: timedelta):
+    cutoff = timezone.now() - older_than
+    return Attempt.objects.exclude(status__in=[Attempt.Status.IN_PROGRESS, Attempt.Status.SUBMITTING]).filter(
+        Q(submitted_at__lt=cutoff) | Q(submitted_at__isnull=True, created_at__lt=cutoff)
+    )
+
+
+def archive_attempts(older_than: timedelta, batch_size: int = 500) -> int:
+    """
+    Pindahkan attempt selesai yang lebih tua dari older_than ke ArchivedAttempt,
+    per batch (satu transaksi per batch). Return jumlah attempt yang diarsip.
+    """
+    total = 0
+    qs = archivable_attempts(older_than).select_related("package").order_by("id")
+    while True:
+        batch: List[Attempt] = list(qs[:batch_size])
+        if not batch:
+            return total
+
+        answers = load_answers_bulk([a.id for a in batch])
+        totals = {}
+        archived = []
+        for a in batch:
+            if a.drawn_questions is not None:
+                total_questions = len(get_attempt_manifest(a)["questions"])
+            else:
+                if a.package_id not in totals:
+                    totals[a.package_id] = len(get_attempt_manifest(a)["questions"])
+                total_questions = totals[a.package_id]
+            amap = answers.get(a.id, {})
+            archived.append(ArchivedAttempt(
+                id=a.id,
+                user_id=a.user_id,
+                package_id=a.package_id,
+                mode=a.mode,
+                status=a.status,
+                started_at=a.started_at,
+                submitted_at=a.submitted_at,
+                finalized_at=a.finalized_at,
+                created_at=a.created_at,
+                duration_seconds=a.duration_seconds,
+                question_order=a.question_order,
+                shuffle_choices=a.shuffle_choices,
+                shuffle_seed=a.shuffle_seed,
+                drawn_questions=a.drawn_questions,
+                score=a.score,
+                max_score=a.max_score,
+                total_questions=total_questions,
+                answered_count=sum(1 for st in amap.values() if st["choices"]),
+                flagged_count=sum(1 for st in amap.values() if st["flagged"]),
+                answers={str(qid): st["choices"] for qid, st in amap.items() if st["choices"]},
+                flagged=sorted(qid for qid, st in amap.items() if st["flagged"]),
+            ))
+
+        with transaction.atomic():
+            ArchivedAttempt.objects.bulk_create(archived, ignore_conflicts=True)
+            Attempt.objects.filter(id__in=[a.id for a in batch]).delete()
+        total += len(batch)
+
+
+def get_user_attempt(attempt_id: int, user) -> AnyAttempt:
+    """Attempt milik user dari tabel aktif, atau dari arsip kalau sudah dipindah."""
+    attempt = Attempt.objects.select_related("package").filter(id=attempt_id, user=user).first()
+    if attempt is None:
+        attempt = ArchivedAttempt.objects.select_related("package").filter(id=attempt_id, user=user).first()
+    if attempt is None:
+        raise Http404("Attempt tidak ditemukan.")
+    return attempt
+
+
+def recent_attempts(user, limit: int = 50) -> List[AnyAttempt]:
+    hot = list(
+        Attempt.objects.filter(user=user).select_related("package", "package__category").order_by("-created_at")[:limit]
+    )
+    if len(hot) >= limit:
+        return hot
+    cold = list(
+        ArchivedAttempt.objects.filter(user=user)
+        .select_related("package", "package__category")
+        .order_by("-created_at")[: limit - len(hot)]
+    )
+    return hot + cold
+
+
+def latest_submitted_attempt(user, package: Package) -> Optional[AnyAttempt]:
+    for model in (Attempt, ArchivedAttempt):
+        attempt = (
+            model.objects.filter(user=user, package=package, status=Attempt.Status.SUBMITTED)
+            .order_by("-submitted_at")
+            .first()
+        )
+        if attempt:
+            return attempt
+    return None
+
@@ -0,0 +1,135 @@
+from __future__ import annotations
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import wave
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from .images import shared_elsewhere
+from .models import Choice, Package, Question
+
+
+logger = logging.getLogger(__name__)
+
+# Audio soal/pilihan di-transcode (ffmpeg) ke Opus (ogg) dan AAC (m4a) dengan bitrate
+# dibatasi, durasinya dicatat. Hasil di <model>.audio_derivatives:
+#   {"src": nama file asli, "duration": detik, "sources": [{"type", "name", "kbps"}, ...]}
+# Urutan sources = urutan <source> di <audio>: Opus dulu (lebih kecil), AAC untuk Safari lama.
+# Tanpa ffmpeg di server: hanya durasi (WAV via modul wave) yang dicatat.
+
+MODELS = {"question": Question, "choice": Choice}
+
+VARIANTS = [
+    # (ekstensi, MIME, argumen codec ffmpeg)
+    ("ogg", "audio/ogg; codecs=opus", ["-c:a", "libopus", "-application", "voip"]),
+    ("m4a", "audio/mp4", ["-c:a", "aac", "-movflags", "+faststart"]),
+]
+
+
+def ffmpeg_bin() -> Optional[str]:
+    return shutil.which(getattr(settings, "EXAM_FFMPEG", "ffmpeg"))
+
+
+def audio_kbps() -> int:
+    return getattr(settings, "EXAM_AUDIO_KBPS", 48)
+
+
+def needs_audio_derivatives(instance) -> bool:
+    if not instance.audio:
+        return False
+    return (instance.audio_derivatives or {}).get("src") != instance.audio.name
+
+
+def probe_duration(path: str) -> Optional[float]:
+    ffprobe = shutil.which(getattr(settings, "EXAM_FFPROBE", "ffprobe"))
+    if ffprobe:
+        out = subprocess.run(
+            [ffprobe, "-v", "error", "-show_entries", "format=duration", "-of", "json", path],
+            capture_output=True, timeout=60,
+        )
+        try:
+            return round(float(json.loads(out.stdout)["format"]["duration"]), 2)
+        except (KeyError, ValueError):
+            return None
+    try:
+        with wave.open(path, "rb") as w:
+            return round(w.getnframes() / float(w.getframerate()), 2)
+    except (wave.Error, EOFError):
+        return None
+
+
+def _transcode(ffmpeg: str, src: str, dst: str, codec_args: List[str]):
+    subprocess.run(
+        [ffmpeg, "-nostdin", "-y", "-v", "error", "-i", src, "-vn", "-map_metadata", "-1",
+         "-ac", str(getattr(settings, "EXAM_AUDIO_CHANNELS", 1)), "-b:a", f"{audio_kbps()}k",
+         *codec_args, dst],
+        check=True, capture_output=True, timeout=getattr(settings, "EXAM_FFMPEG_TIMEOUT", 300),
+    )
+
+
+def build_audio_derivatives(fieldfile) -> Dict[str, Any]:
+    stem = os.path.splitext(fieldfile.name)[0]
+    ffmpeg = ffmpeg_bin()
+    sources = []
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "src" + os.path.splitext(fieldfile.name)[1])
+        with fieldfile.open("rb") as fh, open(src, "wb") as out:
+            shutil.copyfileobj(fh, out)
+
+        duration = probe_duration(src)
+        if ffmpeg is None:
+            logger.warning("ffmpeg not found, %s is served as uploaded", fieldfile.name)
+        else:
+            for ext, mime, codec_args in VARIANTS:
+                dst = os.path.join(tmp, f"out.{ext}")
+                _transcode(ffmpeg, src, dst, codec_args)
+                with open(dst, "rb") as fh:
+                    name = default_storage.save(f"derivatives/{stem}_{audio_kbps()}k.{ext}", File(fh))
+                sources.append({"type": mime, "name": name, "kbps": audio_kbps()})
+
+    return {"src": fieldfile.name, "duration": duration, "sources": sources}
+
+
+def delete_audio_derivatives(derivatives: Optional[Dict[str, Any]]):
+    for source in (derivatives or {}).get("sources", []):
+        default_storage.delete(source["name"])
+
+
+def generate_audio_derivatives(model: str, pk: int, force: bool = False) -> bool:
+    """Seperti images.generate_derivatives, untuk field audio."""
+    cls = MODELS[model]
+    instance = cls.objects.filter(pk=pk).first()
+    if instance is None or not (force or needs_audio_derivatives(instance)):
+        return False
+
+    old = instance.audio_derivatives
+    derivatives = build_audio_derivatives(instance.audio)
+    cls.objects.filter(pk=pk).update(audio_derivatives=derivatives)
+    if old and not shared_elsewhere("audio", old.get("src"), model, pk):
+        delete_audio_derivatives(old)
+
+    if model == "question":
+        Package.bump_media_version(questions__id=pk)
+    else:
+        Package.bump_media_version(questions__choices__id=pk)
+    return True
+
+
+def audio_sources(fieldfile, derivatives: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Konteks template exam/fragments/_audio.html / entri manifest (None kalau tidak ada audio)."""
+    if not fieldfile:
+        return None
+    out: Dict[str, Any] = {"url": fieldfile.url, "duration": None, "sources": []}
+    if derivatives and derivatives.get("src") == fieldfile.name:
+        out["duration"] = derivatives.get("duration")
+        out["sources"] = [
+            {"type": s["type"], "url": default_storage.url(s["name"])} for s in derivatives.get("sources", [])
+        ]
+    return out
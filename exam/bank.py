@@ -0,0 +1,553 @@
+from __future__ import annotations
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import zipfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .answers import answered_choice_ids
+from .export import FORMATS
+from .models import Choice, ExamCategory, Package, Question, Section, _queue_media_derivatives
+
+
+# Bank soal satu paket dalam satu arsip zip, untuk dipindah antar environment:
+#   manifest.json            {"format": "tryout-bank", "version": 1, "package": {...}, "tables": {...}}
+#   sections.<fmt>           title, order_index
+#   questions.<fmt>          key, section, stem, ... image/audio = path media di arsip
+#   choices.<fmt>            question_key, label, ... (dicocokkan per label)
+#   media/<sha256>.<ext>     isi file, satu kali per isi walau dipakai banyak soal/pilihan
+# <fmt> = jsonl atau csv. Import = upsert per Question.key: yang sama persis tidak disentuh,
+# jadi import ulang arsip yang sama tidak mengubah apa pun (content_version tetap).
+
+BANK_FORMAT = "tryout-bank"
+BANK_VERSION = 1
+
+SECTION_FIELDS = ["title", "order_index"]
+QUESTION_FIELDS = [
+    "key", "section", "order_index", "content_type", "answer_type",
+    "stem", "explanation", "is_active", "image", "audio",
+]
+CHOICE_FIELDS = ["question_key", "label", "order_index", "text", "is_correct", "points", "image", "audio"]
+TABLES = {"sections": SECTION_FIELDS, "questions": QUESTION_FIELDS, "choices": CHOICE_FIELDS}
+
+PACKAGE_FIELDS = [
+    "slug", "title", "description", "is_paid", "price", "duration_minutes",
+    "question_order", "shuffle_choices", "prefetch_all_media",
+]
+
+_INT_FIELDS = {"order_index", "points"}
+_BOOL_FIELDS = {"is_active", "is_correct"}
+
+# field yang dibandingkan saat upsert (selain section & media)
+_QUESTION_VALUES = ["order_index", "content_type", "answer_type", "stem", "explanation", "is_active"]
+_CHOICE_VALUES = ["order_index", "text", "is_correct", "points"]
+_MEDIA_FIELDS = ["image", "audio"]
+
+
+class BankError(ValueError):
+    pass
+
+
+# ---------- export ----------
+
+def _sha256(name: str) -> str:
+    h = hashlib.sha256()
+    with default_storage.open(name, "rb") as fh:
+        for chunk in iter(lambda: fh.read(64 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _media_names(package: Package) -> Iterator[str]:
+    for model, lookup in ((Question, "package"), (Choice, "question__package")):
+        for image, audio in model.objects.filter(**{lookup: package}).values_list("image", "audio").iterator():
+            yield from (n for n in (image, audio) if n)
+
+
+def _write_media(zf: zipfile.ZipFile, package: Package) -> Dict[str, str]:
+    """Tulis media paket ke media/<sha256>.<ext>; return nama storage -> path di arsip."""
+    paths: Dict[str, str] = {}
+    written = set()
+    for name in _media_names(package):
+        if name in paths:
+            continue
+        if not default_storage.exists(name):
+            paths[name] = ""
+            continue
+        arcname = f"media/{_sha256(name)}{os.path.splitext(name)[1].lower()}"
+        paths[name] = arcname
+        if arcname in written:
+            continue
+        # media sudah terkompres (jpg/png/mp3/...), disimpan apa adanya
+        info = zipfile.ZipInfo(arcname, date_time=timezone.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        with default_storage.open(name, "rb") as src, zf.open(info, "w", force_zip64=True) as dst:
+            for chunk in iter(lambda: src.read(64 * 1024), b""):
+                dst.write(chunk)
+        written.add(arcname)
+    return paths
+
+
+def _section_rows(package: Package):
+    for title, order_index in package.sections.order_by("order_index", "id").values_list("title", "order_index"):
+        yield {"title": title, "order_index": order_index}
+
+
+def _question_rows(package: Package, media: Dict[str, str]):
+    qs = (
+        Question.objects.filter(package=package)
+        .order_by("order_index", "id")
+        .values("key", "section__title", "image", "audio", *_QUESTION_VALUES)
+    )
+    for r in qs.iterator(chunk_size=2000):
+        row = {f: r[f] for f in _QUESTION_VALUES}
+        row.update(
+            key=r["key"], section=r["section__title"] or "",
+            image=media.get(r["image"] or "", ""), audio=media.get(r["audio"] or "", ""),
+        )
+        yield row
+
+
+def _choice_rows(package: Package, media: Dict[str, str]):
+    qs = (
+        Choice.objects.filter(question__package=package)
+        .order_by("question__order_index", "question_id", "order_index", "id")
+        .values("question__key", "label", "image", "audio", *_CHOICE_VALUES)
+    )
+    for r in qs.iterator(chunk_size=5000):
+        row = {f: r[f] for f in _CHOICE_VALUES}
+        row.update(
+            question_key=r["question__key"], label=r["label"],
+            image=media.get(r["image"] or "", ""), audio=media.get(r["audio"] or "", ""),
+        )
+        yield row
+
+
+def export_bank(package: Package, fileobj, fmt: str = "jsonl") -> Dict[str, int]:
+    """Tulis arsip bank soal ke fileobj (path atau file biner). Return jumlah baris per tabel."""
+    if fmt not in FORMATS:
+        raise BankError(f"Unknown format: {fmt}")
+
+    counts = {}
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        media = _write_media(zf, package)
+        tables = (
+            ("sections", _section_rows(package)),
+            ("questions", _question_rows(package, media)),
+            ("choices", _choice_rows(package, media)),
+        )
+        for table, rows in tables:
+            with zf.open(f"{table}.{fmt}", "w", force_zip64=True) as raw:
+                out = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+                for line in FORMATS[fmt](TABLES[table], _count(rows, counts, table)):
+                    out.write(line)
+                out.flush()
+                out.detach()
+
+        manifest = {
+            "format": BANK_FORMAT,
+            "version": BANK_VERSION,
+            "exported_at": timezone.now().isoformat(),
+            "package": {f: getattr(package, f) for f in PACKAGE_FIELDS},
+            "category": {"slug": package.category.slug, "name": package.category.name},
+            "tables": {t: f"{t}.{fmt}" for t in TABLES},
+            "counts": counts,
+            "media": len(set(p for p in media.values() if p)),
+        }
+        zf.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+    return counts
+
+
+def _count(rows: Iterable[Dict[str, Any]], counts: Dict[str, int], table: str):
+    counts[table] = 0
+    for r in rows:
+        counts[table] += 1
+        yield r
+
+
+# ---------- import ----------
+
+# Field bernilai None = tidak diubah (soal/pilihan baru: default model); media = nama storage, "" = dikosongkan.
+
+@dataclass
+class ChoiceData:
+    label: str
+    order_index: int = 0
+    text: str = ""
+    is_correct: bool = False
+    points: int = 0
+    image: Optional[str] = None
+    audio: Optional[str] = None
+
+
+@dataclass
+class QuestionData:
+    key: str
+    stem: str
+    section: str = ""
+    order_index: int = 0
+    content_type: Optional[str] = Question.ContentType.TEXT
+    answer_type: str = Question.AnswerType.SINGLE
+    explanation: Optional[str] = ""
+    is_active: bool = True
+    image: Optional[str] = None
+    audio: Optional[str] = None
+    choices: List[ChoiceData] = field(default_factory=list)
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deactivated: int = 0
+    sections_created: int = 0
+    choices_created: int = 0
+    choices_updated: int = 0
+    choices_deleted: int = 0
+    media_written: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(
+            self.created or self.updated or self.deactivated or self.sections_created
+            or self.choices_created or self.choices_updated or self.choices_deleted
+        )
+
+    def __str__(self):
+        return (
+            f"questions: {self.created} created, {self.updated} updated, {self.unchanged} unchanged, "
+            f"{self.deactivated} deactivated; choices: {self.choices_created} created, "
+            f"{self.choices_updated} updated, {self.choices_deleted} deleted; "
+            f"sections created: {self.sections_created}; media written: {self.media_written}"
+        )
+
+
+def _choice_slot(c) -> str:
+    # pilihan tanpa label dicocokkan per posisi
+    return c.label or f"#{c.order_index}"
+
+
+def _sync_sections(package: Package, titles: Dict[str, int], result: ImportResult) -> Dict[str, Section]:
+    """titles: judul -> order_index (None = biarkan). Section baru dibuat dengan bulk_create."""
+    existing = {s.title: s for s in package.sections.all()}
+    new = [Section(package=package, title=t, order_index=o or 0) for t, o in titles.items() if t not in existing]
+    if new:
+        Section.objects.bulk_create(new, ignore_conflicts=True)
+        result.sections_created = len(new)
+        existing = {s.title: s for s in package.sections.all()}
+
+    changed = []
+    for title, order_index in titles.items():
+        s = existing[title]
+        if order_index is not None and s.order_index != order_index:
+            s.order_index = order_index
+            changed.append(s)
+    if changed:
+        Section.objects.bulk_update(changed, ["order_index"])
+    return existing
+
+
+def _apply(obj, data, fields: List[str]) -> List[str]:
+    """Set field yang beda (None = tidak diubah); return nama field yang berubah."""
+    changed = []
+    for f in fields:
+        value = getattr(data, f)
+        if value is None:
+            continue
+        current = (getattr(obj, f).name or "") if f in _MEDIA_FIELDS else getattr(obj, f)
+        if current == value:
+            continue
+        setattr(obj, f, value)
+        changed.append(f)
+    return changed
+
+
+@transaction.atomic
+def upsert_questions(
+    package: Package,
+    items: List[QuestionData],
+    deactivate_missing: bool = False,
+    section_order: Optional[Dict[str, int]] = None,
+) -> ImportResult:
+    """
+    Samakan soal & pilihan paket dengan items, dicocokkan per Question.key lalu per label pilihan.
+    Hanya baris yang berbeda yang ditulis (bulk_create / bulk_update / delete), lalu
+    question_count & content_version paket disinkronkan sekali kalau ada yang berubah.
+    deactivate_missing: soal aktif yang key-nya tidak ada di items dinonaktifkan.
+    Pilihan yang tidak ada di items dihapus, kecuali sudah pernah dijawab -> BankError.
+    """
+    result = ImportResult()
+    keys = [it.key for it in items]
+    if len(set(keys)) != len(keys):
+        raise BankError("Duplicate question key in import")
+
+    titles = dict(section_order or {})
+    for it in items:
+        if it.section:
+            titles.setdefault(it.section, None)
+    sections = _sync_sections(package, titles, result)
+
+    existing = {q.key: q for q in Question.objects.select_for_update().filter(package=package)}
+    to_create, to_update, update_fields = [], [], set()
+    touched = []  # (Question, QuestionData) yang medianya mungkin perlu turunan baru
+
+    for it in items:
+        section = sections[it.section] if it.section else None
+        q = existing.get(it.key)
+        if q is None:
+            q = Question(package=package, key=it.key, section=section)
+            _apply(q, it, _QUESTION_VALUES + _MEDIA_FIELDS)
+            to_create.append(q)
+            touched.append(q)
+            continue
+
+        changed = _apply(q, it, _QUESTION_VALUES + _MEDIA_FIELDS)
+        if q.section_id != (section.id if section else None):
+            q.section = section
+            changed.append("section")
+        if changed:
+            to_update.append(q)
+            update_fields.update(changed)
+            if set(changed) & set(_MEDIA_FIELDS):
+                touched.append(q)
+        else:
+            result.unchanged += 1
+
+    if to_create:
+        Question.objects.bulk_create(to_create, batch_size=500)
+        result.created = len(to_create)
+    if to_update:
+        Question.objects.bulk_update(to_update, sorted(update_fields), batch_size=500)
+        result.updated = len(to_update)
+
+    if deactivate_missing:
+        result.deactivated = (
+            Question.objects.filter(package=package, is_active=True).exclude(key__in=keys).update(is_active=False)
+        )
+
+    by_key = {q.key: q for q in to_create}
+    by_key.update({k: q for k, q in existing.items() if k not in by_key})
+    _sync_choices(items, by_key, result, touched)
+
+    for obj in touched:
+        _queue_media_derivatives(obj, "question" if isinstance(obj, Question) else "choice")
+    if result.changed:
+        Package.sync_question_count(pk=package.pk)
+    return result
+
+
+def _sync_choices(items: List[QuestionData], questions: Dict[str, Question], result: ImportResult, touched: list):
+    qids = [questions[it.key].id for it in items]
+    current: Dict[int, Dict[str, Choice]] = {}
+    for c in Choice.objects.filter(question_id__in=qids):
+        current.setdefault(c.question_id, {})[_choice_slot(c)] = c
+
+    to_create, to_update, update_fields, to_delete = [], [], set(), []
+    for it in items:
+        q = questions[it.key]
+        have = current.get(q.id, {})
+        seen = set()
+        for data in it.choices:
+            slot = _choice_slot(data)
+            if slot in seen:
+                raise BankError(f"Duplicate choice label {slot!r} in question {it.key}")
+            seen.add(slot)
+            c = have.get(slot)
+            if c is None:
+                c = Choice(question=q, label=data.label)
+                _apply(c, data, _CHOICE_VALUES + _MEDIA_FIELDS)
+                to_create.append(c)
+                touched.append(c)
+                continue
+            changed = _apply(c, data, _CHOICE_VALUES + _MEDIA_FIELDS)
+            if changed:
+                to_update.append(c)
+                update_fields.update(changed)
+                if set(changed) & set(_MEDIA_FIELDS):
+                    touched.append(c)
+        to_delete.extend((it.key, c) for slot, c in have.items() if slot not in seen)
+
+    if to_create:
+        Choice.assign_ordinals(to_create)
+        Choice.objects.bulk_create(to_create, batch_size=1000)
+        result.choices_created = len(to_create)
+    if to_update:
+        Choice.objects.bulk_update(to_update, sorted(update_fields), batch_size=1000)
+        result.choices_updated = len(to_update)
+    if to_delete:
+        # hapus pilihan ikut menghapus riwayat jawaban (M2M / arsip): tolak kalau sudah pernah dipilih
+        used = answered_choice_ids((c.id, c.question_id, c.ordinal) for _, c in to_delete)
+        if used:
+            names = ", ".join(f"{key}/{_choice_slot(c)}" for key, c in to_delete if c.id in used)
+            raise BankError(f"Import would delete choices that already have answers: {names}")
+        Choice.objects.filter(id__in=[c.id for _, c in to_delete]).delete()
+        result.choices_deleted = len(to_delete)
+
+
+# ---------- baca arsip ----------
+
+def _parse(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Baris CSV semuanya string; samakan tipenya dengan JSONL."""
+    out = {}
+    for k, v in row.items():
+        if k in _INT_FIELDS and isinstance(v, str):
+            v = int(v or 0)
+        elif k in _BOOL_FIELDS and isinstance(v, str):
+            v = v.strip().lower() in ("1", "true", "yes")
+        elif v is None:
+            v = ""
+        out[k] = v
+    return out
+
+
+def _read_table(zf: zipfile.ZipFile, name: str) -> Iterator[Dict[str, Any]]:
+    with zf.open(name) as raw:
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        if name.endswith(".csv"):
+            rows: Iterable[Dict[str, Any]] = csv.DictReader(text)
+        else:
+            rows = (json.loads(line) for line in text if line.strip())
+        for row in rows:
+            yield _parse(row)
+
+
+def _media_target(arcname: str, upload_to: str) -> str:
+    return upload_to + os.path.basename(arcname)
+
+
+_HASH_NAME = re.compile(r"^([0-9a-f]{64})(?:_[A-Za-z0-9]{7})?$")
+
+
+class _MediaStore:
+    """Salin media arsip ke storage sekali per (isi, folder); file yang sudah ada dipakai ulang."""
+
+    def __init__(self, zf: zipfile.ZipFile, dry_run: bool):
+        self.zf = zf
+        self.dry_run = dry_run
+        self.names = set(zf.namelist())
+        self.written = 0
+        self._hashes: Dict[str, str] = {}
+
+    def _same_content(self, name: str, arcname: str) -> bool:
+        """
+        Apakah file storage `name` isinya sama dengan media arsip. Tanpa membaca file kalau bisa:
+        hasil import sebelumnya bernama <sha256>.<ext> (hash dari nama), ukuran beda = pasti beda;
+        baru kalau ukurannya sama isinya di-hash (sekali per file per import).
+        """
+        expected = os.path.splitext(os.path.basename(arcname))[0]
+        m = _HASH_NAME.match(os.path.splitext(os.path.basename(name))[0])
+        if m:
+            return m.group(1) == expected
+        try:
+            if default_storage.size(name) != self.zf.getinfo(arcname).file_size:
+                return False
+            if name not in self._hashes:
+                self._hashes[name] = _sha256(name)
+        except OSError:
+            return False
+        return self._hashes[name] == expected
+
+    def resolve(self, arcname: str, upload_to: str, current: str = "") -> str:
+        if not arcname:
+            return ""
+        if arcname not in self.names:
+            raise BankError(f"Media missing from archive: {arcname}")
+        # isi sama dengan file yang sudah terpasang (mis. import balik ke environment asal)
+        if current and current != _media_target(arcname, upload_to) and self._same_content(current, arcname):
+            return current
+        target = _media_target(arcname, upload_to)
+        if not self.dry_run and not default_storage.exists(target):
+            with self.zf.open(arcname) as fh:
+                saved = default_storage.save(target, File(fh, name=os.path.basename(target)))
+            self.written += 1
+            return saved
+        return target
+
+
+def read_manifest(zf: zipfile.ZipFile) -> Dict[str, Any]:
+    try:
+        manifest = json.loads(zf.read("manifest.json"))
+    except KeyError:
+        raise BankError("Not a question bank archive (manifest.json missing)")
+    if manifest.get("format") != BANK_FORMAT:
+        raise BankError(f"Unknown archive format: {manifest.get('format')}")
+    if int(manifest.get("version", 0)) > BANK_VERSION:
+        raise BankError(f"Archive version {manifest['version']} is newer than supported ({BANK_VERSION})")
+    return manifest
+
+
+def _target_package(manifest: Dict[str, Any], slug: Optional[str]) -> Package:
+    data = dict(manifest["package"])
+    slug = slug or data.pop("slug")
+    data.pop("slug", None)
+    package = Package.objects.filter(slug=slug).first()
+    if package is not None:
+        return package
+    cat = manifest["category"]
+    category, _ = ExamCategory.objects.get_or_create(slug=cat["slug"], defaults={"name": cat["name"]})
+    return Package.objects.create(slug=slug, category=category, **data)
+
+
+def import_bank(fileobj, package_slug: Optional[str] = None, deactivate_missing: bool = False,
+                dry_run: bool = False) -> ImportResult:
+    """
+    Import arsip export_bank ke paket dengan slug yang sama (atau package_slug);
+    paket dibuat kalau belum ada. dry_run: hitung perubahan saja, semua di-rollback.
+    """
+    with zipfile.ZipFile(fileobj) as zf, transaction.atomic():
+        manifest = read_manifest(zf)
+        package = _target_package(manifest, package_slug)
+        tables = manifest["tables"]
+        store = _MediaStore(zf, dry_run)
+
+        section_order = {r["title"]: r["order_index"] for r in _read_table(zf, tables["sections"])}
+
+        current = {
+            q["key"]: q for q in Question.objects.filter(package=package).values("id", "key", "image", "audio")
+        }
+        current_choices = {
+            (c["question__key"], c["label"] or f"#{c['order_index']}"): c
+            for c in Choice.objects.filter(question__package=package)
+            .values("question__key", "label", "order_index", "image", "audio")
+        }
+
+        items: Dict[str, QuestionData] = {}
+        for r in _read_table(zf, tables["questions"]):
+            cur = current.get(r["key"], {})
+            items[r["key"]] = QuestionData(
+                key=r["key"], stem=r["stem"], section=r["section"], order_index=r["order_index"],
+                content_type=r["content_type"], answer_type=r["answer_type"], explanation=r["explanation"],
+                is_active=r["is_active"],
+                image=store.resolve(r["image"], "questions/images/", cur.get("image") or ""),
+                audio=store.resolve(r["audio"], "questions/audio/", cur.get("audio") or ""),
+            )
+
+        for r in _read_table(zf, tables["choices"]):
+            it = items.get(r["question_key"])
+            if it is None:
+                raise BankError(f"Choice for unknown question key {r['question_key']}")
+            cur = current_choices.get((r["question_key"], r["label"] or f"#{r['order_index']}"), {})
+            it.choices.append(ChoiceData(
+                label=r["label"], order_index=r["order_index"], text=r["text"],
+                is_correct=r["is_correct"], points=r["points"],
+                image=store.resolve(r["image"], "choices/images/", cur.get("image") or ""),
+                audio=store.resolve(r["audio"], "choices/audio/", cur.get("audio") or ""),
+            ))
+
+        result = upsert_questions(
+            package, list(items.values()), deactivate_missing=deactivate_missing, section_order=section_order,
+        )
+        result.media_written = store.written
+        if dry_run:
+            transaction.set_rollback(True)
+    return result
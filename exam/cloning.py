@@ -0,0 +1,87 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Type
+
+from django.db import models, transaction
+
+from .models import Choice, Package, Question, SamplingRule, Section
+
+
+# Clone satu paket lengkap (Section, Question, Choice, SamplingRule) dengan satu bulk_create
+# per tabel; FK di-remap di memori (id lama -> id baru, urutan hasil bulk_create = urutan input).
+# Media tidak disalin: FieldFile hanya berisi nama file di storage, jadi clone memakai file
+# (dan turunan WebP/AVIF/Opus) yang sama. Turunan yang dipakai bersama tidak dihapus saat
+# salah satu soal diganti medianya (images.shared_elsewhere).
+# Question.key ikut disalin, jadi import bank/CSV ke paket clone tetap cocok per soal.
+
+_SKIP = {"id", "created_at"}
+
+
+def _copy_fields(model: Type[models.Model], *exclude: str) -> List[str]:
+    return [
+        f.attname for f in model._meta.concrete_fields
+        if f.name not in _SKIP and f.name not in exclude
+    ]
+
+
+def _rows(qs, fields: List[str]):
+    return list(qs.order_by("id").values("id", *fields))
+
+
+def _bulk_clone(model, rows: List[Dict], remap: Dict[str, Dict[int, int]], **overrides) -> Dict[int, int]:
+    """Buat salinan rows (hasil values()), FK di-remap lewat remap[attname]. Return id lama -> id baru."""
+    objs = []
+    for row in rows:
+        data = {k: v for k, v in row.items() if k != "id"}
+        for attname, mapping in remap.items():
+            if data.get(attname) is not None:
+                data[attname] = mapping[data[attname]]
+        data.update(overrides)
+        objs.append(model(**data))
+    model.objects.bulk_create(objs, batch_size=1000)
+    return {row["id"]: obj.id for row, obj in zip(rows, objs)}
+
+
+@transaction.atomic
+def clone_package(
+    package: Package,
+    title: Optional[str] = None,
+    slug: Optional[str] = None,
+    is_active: bool = False,
+) -> Package:
+    """
+    Salin paket beserta seluruh isinya. Paket baru default nonaktif (is_active=False)
+    supaya bisa disunting dulu; slug kosong = dibuat dari title.
+    """
+    data = {k: v for k, v in _rows(Package.objects.filter(pk=package.pk), _copy_fields(Package))[0].items()
+            if k != "id"}
+    data.update(
+        title=title or f"{package.title} (copy)",
+        slug=slug or "",
+        is_active=is_active,
+        content_version=1,
+        question_count=0,
+    )
+    clone = Package(**data)
+    clone.save()
+
+    sections = _bulk_clone(
+        Section, _rows(package.sections.all(), _copy_fields(Section, "package")), {}, package_id=clone.id,
+    )
+    questions = _bulk_clone(
+        Question,
+        _rows(Question.objects.filter(package=package), _copy_fields(Question, "package")),
+        {"section_id": sections},
+        package_id=clone.id,
+    )
+    _bulk_clone(
+        Choice, _rows(Choice.objects.filter(question__package=package), _copy_fields(Choice)),
+        {"question_id": questions},
+    )
+    _bulk_clone(
+        SamplingRule, _rows(package.sampling_rules.all(), _copy_fields(SamplingRule, "package")),
+        {"section_id": sections}, package_id=clone.id,
+    )
+
+    Package.sync_question_count(pk=clone.pk)
+    clone.refresh_from_db(fields=["content_version", "question_count"])
+    return clone
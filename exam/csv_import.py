@@ -0,0 +1,229 @@
+from __future__ import annotations
+import hashlib
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import transaction
+
+from core.jobs import enqueue
+
+from .bank import BankError, ChoiceData, ImportResult, QuestionData, upsert_questions
+from .models import Choice, Package, Question
+
+
+# Import soal dari CSV (satu baris = satu pilihan), dipakai QuestionAdmin.import_csv dan
+# manage.py import_questions_csv. Baris dikelompokkan per (package_slug, question_key) lalu
+# di-upsert lewat bank.upsert_questions: soal dicocokkan dengan Question.key, pilihan per label,
+# jadi CSV yang sama boleh di-import berulang kali (yang tidak berubah tidak disentuh).
+# Tanpa kolom question_key, key diturunkan dari section + stem (stem diedit = soal baru);
+# kalau key itu belum ada di paket, soal dengan section + stem yang sama dipakai (key-nya diambil).
+# Media: URL di-download lewat job exam.fetch_media, hanya untuk field yang masih kosong.
+
+VALID_ANSWER_TYPES = {"SINGLE", "MULTI", "TRUE_FALSE", "WEIGHTED"}
+
+CSV_HEADER = [
+    "question_key", "package_slug", "section_title", "order_index", "answer_type", "stem", "explanation",
+    "choice_label", "choice_text", "choice_points", "is_correct",
+    "image_url", "audio_url", "choice_image_url", "choice_audio_url",
+]
+
+GROUP_SEP = "||"
+
+
+def question_key(row: Dict[str, str]) -> str:
+    key = (row.get("question_key") or "").strip()
+    if key:
+        return key
+    basis = f"{(row.get('section_title') or '').strip()}\n{row.get('stem') or ''}"
+    return "csv-" + hashlib.sha1(basis.encode("utf-8")).hexdigest()[:24]
+
+
+def group_rows(rows: Iterable[Dict[str, str]]) -> Tuple[Dict[str, List[Dict[str, str]]], Dict[str, List[int]]]:
+    """
+    rows (csv.DictReader) -> ({"<package_slug>||<question_key>": [row, ...]}, {sama: [nomor baris]}).
+    Key berupa string supaya bisa disimpan di session (preview admin).
+    """
+    grouped: Dict[str, List[Dict[str, str]]] = {}
+    line_map: Dict[str, List[int]] = {}
+    for i, row in enumerate(rows, start=2):
+        group = f"{row.get('package_slug', '')}{GROUP_SEP}{question_key(row)}"
+        grouped.setdefault(group, []).append(row)
+        line_map.setdefault(group, []).append(i)
+    return grouped, line_map
+
+
+def _is_valid_http_url(u: str) -> bool:
+    u = (u or "").strip()
+    return (not u) or u.startswith("http://") or u.startswith("https://")
+
+
+def validate_question_group(rows: List[Dict[str, str]], line_numbers: List[int]) -> List[str]:
+    errors: List[str] = []
+    if not rows:
+        return errors
+
+    atype = rows[0].get("answer_type")
+    if atype not in VALID_ANSWER_TYPES:
+        errors.append(f"Invalid answer_type: {atype}")
+
+    # pastikan field inti konsisten dalam 1 group
+    base = rows[0]
+    for idx, r in enumerate(rows[1:], start=1):
+        for field in ("package_slug", "section_title", "order_index", "answer_type", "stem"):
+            if (r.get(field, "") or "") != (base.get(field, "") or ""):
+                errors.append(f"Inconsistent '{field}' inside same question group (line {line_numbers[idx]})")
+                break
+
+    correct_count = sum(1 for r in rows if str(r.get("is_correct", "0")) == "1")
+
+    if atype in ("SINGLE", "TRUE_FALSE"):
+        if correct_count != 1:
+            errors.append(f"{atype} must have exactly 1 correct answer (found {correct_count})")
+    elif atype == "MULTI":
+        if correct_count < 1:
+            errors.append("MULTI must have at least 1 correct answer")
+    elif atype == "WEIGHTED":
+        if correct_count > 0:
+            errors.append("WEIGHTED should not use is_correct (set all to 0)")
+
+    labels = set()
+    for i, r in enumerate(rows):
+        if not r.get("stem"):
+            errors.append(f"Empty stem at line {line_numbers[i]}")
+        label = (r.get("choice_label") or "").strip()
+        if not label:
+            errors.append(f"Empty choice_label at line {line_numbers[i]}")
+        elif label in labels:
+            errors.append(f"Duplicate choice_label '{label}' at line {line_numbers[i]}")
+        labels.add(label)
+        choice_text = (r.get("choice_text") or "").strip()
+        choice_img = (r.get("choice_image_url") or "").strip()
+        choice_aud = (r.get("choice_audio_url") or "").strip()
+        # wajib minimal ada teks ATAU media
+        if not choice_text and not choice_img and not choice_aud:
+            errors.append(f"Choice must have text or media (line {line_numbers[i]})")
+        if not _is_valid_http_url(choice_img):
+            errors.append(f"Invalid choice_image_url at line {line_numbers[i]}")
+        if not _is_valid_http_url(choice_aud):
+            errors.append(f"Invalid choice_audio_url at line {line_numbers[i]}")
+
+    # optional media url validation (only check scheme)
+    img = (rows[0].get("image_url") or "").strip()
+    aud = (rows[0].get("audio_url") or "").strip()
+    if not _is_valid_http_url(img):
+        errors.append(f"Invalid image_url (must start with http/https): {img}")
+    if not _is_valid_http_url(aud):
+        errors.append(f"Invalid audio_url (must start with http/https): {aud}")
+    return errors
+
+
+def _question_data(rows: List[Dict[str, str]]) -> QuestionData:
+    row0 = rows[0]
+    return QuestionData(
+        key=question_key(row0),
+        stem=row0.get("stem", ""),
+        section=(row0.get("section_title") or "").strip(),
+        order_index=int(row0.get("order_index") or 0),
+        content_type=None,
+        answer_type=row0["answer_type"],
+        # kolom explanation tidak ada di CSV = biarkan yang sudah ada
+        explanation=row0.get("explanation"),
+        is_active=True,
+        choices=[
+            ChoiceData(
+                label=(r.get("choice_label") or "").strip(),
+                order_index=i,
+                text=r.get("choice_text", ""),
+                points=int(r.get("choice_points") or 0),
+                is_correct=str(r.get("is_correct", "0")) == "1",
+            )
+            for i, r in enumerate(rows)
+        ],
+    )
+
+
+def _adopt_existing_keys(package: Package, groups: List[List[Dict[str, str]]]):
+    """
+    Grup tanpa kolom question_key yang key turunannya belum ada di paket: cocokkan ke soal
+    yang sudah ada dengan section + stem yang sama (mis. soal buatan admin, key-nya uuid),
+    lalu pakai key soal itu. Baris diisi question_key-nya di tempat.
+    """
+    keyless = [rows for rows in groups if not (rows[0].get("question_key") or "").strip()]
+    if not keyless:
+        return
+    existing = Question.objects.filter(package=package).values_list("key", "section__title", "stem")
+    known = set()
+    by_content: Dict[Tuple[str, str], str] = {}
+    for key, section, stem in existing:
+        known.add(key)
+        by_content.setdefault(((section or "").strip(), stem or ""), key)
+    claimed = {question_key(rows[0]) for rows in groups}
+    for rows in keyless:
+        if question_key(rows[0]) in known:
+            continue
+        key = by_content.get(((rows[0].get("section_title") or "").strip(), rows[0].get("stem") or ""))
+        if key is None or key in claimed:
+            continue
+        claimed.add(key)
+        for r in rows:
+            r["question_key"] = key
+
+
+def _queue_fetch_media(package: Package, groups: List[List[Dict[str, str]]]):
+    """Download media dari URL untuk field yang masih kosong (soal/pilihan baru atau belum punya media)."""
+    keys = [question_key(rows[0]) for rows in groups]
+    questions = {
+        q["key"]: q for q in Question.objects.filter(package=package, key__in=keys).values("id", "key", "image", "audio")
+    }
+    choices = {
+        (c["question__key"], c["label"]): c
+        for c in Choice.objects.filter(question__package=package, question__key__in=keys)
+        .values("id", "question__key", "label", "image", "audio")
+    }
+    jobs = []
+    for rows in groups:
+        q = questions[question_key(rows[0])]
+        for field in ("image", "audio"):
+            url = (rows[0].get(f"{field}_url") or "").strip()
+            if url and not q[field]:
+                jobs.append({"model": "question", "pk": q["id"], "field": field, "url": url})
+        for r in rows:
+            c = choices[(q["key"], (r.get("choice_label") or "").strip())]
+            for field in ("image", "audio"):
+                url = (r.get(f"choice_{field}_url") or "").strip()
+                if url and not c[field]:
+                    jobs.append({"model": "choice", "pk": c["id"], "field": field, "url": url})
+
+    # download lewat job queue (langsung jalan kalau JOBS_EAGER), setelah soalnya ter-commit
+    transaction.on_commit(lambda: [enqueue("exam.fetch_media", payload) for payload in jobs])
+
+
+def import_groups(
+    grouped: Dict[str, List[Dict[str, str]]],
+    deactivate_missing: bool = False,
+    dry_run: bool = False,
+) -> Dict[str, ImportResult]:
+    """
+    Upsert hasil group_rows, per paket. deactivate_missing: soal paket yang tidak ada di CSV
+    dinonaktifkan. Return package_slug -> ImportResult. Paket tidak ditemukan -> BankError.
+    """
+    by_package: Dict[str, List[List[Dict[str, str]]]] = {}
+    for group, rows in grouped.items():
+        by_package.setdefault(group.split(GROUP_SEP, 1)[0], []).append(rows)
+
+    packages = Package.objects.in_bulk(list(by_package), field_name="slug")
+    missing = sorted(set(by_package) - set(packages))
+    if missing:
+        raise BankError(f"Package not found: {', '.join(missing)}")
+
+    results = {}
+    with transaction.atomic():
+        for slug, groups in by_package.items():
+            package = packages[slug]
+            _adopt_existing_keys(package, groups)
+            results[slug] = upsert_questions(
+                package, [_question_data(rows) for rows in groups], deactivate_missing=deactivate_missing,
+            )
+            _queue_fetch_media(package, groups)
+        if dry_run:
+            transaction.set_rollback(True)
+    return results
@@ -0,0 +1,183 @@
+from __future__ import annotations
+import csv
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+from .answers import load_answers_bulk
+from .models import ArchivedAttempt, Attempt, Choice, Question
+
+
+# Export attempt & jawaban per paket untuk analis, dalam bentuk generator baris (dict):
+# attempt dibaca dengan iterator(chunk_size) (server-side cursor di Postgres), jawaban
+# dimuat per batch attempt, data soal/pilihan paket dimuat sekali. Memori tidak
+# bergantung pada jumlah attempt, jadi aman untuk jutaan baris.
+# Attempt aktif dan arsip (ArchivedAttempt) sama-sama ikut, kolom "archived" membedakan.
+
+ATTEMPT_FIELDS = [
+    "attempt_id", "archived", "user_id", "username", "package_id", "mode", "status",
+    "started_at", "submitted_at", "duration_seconds", "score", "max_score",
+]
+ANSWER_FIELDS = [
+    "attempt_id", "archived", "user_id", "package_id", "question_id", "section",
+    "choice_ids", "choice_labels", "is_correct", "points", "flagged",
+]
+KINDS = {"attempts": ATTEMPT_FIELDS, "answers": ANSWER_FIELDS}
+
+_ATTEMPT_VALUES = [
+    "id", "user_id", "user__username", "package_id", "mode", "status",
+    "started_at", "submitted_at", "duration_seconds", "score", "max_score",
+]
+
+
+def _attempt_querysets(package_ids: Sequence[int], include_archived: bool):
+    yield False, Attempt.objects.filter(package_id__in=package_ids).exclude(status=Attempt.Status.SUBMITTING)
+    if include_archived:
+        yield True, ArchivedAttempt.objects.filter(package_id__in=package_ids)
+
+
+def iter_attempt_rows(package_ids: Sequence[int], include_archived: bool = True, chunk_size: int = 2000):
+    for archived, qs in _attempt_querysets(package_ids, include_archived):
+        for r in qs.order_by("id").values(*_ATTEMPT_VALUES).iterator(chunk_size=chunk_size):
+            yield {
+                "attempt_id": r["id"],
+                "archived": archived,
+                "user_id": r["user_id"],
+                "username": r["user__username"],
+                "package_id": r["package_id"],
+                "mode": r["mode"],
+                "status": r["status"],
+                "started_at": r["started_at"],
+                "submitted_at": r["submitted_at"],
+                "duration_seconds": r["duration_seconds"],
+                "score": r["score"],
+                "max_score": r["max_score"],
+            }
+
+
+def _bank(package_ids: Sequence[int]):
+    """Data soal & pilihan paket (ukurannya sebesar bank soal, bukan jumlah attempt)."""
+    sections = dict(
+        Question.objects.filter(package_id__in=package_ids).values_list("id", "section__title")
+    )
+    choices: Dict[int, tuple] = {}
+    correct: Dict[int, set] = {}
+    for cid, qid, label, is_correct, points in Choice.objects.filter(
+        question__package_id__in=package_ids
+    ).values_list("id", "question_id", "label", "is_correct", "points"):
+        choices[cid] = (label, points)
+        if is_correct:
+            correct.setdefault(qid, set()).add(cid)
+    return sections, choices, correct
+
+
+def _chunks(it: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in it:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_answer_rows(package_ids: Sequence[int], include_archived: bool = True, chunk_size: int = 2000):
+    sections, choices, correct = _bank(package_ids)
+
+    def row(archived, attempt_id, user_id, package_id, qid, st):
+        selected = st["choices"]
+        return {
+            "attempt_id": attempt_id,
+            "archived": archived,
+            "user_id": user_id,
+            "package_id": package_id,
+            "question_id": qid,
+            "section": sections.get(qid),
+            "choice_ids": selected,
+            "choice_labels": [choices[cid][0] for cid in selected if cid in choices],
+            "is_correct": bool(selected) and set(selected) == correct.get(qid, set()),
+            "points": sum(choices[cid][1] for cid in selected if cid in choices),
+            "flagged": st["flagged"],
+        }
+
+    for archived, qs in _attempt_querysets(package_ids, include_archived):
+        if archived:
+            rows = qs.order_by("id").only("id", "user_id", "package_id", "answers", "flagged")
+            for a in rows.iterator(chunk_size=chunk_size):
+                for qid, st in sorted(a.answer_map().items()):
+                    yield row(True, a.id, a.user_id, a.package_id, qid, st)
+            continue
+
+        heads = qs.order_by("id").values_list("id", "user_id", "package_id").iterator(chunk_size=chunk_size)
+        for batch in _chunks(heads, chunk_size):
+            answers = load_answers_bulk([attempt_id for attempt_id, _, _ in batch])
+            for attempt_id, user_id, package_id in batch:
+                for qid, st in sorted(answers.get(attempt_id, {}).items()):
+                    yield row(False, attempt_id, user_id, package_id, qid, st)
+
+
+def iter_rows(kind: str, package_ids: Sequence[int], include_archived: bool = True, chunk_size: int = 2000):
+    fn = iter_attempt_rows if kind == "attempts" else iter_answer_rows
+    return fn(package_ids, include_archived=include_archived, chunk_size=chunk_size)
+
+
+# ---------- format ----------
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, list):
+        return "|".join(str(v) for v in value)
+    return _plain(value)
+
+
+class _Echo:
+    """File-like untuk csv.writer: write() mengembalikan baris, bukan menyimpannya."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(fields: List[str], rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for r in rows:
+        yield writer.writerow([_csv_cell(r[f]) for f in fields])
+
+
+def jsonl_lines(fields: List[str], rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for r in rows:
+        yield json.dumps({f: _plain(r[f]) for f in fields}, ensure_ascii=False) + "\n"
+
+
+FORMATS = {"csv": csv_lines, "jsonl": jsonl_lines}
+
+
+def _parquet_schema(pa, fields: List[str]):
+    ts = pa.timestamp("us", tz="UTC")
+    types = {
+        "archived": pa.bool_(), "is_correct": pa.bool_(), "flagged": pa.bool_(),
+        "username": pa.string(), "mode": pa.string(), "status": pa.string(), "section": pa.string(),
+        "started_at": ts, "submitted_at": ts,
+        "choice_ids": pa.list_(pa.int64()), "choice_labels": pa.list_(pa.string()),
+    }
+    return pa.schema([(f, types.get(f, pa.int64())) for f in fields])
+
+
+def write_parquet(path: str, fields: List[str], rows: Iterable[Dict[str, Any]], batch_size: int = 50000) -> int:
+    """Parquet per row group (butuh pyarrow). Return jumlah baris."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(pa, fields)
+    n = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in _chunks(rows, batch_size):
+            writer.write_table(pa.Table.from_pylist([{f: r[f] for f in fields} for r in batch], schema=schema))
+            n += len(batch)
+    return n
@@ -0,0 +1,75 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, Iterable
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import SafeString, mark_safe
+
+from .audio import audio_sources
+from .images import picture
+from .manifest import MANIFEST_CACHE_TIMEOUT
+from .models import Package, Question
+
+
+# HTML isi soal (stem, gambar, audio) dan isi tiap pilihan di-render sekali lalu
+# di-cache per (paket, content_version, media_version, variant, soal). Yang per user/attempt
+# (nomor, label hasil acak, checked, warna benar/salah) tetap di template halaman.
+# variant = nama set template di exam/fragments/<variant>_*.html ("player", "review").
+
+
+@dataclass
+class QuestionFragments:
+    stem: SafeString
+    media: SafeString
+    choices: Dict[int, SafeString] = field(default_factory=dict)
+
+
+def fragment_cache_key(package: Package, variant: str, question_id: int) -> str:
+    return f"exam:frag:{package.id}:{package.content_version}:m{package.media_version}:{variant}:q{question_id}"
+
+
+def _render(question: Question, variant: str) -> Dict:
+    return {
+        "stem": render_to_string(f"exam/fragments/{variant}_stem.html", {"q": question}),
+        "media": render_to_string(
+            f"exam/fragments/{variant}_media.html",
+            {
+                "q": question,
+                "pic": picture(question.image, question.image_derivatives),
+                "aud": audio_sources(question.audio, question.audio_derivatives),
+            },
+        ),
+        "choices": {
+            c.id: render_to_string(
+                f"exam/fragments/{variant}_choice.html",
+                {
+                    "c": c,
+                    "pic": picture(c.image, c.image_derivatives),
+                    "aud": audio_sources(c.audio, c.audio_derivatives),
+                },
+            )
+            for c in question.choices.all()
+        },
+    }
+
+
+def question_fragments(package: Package, questions: Iterable[Question], variant: str) -> Dict[int, QuestionFragments]:
+    """question_id -> QuestionFragments. Satu cache.get_many; yang belum ada di-render & di-set_many."""
+    questions = list(questions)
+    keys = {fragment_cache_key(package, variant, q.id): q for q in questions}
+    found = cache.get_many(list(keys))
+
+    fresh = {k: _render(q, variant) for k, q in keys.items() if k not in found}
+    if fresh:
+        cache.set_many(fresh, MANIFEST_CACHE_TIMEOUT)
+        found.update(fresh)
+
+    return {
+        q.id: QuestionFragments(
+            stem=mark_safe(found[k]["stem"]),
+            media=mark_safe(found[k]["media"]),
+            choices={cid: mark_safe(html) for cid, html in found[k]["choices"].items()},
+        )
+        for k, q in keys.items()
+    }
@@ -0,0 +1,156 @@
+from __future__ import annotations
+import base64
+import io
+import os
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageFilter, ImageOps, features
+
+from .models import Choice, Package, Question
+
+
+# Turunan gambar soal/pilihan: beberapa lebar (EXAM_IMAGE_WIDTHS) x format (WebP, +AVIF
+# kalau Pillow mendukung), plus placeholder kecil (data URI WebP blur) untuk ditampilkan
+# selama gambar asli dimuat. Hasilnya disimpan di <model>.image_derivatives:
+#   {"src": nama file asli, "width", "height", "placeholder",
+#    "sources": {"avif": [[lebar, nama], ...], "webp": [...]}}
+# Kalau "src" != image.name (gambar diganti), turunannya dianggap basi.
+# Placeholder sengaja bukan BlurHash (permintaan awal): string BlurHash butuh decoder JS di
+# client, sedangkan data URI WebP ~16px (beberapa ratus byte) langsung jadi background-image
+# di template server-rendered maupun SPA.
+
+MODELS = {"question": Question, "choice": Choice}
+MIME = {"avif": "image/avif", "webp": "image/webp"}
+PLACEHOLDER_WIDTH = 16
+
+
+def image_widths() -> List[int]:
+    return list(getattr(settings, "EXAM_IMAGE_WIDTHS", [320, 640, 1024]))
+
+
+def image_formats() -> List[str]:
+    # urutan = urutan <source> di <picture>: yang paling kecil dulu
+    formats = ["avif", "webp"] if features.check("avif") else ["webp"]
+    return [f for f in formats if f in getattr(settings, "EXAM_IMAGE_FORMATS", formats)]
+
+
+def needs_derivatives(instance) -> bool:
+    if not instance.image:
+        return False
+    return (instance.image_derivatives or {}).get("src") != instance.image.name
+
+
+def _encode(img: Image.Image, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    quality = getattr(settings, "EXAM_IMAGE_QUALITY", {"avif": 50, "webp": 75})[fmt]
+    img.save(buf, format=fmt.upper(), quality=quality)
+    return buf.getvalue()
+
+
+def _placeholder(img: Image.Image) -> str:
+    small = img.copy()
+    small.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH * 4))
+    small = small.filter(ImageFilter.GaussianBlur(1))
+    buf = io.BytesIO()
+    small.save(buf, format="WEBP", quality=30)
+    return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+def build_derivatives(fieldfile) -> Dict[str, Any]:
+    """Buat & simpan semua turunan untuk satu ImageField. Tidak pernah memperbesar gambar."""
+    with fieldfile.open("rb") as fh:
+        img = ImageOps.exif_transpose(Image.open(fh))
+        img.load()
+    img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+
+    stem = os.path.splitext(fieldfile.name)[0]
+    sources: Dict[str, List] = {}
+    widths = sorted({min(w, img.width) for w in image_widths()})
+    for fmt in image_formats():
+        for w in widths:
+            resized = img if w == img.width else img.resize((w, round(img.height * w / img.width)), Image.LANCZOS)
+            name = default_storage.save(f"derivatives/{stem}_{w}.{fmt}", ContentFile(_encode(resized, fmt)))
+            sources.setdefault(fmt, []).append([w, name])
+
+    return {
+        "src": fieldfile.name,
+        "width": img.width,
+        "height": img.height,
+        "placeholder": _placeholder(img),
+        "sources": sources,
+    }
+
+
+def shared_elsewhere(field: str, name: str, model: str, pk: int) -> bool:
+    """
+    File media `name` (beserta turunannya) masih dipakai Question/Choice lain,
+    mis. paket hasil clone yang berbagi file dengan paket asal (exam/cloning.py).
+    """
+    if not name:
+        return False
+    for key, cls in MODELS.items():
+        qs = cls.objects.filter(**{field: name})
+        if key == model:
+            qs = qs.exclude(pk=pk)
+        if qs.exists():
+            return True
+    return False
+
+
+def delete_derivatives(derivatives: Optional[Dict[str, Any]]):
+    for entries in (derivatives or {}).get("sources", {}).values():
+        for _, name in entries:
+            default_storage.delete(name)
+
+
+def generate_derivatives(model: str, pk: int, force: bool = False) -> bool:
+    """
+    Proses satu Question/Choice. Disimpan lewat UPDATE (tanpa save()), lalu
+    media_version paket dinaikkan supaya manifest & fragment ikut memakai srcset.
+    content_version tidak disentuh: isi soal sama, token attempt yang sedang jalan tetap berlaku.
+    Return False kalau tidak ada yang dikerjakan.
+    """
+    cls = MODELS[model]
+    instance = cls.objects.filter(pk=pk).first()
+    if instance is None or not (force or needs_derivatives(instance)):
+        return False
+
+    old = instance.image_derivatives
+    derivatives = build_derivatives(instance.image)
+    cls.objects.filter(pk=pk).update(image_derivatives=derivatives)
+    if old and not shared_elsewhere("image", old.get("src"), model, pk):
+        delete_derivatives(old)
+
+    if model == "question":
+        Package.bump_media_version(questions__id=pk)
+    else:
+        Package.bump_media_version(questions__choices__id=pk)
+    return True
+
+
+def picture(fieldfile, derivatives: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Konteks template untuk exam/fragments/_picture.html (None kalau tidak ada gambar)."""
+    if not fieldfile:
+        return None
+    out: Dict[str, Any] = {"url": fieldfile.url, "sources": []}
+    if derivatives and derivatives.get("src") == fieldfile.name:
+        out.update(width=derivatives["width"], height=derivatives["height"], placeholder=derivatives["placeholder"])
+        out["sources"] = [
+            {"type": MIME[fmt], "srcset": srcset(entries)}
+            for fmt, entries in derivatives["sources"].items()
+        ]
+    return out
+
+
+def srcset(entries: List) -> str:
+    return ", ".join(f"{default_storage.url(name)} {w}w" for w, name in entries)
+
+
+def webp_srcset(derivatives: Optional[Dict[str, Any]], name: str) -> Optional[str]:
+    """srcset WebP untuk manifest/bundle (player SPA)."""
+    if not derivatives or derivatives.get("src") != name or "webp" not in derivatives["sources"]:
+        return None
+    return srcset(derivatives["sources"]["webp"])
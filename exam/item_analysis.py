@@ -0,0 +1,154 @@
+from __future__ import annotations
+import math
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from .answers import load_answers_bulk
+from .manifest import get_package_manifest
+from .models import ArchivedAttempt, Attempt, Package, PackageItemAnalysis, QuestionStats
+from .scoring import score_answers
+
+
+# Watermark = Attempt.finalized_at (ditulis bersamaan dengan status SUBMITTED), bukan submitted_at:
+# attempt yang dinilai belakangan (worker, expire_overdue dengan submitted_at = deadline) tetap masuk.
+# Yang dinilai < SETTLE detik lalu ditunda ke run berikutnya
+# (transaksi penilaian yang masih jalan tidak ketinggalan karena watermark sudah lewat)
+SETTLE = timedelta(seconds=60)
+
+
+@dataclass
+class _Acc:
+    n: int = 0
+    blank: int = 0
+    choices: Dict[str, int] = field(default_factory=dict)
+    sx: float = 0.0
+    sxx: float = 0.0
+    sy: float = 0.0
+    syy: float = 0.0
+    sxy: float = 0.0
+
+    @classmethod
+    def from_stats(cls, st: QuestionStats) -> "_Acc":
+        return cls(st.n, st.blank_count, dict(st.choice_counts), st.sum_x, st.sum_xx, st.sum_y, st.sum_yy, st.sum_xy)
+
+    def add(self, x: float, y: float, selected: List[int]):
+        self.n += 1
+        self.sx += x
+        self.sxx += x * x
+        self.sy += y
+        self.syy += y * y
+        self.sxy += x * y
+        if not selected:
+            self.blank += 1
+        for cid in selected:
+            key = str(cid)
+            self.choices[key] = self.choices.get(key, 0) + 1
+
+    def difficulty(self) -> Optional[float]:
+        return self.sx / self.n if self.n else None
+
+    def discrimination(self) -> Optional[float]:
+        """Point-biserial = korelasi Pearson skor soal vs skor total, dari jumlah-jumlah mentah."""
+        n = self.n
+        var_x = n * self.sxx - self.sx * self.sx
+        var_y = n * self.syy - self.sy * self.sy
+        if n < 2 or var_x <= 0 or var_y <= 0:
+            return None
+        return (n * self.sxy - self.sx * self.sy) / math.sqrt(var_x * var_y)
+
+
+def _keyset_chunks(qs, chunk_size: int):
+    """Baris qs per chunk_size, urut id (WHERE id > terakhir LIMIT n, bukan OFFSET)."""
+    last_id = 0
+    while True:
+        chunk = list(qs.filter(id__gt=last_id).order_by("id")[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+        last_id = last[0] if isinstance(last, tuple) else last.id
+
+
+def refresh_item_stats(package: Package, full: bool = False, chunk_size: int = 500) -> int:
+    """
+    Tambahkan attempt TRYOUT SUBMITTED yang belum dihitung ke QuestionStats paket ini.
+    full=True (atau content_version paket berubah): hitung ulang dari nol, termasuk arsip.
+    Return jumlah attempt yang diproses.
+    """
+    manifest = get_package_manifest(package)
+    questions = manifest["questions"]
+    cursor, _ = PackageItemAnalysis.objects.get_or_create(package=package)
+    if cursor.content_version != manifest["version"]:
+        full = True
+
+    since = None if full else cursor.analyzed_until
+    until = timezone.now() - SETTLE
+
+    accs: Dict[int, _Acc] = {q["id"]: _Acc() for q in questions}
+    if not full:
+        for st in QuestionStats.objects.filter(question_id__in=accs.keys()):
+            accs[st.question_id] = _Acc.from_stats(st)
+
+    by_id = {q["id"]: q for q in questions}
+
+    def consume(answers_by_attempt: Dict[int, Dict[int, Dict[str, Any]]], rows: List[tuple]):
+        for attempt_id, drawn in rows:
+            answers = answers_by_attempt.get(attempt_id, {})
+            # attempt hasil sampling hanya dihitung untuk soal yang memang ia dapat
+            taken = questions if drawn is None else [by_id[qid] for qid in drawn if qid in by_id]
+            breakdown = score_answers({**manifest, "questions": taken}, answers)
+            y = float(breakdown.total_score)
+            for q in taken:
+                qid = q["id"]
+                q_max = breakdown.per_question_max.get(qid) or 0
+                x = breakdown.per_question[qid] / q_max if q_max else 0.0
+                st = answers.get(qid)
+                accs[qid].add(x, y, st["choices"] if st else [])
+
+    processed = 0
+    for model in (Attempt, ArchivedAttempt):
+        qs = model.objects.filter(
+            package=package, mode=Attempt.Mode.TRYOUT, status=Attempt.Status.SUBMITTED, finalized_at__lte=until
+        )
+        if since is not None:
+            qs = qs.filter(finalized_at__gt=since)
+        if model is Attempt:
+            qs = qs.values_list("id", "drawn_questions")
+
+        # keyset per id: memori tetap satu chunk, berapa pun jumlah attempt (full recompute)
+        for chunk in _keyset_chunks(qs, chunk_size):
+            if model is Attempt:
+                consume(load_answers_bulk([r[0] for r in chunk]), chunk)
+            else:
+                consume({a.id: a.answer_map() for a in chunk}, [(a.id, a.drawn_questions) for a in chunk])
+            processed += len(chunk)
+
+    with transaction.atomic():
+        if full:
+            QuestionStats.objects.filter(question__package=package).delete()
+        rows = [
+            QuestionStats(
+                question_id=qid, n=acc.n, blank_count=acc.blank, choice_counts=acc.choices,
+                sum_x=acc.sx, sum_xx=acc.sxx, sum_y=acc.sy, sum_yy=acc.syy, sum_xy=acc.sxy,
+                difficulty=acc.difficulty(), discrimination=acc.discrimination(),
+            )
+            for qid, acc in accs.items()
+        ]
+        QuestionStats.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["question"],
+            update_fields=[
+                "n", "blank_count", "choice_counts", "sum_x", "sum_xx", "sum_y", "sum_yy", "sum_xy",
+                "difficulty", "discrimination", "updated_at",
+            ],
+        )
+        cursor.analyzed_until = until
+        cursor.attempts_count = processed if full else cursor.attempts_count + processed
+        cursor.content_version = manifest["version"]
+        cursor.save()
+    return processed
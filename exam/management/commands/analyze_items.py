@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from exam.item_analysis import refresh_item_stats
+from exam.models import Package
+
+
+class Command(BaseCommand):
+    help = "Refresh per-question difficulty / discrimination stats from submitted attempts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--package", type=int, action="append", dest="packages", help="Package id (repeatable)")
+        parser.add_argument("--full", action="store_true", help="Recompute from scratch instead of new attempts only")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        packages = Package.objects.all()
+        if options["packages"]:
+            packages = packages.filter(id__in=options["packages"])
+
+        for package in packages:
+            n = refresh_item_stats(package, full=options["full"], chunk_size=options["chunk_size"])
+            self.stdout.write(f"{package}: {n} attempts")
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from exam.archive import archivable_attempts, archive_attempts
+
+
+class Command(BaseCommand):
+    help = "Move finished attempts older than N days into ArchivedAttempt"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=getattr(settings, "ARCHIVE_ATTEMPTS_AFTER_DAYS", 180),
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        older_than = timedelta(days=options["older_than_days"])
+
+        if options["dry_run"]:
+            n = archivable_attempts(older_than).count()
+            self.stdout.write(f"{n} attempts would be archived.")
+            return
+
+        n = archive_attempts(older_than, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {n} attempts."))
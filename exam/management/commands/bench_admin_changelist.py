@@ -0,0 +1,137 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from exam.models import Attempt, AttemptAnswer, Choice, ExamCategory, Package, Question
+
+
+BENCH_SLUG = "bench-admin-changelist"
+QUESTIONS = 50
+BATCH = 10000
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large Attempt/AttemptAnswer table (default 5M answers) and time admin changelist pages; "
+        "fails when a page is slower than --max-ms. "
+        "Runs against a throwaway database (test database for postgres), never the live one"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5_000_000, help="AttemptAnswer rows to seed")
+        parser.add_argument("--repeat", type=int, default=5, help="Requests per page")
+        parser.add_argument("--max-ms", type=float, default=500.0, help="Allowed p50 per page")
+
+    def handle(self, *args, **options):
+        # database sementara dengan ENGINE/OPTIONS yang sama (lihat bench_autosave): jutaan baris
+        # attempt palsu & superuser bench tidak pernah masuk database asli / statistiknya
+        tmpdir = tempfile.mkdtemp(prefix="bench_admin_")
+        if connection.vendor == "sqlite":
+            # file sungguhan: 5M baris di :memory: tidak mewakili I/O admin sebenarnya
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(tmpdir, "bench.sqlite3")
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self._bench(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def _bench(self, options):
+        package = self._seed(options["rows"])
+        admin_user = get_user_model().objects.create_superuser(username="bench_admin", password=None)
+
+        attempt = Attempt.objects.filter(package=package).order_by("id").values_list("id", flat=True).first()
+        pages = [
+            "/admin/exam/attempt/",
+            "/admin/exam/attempt/?p=30",
+            f"/admin/exam/attempt/?package__id__exact={package.id}",
+            "/admin/exam/attemptanswer/",
+            "/admin/exam/attemptanswer/?p=1500",
+            f"/admin/exam/attemptanswer/?attempt__package__id__exact={package.id}",
+            "/admin/exam/attemptanswer/?flagged__exact=0",
+            f"/admin/exam/attemptanswer/?q={admin_user.username}",
+            f"/admin/exam/choice/?question__package__id__exact={package.id}",
+            f"/admin/exam/attempt/{attempt}/change/",
+        ]
+
+        client = Client()
+        client.force_login(admin_user)
+        slow = []
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for url in pages:
+                timings = []
+                for _ in range(options["repeat"]):
+                    reset_queries()
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.monotonic()
+                        response = client.get(url)
+                        timings.append((time.monotonic() - started) * 1000)
+                    if response.status_code != 200:
+                        raise CommandError(f"{url}: HTTP {response.status_code}")
+                p50 = _percentile(timings, 50)
+                self.stdout.write(
+                    f"{p50:8.1f}ms p50 {max(timings):8.1f}ms max {len(queries):3d} queries  {url}"
+                )
+                if p50 > options["max_ms"]:
+                    slow.append(url)
+
+        if slow:
+            raise CommandError(f"{len(slow)} page(s) slower than {options['max_ms']}ms: {', '.join(slow)}")
+        self.stdout.write(self.style.SUCCESS(f"all pages under {options['max_ms']}ms"))
+
+    def _seed(self, rows):
+        category = ExamCategory.objects.create(name="bench-admin")
+        package = Package.objects.create(category=category, title="Bench admin", slug=BENCH_SLUG)
+        for i in range(QUESTIONS):
+            q = Question.objects.create(package=package, stem=f"Soal {i + 1}", order_index=i)
+            choices = [Choice(question=q, label=label, text=label, is_correct=(j == 0), order_index=j)
+                       for j, label in enumerate("ABCD")]
+            Choice.assign_ordinals(choices)
+            Choice.objects.bulk_create(choices)
+
+        User = get_user_model()
+        User.objects.bulk_create([User(username=f"bench_admin_{i}") for i in range(1000)])
+        # database sementara: prefix ini hanya cocok dengan user buatan bench
+        user_ids = list(User.objects.filter(username__startswith="bench_admin_").values_list("id", flat=True))
+        question_ids = list(package.questions.order_by("order_index").values_list("id", flat=True))
+
+        started = time.monotonic()
+        now = timezone.now()
+        n_attempts = (rows + len(question_ids) - 1) // len(question_ids)
+        per_batch = BATCH // len(question_ids)
+        for offset in range(0, n_attempts, per_batch):
+            with transaction.atomic():
+                attempts = Attempt.objects.bulk_create([
+                    Attempt(user_id=user_ids[(offset + i) % len(user_ids)], package=package,
+                            status=Attempt.Status.SUBMITTED, submitted_at=now, finalized_at=now,
+                            score=(offset + i) % 50)
+                    for i in range(min(per_batch, n_attempts - offset))
+                ])
+                AttemptAnswer.objects.bulk_create([
+                    AttemptAnswer(attempt_id=a.id, question_id=qid, answered_at=now,
+                                  choice_mask=1 << (a.id % 4), flagged=(a.id + j) % 17 == 0)
+                    for a in attempts for j, qid in enumerate(question_ids)
+                ])
+            if offset % (per_batch * 50) == 0:
+                self.stdout.write(f"  seeded {(offset + per_batch) * len(question_ids)} answers", ending="\r")
+        self.stdout.write(f"seeded {n_attempts} attempts / {n_attempts * len(question_ids)} answers "
+                          f"in {time.monotonic() - started:.0f}s")
+
+        # statistik untuk planner (dan estimasi jumlah baris di admin)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        return package
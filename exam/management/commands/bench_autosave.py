@@ -0,0 +1,126 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from exam.answers import choice_slots, set_selection
+from exam.models import Attempt, AttemptAnswer, Choice, ExamCategory, Package, Question
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure autosave write throughput with the configured database profile "
+        "(run once per profile, e.g. DB_SQLITE_TUNING=0 vs 1, DB_ENGINE=postgres). "
+        "Runs against a throwaway database (test database for postgres), never the live one"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8, help="Concurrent simulated users")
+        parser.add_argument("--seconds", type=float, default=10.0)
+        parser.add_argument("--questions", type=int, default=20)
+
+    def handle(self, *args, **options):
+        # database sementara dengan ENGINE/OPTIONS yang sama: data asli tidak tersentuh, dan
+        # journal_mode tidak terbawa dari run sebelumnya (WAL tersimpan di file database)
+        tmpdir = tempfile.mkdtemp(prefix="bench_autosave_")
+        if connection.vendor == "sqlite":
+            # file sungguhan, bukan :memory: (WAL & fsync tidak berlaku di memori)
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(tmpdir, "bench.sqlite3")
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self._bench(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def _bench(self, options):
+        package, attempts = self._setup(options["threads"], options["questions"])
+        choices = choice_slots(package.questions.values_list("id", flat=True))
+        question_ids = list(choices)
+
+        latencies = [[] for _ in attempts]
+        errors = [0] * len(attempts)
+        deadline = time.monotonic() + options["seconds"]
+
+        def run(i, attempt_id):
+            rng = random.Random(i)
+            try:
+                while time.monotonic() < deadline:
+                    qid = rng.choice(question_ids)
+                    started = time.monotonic()
+                    try:
+                        # jalur tulis yang sama dengan view attempt_autosave
+                        answer, _ = AttemptAnswer.objects.get_or_create(attempt_id=attempt_id, question_id=qid)
+                        with transaction.atomic():
+                            set_selection(answer, [rng.choice(choices[qid])], choices[qid], now=timezone.now())
+                            answer.save()
+                    except OperationalError:
+                        errors[i] += 1
+                        continue
+                    latencies[i].append((time.monotonic() - started) * 1000)
+            finally:
+                connection.close()
+
+        # koneksi main thread jangan ikut dipakai worker thread
+        close_old_connections()
+        threads = [threading.Thread(target=run, args=(i, a.id)) for i, a in enumerate(attempts)]
+        wall = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.monotonic() - wall
+
+        all_ms = [ms for per_thread in latencies for ms in per_thread]
+        self.stdout.write(f"profile: {self._profile()}")
+        self.stdout.write(
+            f"threads={len(attempts)} saves={len(all_ms)} errors={sum(errors)} "
+            f"throughput={len(all_ms) / wall:.1f}/s "
+            f"p50={_percentile(all_ms, 50):.1f}ms p95={_percentile(all_ms, 95):.1f}ms "
+            f"max={max(all_ms, default=0):.1f}ms"
+        )
+
+    def _setup(self, n_users, n_questions):
+        category = ExamCategory.objects.create(name=f"bench-autosave-{int(time.time())}")
+        package = Package.objects.create(category=category, title=category.name, duration_minutes=90)
+        for i in range(n_questions):
+            q = Question.objects.create(package=package, stem=f"Soal {i + 1}", order_index=i)
+            choices = [Choice(question=q, label=label, text=label, is_correct=(j == 0), order_index=j)
+                       for j, label in enumerate("ABCDE")]
+            Choice.assign_ordinals(choices)
+            Choice.objects.bulk_create(choices)
+
+        User = get_user_model()
+        attempts = []
+        for i in range(n_users):
+            user, _ = User.objects.get_or_create(username=f"bench_autosave_{i}")
+            attempts.append(Attempt.objects.create(user=user, package=package, mode=Attempt.Mode.TRYOUT))
+        return package, attempts
+
+    def _profile(self):
+        vendor = connection.vendor
+        if vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                journal = cursor.fetchone()[0]
+                cursor.execute("PRAGMA synchronous")
+                sync = cursor.fetchone()[0]
+            return f"sqlite journal_mode={journal} synchronous={sync}"
+        if vendor == "postgresql":
+            pool = "pool" in connection.settings_dict.get("OPTIONS", {})
+            return f"postgresql pool={pool} conn_max_age={connection.settings_dict.get('CONN_MAX_AGE')}"
+        return vendor
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from exam.cloning import clone_package
+from exam.models import Choice, Package
+
+
+class Command(BaseCommand):
+    help = "Clone a package with its sections, questions, choices and sampling rules (media shared by reference)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("package", help="Slug of the package to clone")
+        parser.add_argument("--title", help="Title of the new package (default: '<title> (copy)')")
+        parser.add_argument("--slug", help="Slug of the new package (default: from title)")
+        parser.add_argument("--activate", action="store_true", help="Make the clone active right away")
+
+    def handle(self, *args, **options):
+        try:
+            package = Package.objects.get(slug=options["package"])
+        except Package.DoesNotExist:
+            raise CommandError(f"Package not found: {options['package']}")
+        if options["slug"] and Package.objects.filter(slug=options["slug"]).exists():
+            raise CommandError(f"Slug already used: {options['slug']}")
+
+        started = time.monotonic()
+        clone = clone_package(package, title=options["title"], slug=options["slug"], is_active=options["activate"])
+        elapsed = time.monotonic() - started
+
+        choices = Choice.objects.filter(question__package=clone).count()
+        self.stdout.write(self.style.SUCCESS(
+            f"{package.slug} -> {clone.slug}: {clone.sections.count()} sections, "
+            f"{clone.questions.count()} questions, {choices} choices in {elapsed * 1000:.0f}ms"
+        ))
@@ -0,0 +1,103 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from exam.answers import MAX_PACKED_CHOICES, ordinal_slots, unpack_choice_ids
+from exam.models import AttemptAnswer, Choice
+
+
+CHUNK = 2000
+
+
+class Command(BaseCommand):
+    help = "Convert AttemptAnswer selections between M2M rows and packed choice_mask"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--to", choices=["packed", "m2m"], required=True)
+        parser.add_argument(
+            "--drop-m2m",
+            action="store_true",
+            help="Setelah packing, hapus baris tabel M2M (hanya jika EXAM_ANSWER_STORAGE=packed)",
+        )
+
+    def _choice_order(self):
+        pairs = {}
+        for cid, qid, ordinal in Choice.objects.values_list("id", "question_id", "ordinal").iterator(chunk_size=CHUNK):
+            pairs.setdefault(qid, []).append((cid, ordinal))
+        return {qid: ordinal_slots(p) for qid, p in pairs.items()}
+
+    def handle(self, *args, **options):
+        order = self._choice_order()
+        if options["to"] == "packed":
+            self._to_packed(order, options["drop_m2m"])
+        else:
+            if options["drop_m2m"]:
+                raise CommandError("--drop-m2m hanya untuk --to packed")
+            self._to_m2m(order)
+
+    def _to_packed(self, order, drop_m2m):
+        Through = AttemptAnswer.choices.through
+        ordinal = {
+            cid: i
+            for slots in order.values()
+            for i, cid in enumerate(slots)
+            if cid is not None
+        }
+        too_many = [cid for cid, i in ordinal.items() if i >= MAX_PACKED_CHOICES]
+        if too_many:
+            raise CommandError(f"{len(too_many)} pilihan punya ordinal >= {MAX_PACKED_CHOICES}, tidak muat di choice_mask")
+
+        done = 0
+        batch = []
+        current_id, mask = None, 0
+        rows = Through.objects.order_by("attemptanswer_id").values_list("attemptanswer_id", "choice_id")
+        for answer_id, choice_id in rows.iterator(chunk_size=CHUNK):
+            if answer_id != current_id:
+                if current_id is not None:
+                    batch.append(AttemptAnswer(id=current_id, choice_mask=mask))
+                current_id, mask = answer_id, 0
+                if len(batch) >= CHUNK:
+                    AttemptAnswer.objects.bulk_update(batch, ["choice_mask"])
+                    done += len(batch)
+                    batch = []
+            if choice_id in ordinal:
+                mask |= 1 << ordinal[choice_id]
+        if current_id is not None:
+            batch.append(AttemptAnswer(id=current_id, choice_mask=mask))
+        if batch:
+            AttemptAnswer.objects.bulk_update(batch, ["choice_mask"])
+            done += len(batch)
+
+        self.stdout.write(f"Packed {done} answers.")
+
+        if drop_m2m:
+            deleted, _ = Through.objects.all().delete()
+            self.stdout.write(f"Deleted {deleted} M2M rows.")
+
+        self.stdout.write(self.style.SUCCESS("Selesai. Set EXAM_ANSWER_STORAGE=packed."))
+
+    def _to_m2m(self, order):
+        Through = AttemptAnswer.choices.through
+        done = 0
+        answers = AttemptAnswer.objects.exclude(choice_mask=0).order_by("id").values_list("id", "question_id", "choice_mask")
+
+        batch = []
+
+        def flush(batch):
+            with transaction.atomic():
+                Through.objects.filter(attemptanswer_id__in=[a[0] for a in batch]).delete()
+                Through.objects.bulk_create([
+                    Through(attemptanswer_id=answer_id, choice_id=cid)
+                    for answer_id, qid, mask in batch
+                    for cid in unpack_choice_ids(mask, order.get(qid, []))
+                ])
+
+        for row in answers.iterator(chunk_size=CHUNK):
+            batch.append(row)
+            if len(batch) >= CHUNK:
+                flush(batch)
+                done += len(batch)
+                batch = []
+        if batch:
+            flush(batch)
+            done += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Restored M2M rows for {done} answers. Set EXAM_ANSWER_STORAGE=m2m."))
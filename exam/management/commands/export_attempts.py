@@ -0,0 +1,46 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from exam.export import FORMATS, KINDS, iter_rows, write_parquet
+
+
+class Command(BaseCommand):
+    help = "Stream all attempts or answers of one or more packages to CSV / JSONL / Parquet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--package", type=int, action="append", dest="packages", required=True,
+                            help="Package id (repeatable)")
+        parser.add_argument("--kind", choices=sorted(KINDS), default="answers")
+        parser.add_argument("--format", choices=sorted(FORMATS) + ["parquet"], default="csv")
+        parser.add_argument("--output", "-o", help="Output file (default: stdout; required for parquet)")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--no-archived", action="store_true", help="Skip ArchivedAttempt rows")
+
+    def handle(self, *args, **options):
+        fields = KINDS[options["kind"]]
+        rows = iter_rows(
+            options["kind"], options["packages"],
+            include_archived=not options["no_archived"], chunk_size=options["chunk_size"],
+        )
+
+        if options["format"] == "parquet":
+            if not options["output"]:
+                raise CommandError("--output is required for parquet")
+            try:
+                n = write_parquet(options["output"], fields, rows)
+            except ImportError:
+                raise CommandError("Parquet export needs pyarrow (pip install pyarrow)")
+            self.stderr.write(f"{n} rows written to {options['output']}")
+            return
+
+        lines = FORMATS[options["format"]](fields, rows)
+        out = open(options["output"], "w", newline="", encoding="utf-8") if options["output"] else sys.stdout
+        n = -1 if options["format"] == "csv" else 0  # header csv tidak dihitung
+        try:
+            for line in lines:
+                out.write(line)
+                n += 1
+        finally:
+            if options["output"]:
+                out.close()
+        self.stderr.write(f"{n} rows")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from exam.bank import export_bank
+from exam.export import FORMATS
+from exam.models import Package
+
+
+class Command(BaseCommand):
+    help = "Export a package's sections, questions, choices and media into a question bank archive (zip)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("package", help="Package slug")
+        parser.add_argument("--output", "-o", help="Output file (default: <slug>.bank.zip)")
+        parser.add_argument("--format", choices=sorted(FORMATS), default="jsonl", help="Table format inside the archive")
+
+    def handle(self, *args, **options):
+        try:
+            package = Package.objects.select_related("category").get(slug=options["package"])
+        except Package.DoesNotExist:
+            raise CommandError(f"Package not found: {options['package']}")
+
+        path = options["output"] or f"{package.slug}.bank.zip"
+        counts = export_bank(package, path, fmt=options["format"])
+        summary = ", ".join(f"{n} {table}" for table, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"{summary} -> {path}"))
@@ -0,0 +1,59 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from exam.audio import generate_audio_derivatives, needs_audio_derivatives
+from exam.images import generate_derivatives, needs_derivatives
+from exam.models import Choice, Question
+
+KINDS = {
+    "image": (generate_derivatives, needs_derivatives),
+    "audio": (generate_audio_derivatives, needs_audio_derivatives),
+}
+
+
+def _generate(kind, model, pk, force):
+    try:
+        return KINDS[kind][0](model, pk, force=force)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Generate image (WebP/AVIF + placeholder) and audio (Opus/AAC + duration) derivatives for questions/choices"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--package", type=int, action="append", dest="packages", help="Package id (repeatable)")
+        parser.add_argument("--only", choices=sorted(KINDS), help="Only images or only audio")
+        parser.add_argument("--processes", type=int, default=4)
+        parser.add_argument("--force", action="store_true", help="Regenerate even if derivatives are up to date")
+
+    def handle(self, *args, **options):
+        kinds = [options["only"]] if options["only"] else sorted(KINDS)
+        todo = []
+        for kind in kinds:
+            needs = KINDS[kind][1]
+            for model, cls, lookup in (("question", Question, "package_id__in"), ("choice", Choice, "question__package_id__in")):
+                qs = cls.objects.exclude(**{kind: ""}).exclude(**{f"{kind}__isnull": True})
+                qs = qs.only("id", kind, f"{kind}_derivatives")
+                if options["packages"]:
+                    qs = qs.filter(**{lookup: options["packages"]})
+                todo += [(kind, model, obj.pk) for obj in qs.iterator() if options["force"] or needs(obj)]
+
+        self.stdout.write(f"{len(todo)} files to process")
+        if not todo:
+            return
+
+        # koneksi DB tidak boleh dipakai bersama antar proses
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=max(1, options["processes"])) as pool:
+            futures = {pool.submit(_generate, *item, options["force"]): item for item in todo}
+            for future in as_completed(futures):
+                try:
+                    done += bool(future.result())
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{futures[future]}: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Done. generated={done} failed={failed}"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from exam.bank import BankError, import_bank
+
+
+class Command(BaseCommand):
+    help = "Import (upsert by question key) a question bank archive created by export_bank"
+
+    def add_arguments(self, parser):
+        parser.add_argument("archive", help="Path to the .zip archive")
+        parser.add_argument("--package", help="Target package slug (default: slug stored in the archive)")
+        parser.add_argument("--deactivate-missing", action="store_true",
+                            help="Deactivate questions of the package that are not in the archive")
+        parser.add_argument("--dry-run", action="store_true", help="Report changes without writing anything")
+
+    def handle(self, *args, **options):
+        try:
+            result = import_bank(
+                options["archive"],
+                package_slug=options["package"],
+                deactivate_missing=options["deactivate_missing"],
+                dry_run=options["dry_run"],
+            )
+        except (BankError, OSError) as e:
+            raise CommandError(str(e))
+        prefix = "[dry-run] " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{result}"))
@@ -1,64 +1,41 @@
 import csv
-from django.core.management.base import BaseCommand
-from django.db import transaction
-from exam.models import Package, Section, Question, Choice
+from django.core.management.base import BaseCommand, CommandError
+from exam.bank import BankError
+from exam.csv_import import group_rows, import_groups, validate_question_group
 
 
 class Command(BaseCommand):
-    help = "Import questions from CSV"
+    help = "Import questions from CSV (upsert by question_key, choices by label)"
 
     def add_arguments(self, parser):
         parser.add_argument("csv_path", type=str)
+        parser.add_argument("--deactivate-missing", action="store_true",
+                            help="Deactivate questions of the imported packages that are not in the CSV")
+        parser.add_argument("--dry-run", action="store_true", help="Report changes without writing anything")
 
-    @transaction.atomic
     def handle(self, *args, **options):
         path = options["csv_path"]
 
         with open(path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-
-            current_question = None
-            last_key = None
-
-            for i, row in enumerate(reader, start=2):
-                try:
-                    package = Package.objects.get(slug=row["package_slug"])
-                except Package.DoesNotExist:
-                    self.stderr.write(f"[Line {i}] Package not found: {row['package_slug']}")
-                    continue
-
-                section = None
-                if row.get("section_title"):
-                    section, _ = Section.objects.get_or_create(
-                        title=row["section_title"],
-                        package=package,
-                        defaults={"order_index": 0},
-                    )
-
-                key = (
-                    row["package_slug"],
-                    row.get("section_title"),
-                    row["stem"],
-                )
-
-                if key != last_key:
-                    current_question = Question.objects.create(
-                        package=package,
-                        section=section,
-                        stem=row["stem"],
-                        explanation=row.get("explanation", ""),
-                        answer_type=row["answer_type"],
-                        order_index=int(row.get("order_index") or 0),
-                        is_active=True,
-                    )
-                    last_key = key
-
-                Choice.objects.create(
-                    question=current_question,
-                    label=row["choice_label"],
-                    text=row["choice_text"],
-                    points=int(row.get("choice_points") or 0),
-                    is_correct=str(row.get("is_correct", "0")) == "1",
-                )
-
-            self.stdout.write(self.style.SUCCESS("Import selesai!"))
+            grouped, line_map = group_rows(csv.DictReader(f))
+
+        errors = []
+        for key_str, rows in grouped.items():
+            for e in validate_question_group(rows, line_map[key_str]):
+                errors.append(f"[Lines {line_map[key_str]}] {e}")
+        if errors:
+            for e in errors:
+                self.stderr.write(e)
+            raise CommandError(f"{len(errors)} error(s), nothing imported")
+
+        try:
+            results = import_groups(
+                grouped, deactivate_missing=options["deactivate_missing"], dry_run=options["dry_run"],
+            )
+        except BankError as e:
+            raise CommandError(str(e))
+
+        prefix = "[dry-run] " if options["dry_run"] else ""
+        for slug, result in results.items():
+            self.stdout.write(f"{prefix}{slug}: {result}")
+        self.stdout.write(self.style.SUCCESS("Import selesai!"))
@@ -0,0 +1,39 @@
+import time
+from multiprocessing import Process
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from exam.submission import process_pending
+
+
+def _work(batch_size, sleep, once):
+    while True:
+        n = process_pending(batch_size=batch_size)
+        if once and not n:
+            return
+        if not n:
+            time.sleep(sleep)
+
+
+class Command(BaseCommand):
+    help = "Score attempts waiting in SUBMITTING state (EXAM_SUBMIT_ASYNC)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+        parser.add_argument("--sleep", type=float, default=0.5, help="Idle wait between polls (seconds)")
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+
+    def handle(self, *args, **options):
+        args = (options["batch_size"], options["sleep"], options["once"])
+        if options["workers"] <= 1:
+            _work(*args)
+            return
+
+        # koneksi DB tidak boleh dipakai bersama antar proses
+        connections.close_all()
+        procs = [Process(target=_work, args=args) for _ in range(options["workers"])]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
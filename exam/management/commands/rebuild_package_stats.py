@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from exam.models import Package
+from exam.stats import rebuild_user_package_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute Package.question_count and per-user package stats from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--package", type=int, action="append", dest="packages", help="Package id (repeatable)")
+
+    def handle(self, *args, **options):
+        packages = options["packages"]
+        if packages:
+            Package.sync_question_count(pk__in=packages)
+        else:
+            Package.sync_question_count()
+        n = rebuild_user_package_stats(packages)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {n} user/package stats rows."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from exam.ranking import rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = "Rebuild package leaderboards and score histograms from submitted attempts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--package", type=int, action="append", dest="packages", help="Package id (repeatable)")
+
+    def handle(self, *args, **options):
+        result = rebuild_rankings(options["packages"])
+        for package_id, n in result.items():
+            self.stdout.write(f"Package {package_id}: {n} candidates")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(result)} packages."))
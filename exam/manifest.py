@@ -0,0 +1,162 @@
+from __future__ import annotations
+from typing import Any, Dict, List
+
+from django.core.cache import cache
+
+from .audio import audio_sources
+from .images import picture, webp_srcset
+from .models import Package, Question
+
+
+MANIFEST_CACHE_TIMEOUT = 24 * 60 * 60
+# naikkan kalau bentuk entri manifest berubah (cache lama tidak dipakai lagi)
+MANIFEST_FORMAT = 2
+
+
+def _image_fields(f, derivatives) -> Dict[str, Any]:
+    pic = picture(f, derivatives)
+    return {
+        "image": pic["url"] if pic else None,
+        "image_srcset": webp_srcset(derivatives, f.name),
+        # <source> untuk <picture> (AVIF dulu), dipakai hint preload
+        "image_sources": pic["sources"] if pic else [],
+    }
+
+
+def _audio_fields(f, derivatives) -> Dict[str, Any]:
+    aud = audio_sources(f, derivatives)
+    return {
+        "audio": aud["url"] if aud else None,
+        # varian hasil transcode (Opus/AAC), "audio" tetap sebagai fallback
+        "audio_sources": aud["sources"] if aud else [],
+        "audio_duration": aud["duration"] if aud else None,
+    }
+
+
+def manifest_cache_key(package: Package) -> str:
+    return f"exam:manifest:v{MANIFEST_FORMAT}:{package.id}:{package.content_version}:m{package.media_version}"
+
+
+def _question_entry(q: Question) -> Dict[str, Any]:
+    return {
+        "id": q.id,
+        "section_id": q.section_id,
+        "section": q.section.title if q.section else None,
+        "content_type": q.content_type,
+        "answer_type": q.answer_type,
+        "stem": q.stem,
+        **_image_fields(q.image, q.image_derivatives),
+        **_audio_fields(q.audio, q.audio_derivatives),
+        "explanation": q.explanation,
+        "choices": [
+            {
+                "id": c.id,
+                "ordinal": c.ordinal,  # bit choice_mask (exam/answers.py)
+                "label": c.label,
+                "text": c.text,
+                **_image_fields(c.image, c.image_derivatives),
+                **_audio_fields(c.audio, c.audio_derivatives),
+                "is_correct": c.is_correct,
+                "points": c.points,
+            }
+            for c in q.choices.all()
+        ],
+    }
+
+
+def _active_questions(package: Package):
+    return (
+        Question.objects.filter(package=package, is_active=True)
+        .select_related("section")
+        .prefetch_related("choices")
+        .order_by("order_index", "id")
+    )
+
+
+def build_package_manifest(package: Package) -> Dict[str, Any]:
+    """
+    Snapshot isi package (soal aktif + pilihan) sebagai dict biasa.
+    Termasuk kunci jawaban -> JANGAN kirim mentah ke client (lihat bundle_questions).
+    """
+    return {
+        "package_id": package.id,
+        "version": package.content_version,
+        "questions": [_question_entry(q) for q in _active_questions(package)],
+    }
+
+
+def get_package_manifest(package: Package) -> Dict[str, Any]:
+    """
+    Manifest dari cache, key = package id + content_version + media_version.
+    Versi naik otomatis saat soal/pilihan (atau turunan medianya) berubah, jadi tidak perlu invalidasi manual.
+    """
+    key = manifest_cache_key(package)
+    manifest = cache.get(key)
+    if manifest is None:
+        manifest = build_package_manifest(package)
+        cache.set(key, manifest, MANIFEST_CACHE_TIMEOUT)
+    return manifest
+
+
+def question_cache_key(package: Package, question_id: int) -> str:
+    return f"{manifest_cache_key(package)}:q{question_id}"
+
+
+def get_questions_manifest(package: Package, question_ids: List[int]) -> Dict[str, Any]:
+    """
+    Seperti get_package_manifest tapi hanya untuk soal tertentu (attempt hasil sampling
+    dari bank besar). Entri soal di-cache satu-satu, jadi tidak perlu memuat seluruh bank.
+    Soal yang sudah nonaktif dilewati; urutan tetap kanonik (order_index, id).
+    """
+    keys = {question_cache_key(package, qid): qid for qid in question_ids}
+    found = cache.get_many(list(keys))
+    entries = {keys[k]: v for k, v in found.items()}
+
+    missing = [qid for qid in question_ids if qid not in entries]
+    if missing:
+        fresh = {q.id: _question_entry(q) for q in _active_questions(package).filter(id__in=missing)}
+        # soal nonaktif di-cache sebagai None supaya tidak di-query ulang
+        cache.set_many(
+            {question_cache_key(package, qid): fresh.get(qid) for qid in missing},
+            MANIFEST_CACHE_TIMEOUT,
+        )
+        entries.update(fresh)
+
+    return {
+        "package_id": package.id,
+        "version": package.content_version,
+        "questions": [entries[qid] for qid in question_ids if entries.get(qid)],
+    }
+
+
+def get_attempt_manifest(attempt) -> Dict[str, Any]:
+    """
+    Manifest soal yang dikerjakan attempt ini: seluruh paket, atau hanya soal hasil
+    sampling (attempt.drawn_questions, urut kanonik) kalau paketnya pakai aturan sampling.
+    """
+    cached = getattr(attempt, "_manifest", None)
+    if cached is None:
+        if attempt.drawn_questions is None:
+            cached = get_package_manifest(attempt.package)
+        else:
+            cached = get_questions_manifest(attempt.package, attempt.drawn_questions)
+        attempt._manifest = cached
+    return cached
+
+
+def bundle_questions(manifest: Dict[str, Any], reveal: bool) -> List[Dict[str, Any]]:
+    """
+    Versi manifest yang aman untuk client.
+    reveal=False (TRYOUT): kunci jawaban, poin & pembahasan dibuang.
+    """
+    if reveal:
+        return manifest["questions"]
+
+    hidden = {"is_correct", "points"}
+    return [
+        {
+            **{k: v for k, v in q.items() if k not in ("explanation", "choices")},
+            "choices": [{k: v for k, v in c.items() if k not in hidden} for c in q["choices"]],
+        }
+        for q in manifest["questions"]
+    ]
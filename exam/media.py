@@ -0,0 +1,78 @@
+import mimetypes
+import os
+import urllib.request
+from urllib.parse import urlparse
+
+from django.core.files.base import ContentFile
+
+from .models import Choice, Question
+
+
+ALLOWED_IMAGE_EXT = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+ALLOWED_AUDIO_EXT = {".mp3", ".wav", ".ogg", ".m4a", ".aac"}
+
+def _safe_filename_from_url(url: str, fallback_prefix: str) -> str:
+    parsed = urlparse(url)
+    base = os.path.basename(parsed.path) or fallback_prefix
+    # remove weird chars
+    base = "".join(ch for ch in base if ch.isalnum() or ch in ("-", "_", ".", " "))
+    base = base.replace(" ", "_")
+    if "." not in base:
+        base += ".bin"
+    return base
+
+
+def download_to_field(instance, field_name: str, url: str, timeout: int = 15):
+    """
+    Download URL and save into instance.<field_name> (Django FileField/ImageField).
+    Raises ValueError on failure.
+    """
+    url = (url or "").strip()
+    if not url:
+        return
+
+    if not (url.startswith("http://") or url.startswith("https://")):
+        raise ValueError(f"Invalid URL for {field_name}: {url}")
+
+    # Download bytes
+    try:
+        req = urllib.request.Request(url, headers={"User-Agent": "tryout-csv-import/1.0"})
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            data = resp.read()
+            content_type = resp.headers.get("Content-Type", "")
+    except Exception as e:
+        raise ValueError(f"Failed to download {field_name} from {url}: {e}")
+
+    if not data:
+        raise ValueError(f"Empty download for {field_name}: {url}")
+
+    filename = _safe_filename_from_url(url, f"{field_name}_{instance.pk or 'new'}")
+    ext = os.path.splitext(filename)[1].lower()
+
+    # Validate by extension (basic safety)
+    if field_name == "image":
+        if ext not in ALLOWED_IMAGE_EXT:
+            # try guess from content-type
+            guessed_ext = mimetypes.guess_extension(content_type.split(";")[0].strip()) or ""
+            if guessed_ext.lower() in ALLOWED_IMAGE_EXT:
+                filename = os.path.splitext(filename)[0] + guessed_ext
+            else:
+                raise ValueError(f"Unsupported image extension '{ext}' for URL: {url}")
+    if field_name == "audio":
+        if ext not in ALLOWED_AUDIO_EXT:
+            guessed_ext = mimetypes.guess_extension(content_type.split(";")[0].strip()) or ""
+            if guessed_ext.lower() in ALLOWED_AUDIO_EXT:
+                filename = os.path.splitext(filename)[0] + guessed_ext
+            else:
+                raise ValueError(f"Unsupported audio extension '{ext}' for URL: {url}")
+
+    # Save to field
+    f = ContentFile(data)
+    getattr(instance, field_name).save(filename, f, save=False)
+
+
+def fetch_media(model: str, pk: int, field: str, url: str):
+    """Download media ke field Question/Choice yang sudah tersimpan (dipakai job exam.fetch_media)."""
+    instance = {"question": Question, "choice": Choice}[model].objects.get(pk=pk)
+    download_to_field(instance, field, url)
+    instance.save(update_fields=[field])
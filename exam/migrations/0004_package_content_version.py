@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 08:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0003_attempt_last_active_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='package',
+            name='content_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0004_package_content_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attemptanswer',
+            name='client_seq',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0005_attemptanswer_client_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attemptanswer',
+            name='choice_mask',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
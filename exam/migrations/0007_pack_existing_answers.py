@@ -0,0 +1,52 @@
+from django.db import migrations
+
+
+CHUNK = 2000
+MAX_PACKED_CHOICES = 63
+
+
+def pack_existing(apps, schema_editor):
+    """
+    Isi choice_mask dari data M2M yang sudah ada.
+    Ordinal = posisi pilihan dalam soalnya, urut (order_index, id).
+    """
+    Choice = apps.get_model("exam", "Choice")
+    AttemptAnswer = apps.get_model("exam", "AttemptAnswer")
+    Through = AttemptAnswer.choices.through
+
+    ordinal = {}
+    last_qid, pos = None, 0
+    for cid, qid in Choice.objects.order_by("question_id", "order_index", "id").values_list("id", "question_id").iterator(chunk_size=CHUNK):
+        if qid != last_qid:
+            last_qid, pos = qid, 0
+        if pos < MAX_PACKED_CHOICES:
+            ordinal[cid] = pos
+        pos += 1
+
+    batch = []
+    current_id, mask = None, 0
+    for answer_id, choice_id in Through.objects.order_by("attemptanswer_id").values_list("attemptanswer_id", "choice_id").iterator(chunk_size=CHUNK):
+        if answer_id != current_id:
+            if current_id is not None:
+                batch.append(AttemptAnswer(id=current_id, choice_mask=mask))
+            current_id, mask = answer_id, 0
+            if len(batch) >= CHUNK:
+                AttemptAnswer.objects.bulk_update(batch, ["choice_mask"])
+                batch = []
+        if choice_id in ordinal:
+            mask |= 1 << ordinal[choice_id]
+    if current_id is not None:
+        batch.append(AttemptAnswer(id=current_id, choice_mask=mask))
+    if batch:
+        AttemptAnswer.objects.bulk_update(batch, ["choice_mask"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0006_attemptanswer_choice_mask'),
+    ]
+
+    operations = [
+        migrations.RunPython(pack_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-19 08:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0007_pack_existing_answers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAttempt',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('mode', models.CharField(choices=[('TRYOUT', 'Tryout'), ('LEARN', 'Learn')], max_length=10)),
+                ('status', models.CharField(choices=[('IN_PROGRESS', 'In Progress'), ('SUBMITTED', 'Submitted'), ('EXPIRED', 'Expired')], max_length=15)),
+                ('started_at', models.DateTimeField()),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('duration_seconds', models.PositiveIntegerField(default=0)),
+                ('score', models.IntegerField(default=0)),
+                ('max_score', models.IntegerField(default=0)),
+                ('total_questions', models.PositiveIntegerField(default=0)),
+                ('answered_count', models.PositiveIntegerField(default=0)),
+                ('flagged_count', models.PositiveIntegerField(default=0)),
+                ('answers', models.JSONField(blank=True, default=dict)),
+                ('flagged', models.JSONField(blank=True, default=list)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attempts', to='exam.package')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attempts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'package'], name='exam_archiv_user_id_4a21fc_idx')],
+            },
+        ),
+    ]
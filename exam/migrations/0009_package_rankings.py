@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-19 08:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0008_archivedattempt'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackageRankEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('best_score', models.IntegerField(default=0)),
+                ('best_attempt_id', models.BigIntegerField(blank=True, null=True)),
+                ('achieved_at', models.DateTimeField(blank=True, null=True)),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rank_entries', to='exam.package')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rank_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['package', '-best_score', 'achieved_at'], name='exam_packag_package_7984ba_idx')],
+                'unique_together': {('package', 'user')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PackageScoreBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.IntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to='exam.package')),
+            ],
+            options={
+                'unique_together': {('package', 'score')},
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-19 08:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0009_package_rankings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackageItemAnalysis',
+            fields=[
+                ('package', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='item_analysis', serialize=False, to='exam.package')),
+                ('analyzed_until', models.DateTimeField(blank=True, null=True)),
+                ('attempts_count', models.PositiveIntegerField(default=0)),
+                ('content_version', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='exam.question')),
+                ('n', models.PositiveIntegerField(default=0)),
+                ('blank_count', models.PositiveIntegerField(default=0)),
+                ('choice_counts', models.JSONField(blank=True, default=dict)),
+                ('sum_x', models.FloatField(default=0)),
+                ('sum_xx', models.FloatField(default=0)),
+                ('sum_y', models.FloatField(default=0)),
+                ('sum_yy', models.FloatField(default=0)),
+                ('sum_xy', models.FloatField(default=0)),
+                ('difficulty', models.FloatField(blank=True, null=True)),
+                ('discrimination', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 6.0.1 on 2026-10-19 08:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def backfill(apps, schema_editor):
+    """Isi question_count & UserPackageStats dari data yang sudah ada."""
+    Package = apps.get_model("exam", "Package")
+    Question = apps.get_model("exam", "Question")
+    Attempt = apps.get_model("exam", "Attempt")
+    ArchivedAttempt = apps.get_model("exam", "ArchivedAttempt")
+    UserPackageStats = apps.get_model("exam", "UserPackageStats")
+
+    counts = dict(
+        Question.objects.filter(is_active=True).order_by().values("package_id")
+        .annotate(n=Count("id")).values_list("package_id", "n")
+    )
+    for package_id, n in counts.items():
+        Package.objects.filter(pk=package_id).update(question_count=n)
+
+    merged = {}
+    for model in (Attempt, ArchivedAttempt):
+        rows = (
+            model.objects.filter(status="SUBMITTED").order_by()
+            .values("user_id", "package_id")
+            .annotate(n=Count("id"), s=Sum("score"), best=Max("score"), last=Max("submitted_at"))
+        )
+        for r in rows:
+            cur = merged.setdefault((r["user_id"], r["package_id"]), {"n": 0, "s": 0, "best": None, "last": None})
+            cur["n"] += r["n"]
+            cur["s"] += r["s"] or 0
+            if cur["best"] is None or r["best"] > cur["best"]:
+                cur["best"] = r["best"]
+            if r["last"] and (cur["last"] is None or r["last"] > cur["last"]):
+                cur["last"] = r["last"]
+
+    UserPackageStats.objects.bulk_create(
+        [
+            UserPackageStats(
+                user_id=user_id, package_id=package_id,
+                attempt_count=v["n"], score_sum=v["s"], best_score=v["best"], last_submitted_at=v["last"],
+            )
+            for (user_id, package_id), v in merged.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0010_item_analysis'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='package',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='UserPackageStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.BigIntegerField(default=0)),
+                ('best_score', models.IntegerField(blank=True, null=True)),
+                ('last_submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_stats', to='exam.package')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='package_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'package')},
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
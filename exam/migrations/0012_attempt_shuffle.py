@@ -0,0 +1,53 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0011_package_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedattempt',
+            name='question_order',
+            field=models.CharField(choices=[('FIXED', 'Fixed (order_index)'), ('SHUFFLE', 'Shuffle all questions'), ('SHUFFLE_IN_SECTION', 'Shuffle within each section')], default='FIXED', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='archivedattempt',
+            name='shuffle_choices',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='archivedattempt',
+            name='shuffle_seed',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='question_order',
+            field=models.CharField(choices=[('FIXED', 'Fixed (order_index)'), ('SHUFFLE', 'Shuffle all questions'), ('SHUFFLE_IN_SECTION', 'Shuffle within each section')], default='FIXED', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='shuffle_choices',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='shuffle_seed',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='package',
+            name='question_order',
+            field=models.CharField(choices=[('FIXED', 'Fixed (order_index)'), ('SHUFFLE', 'Shuffle all questions'), ('SHUFFLE_IN_SECTION', 'Shuffle within each section')], default='FIXED', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='package',
+            name='shuffle_choices',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0012_attempt_shuffle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedattempt',
+            name='drawn_questions',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='drawn_questions',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='SamplingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField()),
+                ('stratify_by_difficulty', models.BooleanField(default=True)),
+                ('order_index', models.PositiveIntegerField(default=0)),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sampling_rules', to='exam.package')),
+                ('section', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sampling_rules', to='exam.section')),
+            ],
+            options={
+                'ordering': ['order_index', 'id'],
+            },
+        ),
+    ]
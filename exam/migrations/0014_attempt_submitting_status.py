@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0013_sampling_rules'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedattempt',
+            name='status',
+            field=models.CharField(choices=[('IN_PROGRESS', 'In Progress'), ('SUBMITTING', 'Submitting'), ('SUBMITTED', 'Submitted'), ('EXPIRED', 'Expired')], max_length=15),
+        ),
+        migrations.AlterField(
+            model_name='attempt',
+            name='status',
+            field=models.CharField(choices=[('IN_PROGRESS', 'In Progress'), ('SUBMITTING', 'Submitting'), ('SUBMITTED', 'Submitted'), ('EXPIRED', 'Expired')], default='IN_PROGRESS', max_length=15),
+        ),
+    ]
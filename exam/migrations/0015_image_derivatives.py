@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0014_attempt_submitting_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='choice',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
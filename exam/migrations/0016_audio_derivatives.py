@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0015_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='choice',
+            name='audio_derivatives',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='audio_derivatives',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
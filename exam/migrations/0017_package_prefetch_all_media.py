@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0016_audio_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='package',
+            name='prefetch_all_media',
+            field=models.BooleanField(default=False),
+        ),
+    ]
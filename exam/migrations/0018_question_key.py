@@ -0,0 +1,56 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:48
+
+import exam.models
+import hashlib
+import uuid
+from django.db import migrations, models
+
+
+def fill_keys(apps, schema_editor):
+    """
+    Soal yang sudah ada dapat key yang sama dengan fallback import CSV tanpa kolom
+    question_key (csv_import.question_key: "csv-" + sha1(section + stem)), supaya re-import
+    bank lama tidak menduplikasi soal. Kembar section + stem dalam satu paket -> uuid.
+    """
+    Question = apps.get_model("exam", "Question")
+    seen = set()
+    batch = []
+    for q in Question.objects.only("id", "package_id", "stem", "section__title").select_related("section").order_by("id").iterator(chunk_size=2000):
+        basis = f"{(q.section.title if q.section else '').strip()}\n{q.stem or ''}"
+        key = "csv-" + hashlib.sha1(basis.encode("utf-8")).hexdigest()[:24]
+        if (q.package_id, key) in seen:
+            key = uuid.uuid4().hex
+        seen.add((q.package_id, key))
+        q.key = key
+        batch.append(q)
+        if len(batch) >= 2000:
+            Question.objects.bulk_update(batch, ["key"])
+            batch = []
+    if batch:
+        Question.objects.bulk_update(batch, ["key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0017_package_prefetch_all_media'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='key',
+            field=models.CharField(default='', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='question',
+            name='key',
+            field=models.CharField(default=exam.models.new_question_key, max_length=64),
+        ),
+        migrations.AlterUniqueTogether(
+            name='question',
+            unique_together={('package', 'key')},
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:12
+
+from django.db import migrations, models
+
+
+def fill_ordinals(apps, schema_editor):
+    """
+    Ordinal pilihan yang sudah ada = posisinya saat ini (order_index, id), sama dengan
+    bit yang dipakai choice_mask sebelum ada kolom ini, jadi jawaban packed lama tetap valid.
+    """
+    Choice = apps.get_model("exam", "Choice")
+    Question = apps.get_model("exam", "Question")
+    batch = []
+    counters = {}
+    rows = Choice.objects.order_by("question_id", "order_index", "id").only("id", "question_id")
+    for c in rows.iterator(chunk_size=2000):
+        c.ordinal = counters.get(c.question_id, 0)
+        counters[c.question_id] = c.ordinal + 1
+        batch.append(c)
+        if len(batch) >= 2000:
+            Choice.objects.bulk_update(batch, ["ordinal"])
+            batch = []
+    if batch:
+        Choice.objects.bulk_update(batch, ["ordinal"])
+    Question.objects.bulk_update(
+        [Question(id=qid, next_choice_ordinal=n) for qid, n in counters.items()],
+        ["next_choice_ordinal"], batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0018_question_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='choice',
+            name='ordinal',
+            field=models.PositiveSmallIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='next_choice_ordinal',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_ordinals, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='choice',
+            name='ordinal',
+            field=models.PositiveSmallIntegerField(editable=False),
+        ),
+        migrations.AlterUniqueTogether(
+            name='choice',
+            unique_together={('question', 'ordinal')},
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+def fill_finalized_at(apps, schema_editor):
+    """Attempt lama: waktu penilaian tidak tercatat, pakai submitted_at (sama dengan watermark lama)."""
+    for name in ("Attempt", "ArchivedAttempt"):
+        model = apps.get_model("exam", name)
+        model.objects.filter(status="SUBMITTED", finalized_at__isnull=True).update(finalized_at=models.F("submitted_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0019_choice_ordinal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedattempt',
+            name='finalized_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='finalized_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_finalized_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0020_attempt_finalized_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='package',
+            name='media_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
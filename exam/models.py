@@ -1,7 +1,33 @@
+import uuid
+
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import connection, models, transaction
+from django.db.models.functions import Coalesce, RowNumber
 from django.utils.text import slugify
 
+from core.jobs import enqueue
+
+
+def _queue_media_derivatives(instance, model: str):
+    """
+    Gambar/audio baru atau diganti -> job turunan setelah commit
+    (exam.image_derivatives / exam.audio_derivatives, lihat exam/images.py & exam/audio.py).
+    """
+    payload = {"model": model, "pk": instance.pk}
+    for field, job in (("image", "exam.image_derivatives"), ("audio", "exam.audio_derivatives")):
+        f = getattr(instance, field)
+        if f and (getattr(instance, f"{field}_derivatives") or {}).get("src") != f.name:
+            transaction.on_commit(lambda job=job: enqueue(job, payload, unique=True))
+
+
+# bit yang bisa dipakai AttemptAnswer.choice_mask (BigIntegerField signed) = ordinal pilihan per soal
+CHOICE_ORDINAL_LIMIT = 63
+
+
+def new_question_key() -> str:
+    return uuid.uuid4().hex
+
 
 class ExamCategory(models.Model):
     name = models.CharField(max_length=120, unique=True)
@@ -23,6 +49,11 @@ class ExamCategory(models.Model):
 
 
 class Package(models.Model):
+    class QuestionOrder(models.TextChoices):
+        FIXED = "FIXED", "Fixed (order_index)"
+        SHUFFLE = "SHUFFLE", "Shuffle all questions"
+        SHUFFLE_IN_SECTION = "SHUFFLE_IN_SECTION", "Shuffle within each section"
+
     category = models.ForeignKey(ExamCategory, on_delete=models.PROTECT, related_name="packages")
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=220, unique=True, blank=True)
@@ -35,11 +66,85 @@ class Package(models.Model):
     is_active = models.BooleanField(default=True)
     order_index = models.PositiveIntegerField(default=0)
 
+    # urutan soal/pilihan per attempt (di-snapshot ke Attempt saat mulai)
+    question_order = models.CharField(max_length=20, choices=QuestionOrder.choices, default=QuestionOrder.FIXED)
+    shuffle_choices = models.BooleanField(default=False)
+    # paket dengan media berat (listening): player memuat media semua soal di awal,
+    # bukan hanya beberapa soal berikutnya (exam/prefetch.py)
+    prefetch_all_media = models.BooleanField(default=False)
+
+    # naik setiap kali isi soal/pilihan berubah (dipakai token attempt & cache)
+    content_version = models.PositiveIntegerField(default=1)
+    # naik setiap kali turunan media (WebP/AVIF/Opus) selesai dibuat: ikut di key cache
+    # manifest & fragment, tapi bukan di token attempt (isi soal tidak berubah)
+    media_version = models.PositiveIntegerField(default=1)
+    # jumlah soal aktif, dihitung ulang tiap Question disimpan/dihapus
+    question_count = models.PositiveIntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["order_index", "title"]
 
+    @classmethod
+    def bump_content_version(cls, **lookup):
+        """
+        Naikkan content_version untuk package yang cocok dengan lookup
+        (satu UPDATE, tanpa load object).
+        """
+        cls.objects.filter(**lookup).update(content_version=models.F("content_version") + 1)
+
+    @classmethod
+    def bump_media_version(cls, **lookup):
+        """Seperti bump_content_version, untuk media_version (job turunan media)."""
+        cls.objects.filter(**lookup).update(media_version=models.F("media_version") + 1)
+
+    @classmethod
+    def sync_question_count(cls, **lookup):
+        """Hitung ulang question_count (+ naikkan content_version) dalam satu UPDATE."""
+        active = (
+            Question.objects.filter(package=models.OuterRef("pk"), is_active=True)
+            .order_by()
+            .values("package")
+            .annotate(n=models.Count("id"))
+            .values("n")
+        )
+        cls.objects.filter(**lookup).update(
+            content_version=models.F("content_version") + 1,
+            question_count=Coalesce(models.Subquery(active), 0),
+        )
+
+    @classmethod
+    def renumber_questions(cls, package_ids) -> int:
+        """
+        order_index semua soal paket-paket ini jadi 1, 2, 3, ... mengikuti urutan sekarang
+        (order_index, id), dalam satu UPDATE ... FROM (ROW_NUMBER() OVER ...) (SQLite >= 3.33 /
+        Postgres); content_version tiap paket naik sekali. Return jumlah soal yang berubah nomor.
+        """
+        package_ids = list(package_ids)
+        if not package_ids:
+            return 0
+        ranked = (
+            Question.objects.filter(package_id__in=package_ids)
+            .order_by()
+            .annotate(rn=models.Window(
+                RowNumber(), partition_by=[models.F("package_id")],
+                order_by=[models.F("order_index").asc(), models.F("id").asc()],
+            ))
+            .values("id", "rn")
+        )
+        sql, params = ranked.query.sql_with_params()
+        table = connection.ops.quote_name(Question._meta.db_table)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET order_index = r.rn FROM ({sql}) AS r "
+                f"WHERE {table}.id = r.id AND {table}.order_index <> r.rn",
+                params,
+            )
+            changed = cursor.rowcount
+            cls.bump_content_version(id__in=package_ids)
+        return changed
+
     def save(self, *args, **kwargs):
         if not self.slug:
             base = slugify(self.title)[:200] or "package"
@@ -87,6 +192,8 @@ class Question(models.Model):
 
     package = models.ForeignKey(Package, on_delete=models.CASCADE, related_name="questions")
     section = models.ForeignKey(Section, on_delete=models.SET_NULL, null=True, blank=True, related_name="questions")
+    # kunci stabil per paket untuk export/import bank soal (exam/bank.py), tidak berubah walau isi soal diedit
+    key = models.CharField(max_length=64, default=new_question_key)
 
     order_index = models.PositiveIntegerField(default=0)
 
@@ -97,15 +204,40 @@ class Question(models.Model):
 
     image = models.ImageField(upload_to="questions/images/", null=True, blank=True)
     audio = models.FileField(upload_to="questions/audio/", null=True, blank=True)
+    # versi resize WebP/AVIF + placeholder (exam/images.py), transcode + durasi (exam/audio.py)
+    image_derivatives = models.JSONField(null=True, blank=True, editable=False)
+    audio_derivatives = models.JSONField(null=True, blank=True, editable=False)
 
     explanation = models.TextField(blank=True)
 
     is_active = models.BooleanField(default=True)
 
+    # Choice.ordinal berikutnya; hanya naik (lewat Choice.assign_ordinals), tidak ikut save()
+    next_choice_ordinal = models.PositiveSmallIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["order_index", "id"]
+        unique_together = [("package", "key")]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            # instance lama bisa punya next_choice_ordinal basi; jangan sampai counter mundur
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.name != "next_choice_ordinal"
+            ]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Package.sync_question_count(pk=self.package_id)
+            _queue_media_derivatives(self, "question")
+
+    def delete(self, *args, **kwargs):
+        package_id = self.package_id
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            Package.sync_question_count(pk=package_id)
+        return result
 
     def __str__(self):
         return f"Q{self.id} - {self.package.title}"
@@ -118,19 +250,94 @@ class Choice(models.Model):
 
     image = models.ImageField(upload_to="choices/images/", null=True, blank=True)
     audio = models.FileField(upload_to="choices/audio/", null=True, blank=True)
+    image_derivatives = models.JSONField(null=True, blank=True, editable=False)
+    audio_derivatives = models.JSONField(null=True, blank=True, editable=False)
 
     is_correct = models.BooleanField(default=False)
     points = models.IntegerField(default=0)  # untuk WEIGHTED / scoring khusus
 
     order_index = models.PositiveIntegerField(default=0)
+    # nomor bit di AttemptAnswer.choice_mask: dibagikan sekali per soal, tidak ikut berubah saat
+    # pilihan diurutkan ulang, dan tidak dipakai ulang setelah pilihan dihapus
+    ordinal = models.PositiveSmallIntegerField(editable=False)
 
     class Meta:
         ordering = ["order_index", "id"]
+        unique_together = [("question", "ordinal")]
+
+    @classmethod
+    def assign_ordinals(cls, choices):
+        """
+        Isi ordinal untuk Choice baru (ordinal None), lanjut dari Question.next_choice_ordinal.
+        Wajib dipanggil sebelum bulk_create. Lebih dari CHOICE_ORDINAL_LIMIT -> ValidationError.
+        """
+        pending: dict = {}
+        for c in choices:
+            if c.ordinal is None:
+                pending.setdefault(c.question_id, []).append(c)
+        if not pending:
+            return
+        with transaction.atomic():
+            counters = dict(
+                Question.objects.select_for_update().filter(id__in=pending).values_list("id", "next_choice_ordinal")
+            )
+            bumped = []
+            for qid, new in pending.items():
+                start = counters[qid]
+                if start + len(new) > CHOICE_ORDINAL_LIMIT:
+                    raise ValidationError(
+                        f"Soal {qid}: maksimal {CHOICE_ORDINAL_LIMIT} pilihan (termasuk yang sudah dihapus)"
+                    )
+                for i, c in enumerate(new):
+                    c.ordinal = start + i
+                bumped.append(Question(id=qid, next_choice_ordinal=start + len(new)))
+            Question.objects.bulk_update(bumped, ["next_choice_ordinal"])
+
+    def clean(self):
+        super().clean()
+        if self.ordinal is None and self.question_id:
+            used = Question.objects.filter(id=self.question_id).values_list("next_choice_ordinal", flat=True).first()
+            if used is not None and used >= CHOICE_ORDINAL_LIMIT:
+                raise ValidationError(f"Maksimal {CHOICE_ORDINAL_LIMIT} pilihan per soal (termasuk yang sudah dihapus)")
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if self.ordinal is None:
+                Choice.assign_ordinals([self])
+            super().save(*args, **kwargs)
+        Package.bump_content_version(questions__id=self.question_id)
+        _queue_media_derivatives(self, "choice")
+
+    def delete(self, *args, **kwargs):
+        question_id = self.question_id
+        result = super().delete(*args, **kwargs)
+        Package.bump_content_version(questions__id=question_id)
+        return result
 
     def __str__(self):
         return f"{self.question_id} - {self.label or 'choice'}"
 
 
+class SamplingRule(models.Model):
+    """
+    Aturan ambil soal dari bank paket: `count` soal dari `section` (kosong = dari
+    seluruh paket). Kalau paket punya aturan, tiap attempt hanya mengerjakan soal
+    yang diambil saat start (lihat exam/sampling.py); tanpa aturan = semua soal aktif.
+    """
+    package = models.ForeignKey(Package, on_delete=models.CASCADE, related_name="sampling_rules")
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, null=True, blank=True, related_name="sampling_rules")
+    count = models.PositiveIntegerField()
+    # bagi jatah per tingkat kesukaran (QuestionStats.difficulty) sesuai proporsi di bank
+    stratify_by_difficulty = models.BooleanField(default=True)
+    order_index = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["order_index", "id"]
+
+    def __str__(self):
+        return f"{self.package.title}: {self.count} dari {self.section.title if self.section else 'semua soal'}"
+
+
 class UserPackage(models.Model):
     """
     Menyimpan status user: favorited / purchased.
@@ -158,6 +365,7 @@ class Attempt(models.Model):
 
     class Status(models.TextChoices):
         IN_PROGRESS = "IN_PROGRESS", "In Progress"
+        SUBMITTING = "SUBMITTING", "Submitting"  # menunggu dinilai worker
         SUBMITTED = "SUBMITTED", "Submitted"
         EXPIRED = "EXPIRED", "Expired"
 
@@ -170,6 +378,8 @@ class Attempt(models.Model):
 
     started_at = models.DateTimeField(auto_now_add=True)
     submitted_at = models.DateTimeField(null=True, blank=True)
+    # saat status jadi SUBMITTED (dinilai); bisa jauh setelah submitted_at (worker, expire_overdue)
+    finalized_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     # timer
     duration_seconds = models.PositiveIntegerField(default=90 * 60)  # snapshot dari package
@@ -177,6 +387,16 @@ class Attempt(models.Model):
 
     current_index = models.PositiveIntegerField(default=0)  # untuk resume ke nomor terakhir dibuka
 
+    # snapshot pengaturan acak dari package + seed; permutasi dihitung ulang dari sini (exam/ordering.py)
+    question_order = models.CharField(
+        max_length=20, choices=Package.QuestionOrder.choices, default=Package.QuestionOrder.FIXED
+    )
+    shuffle_choices = models.BooleanField(default=False)
+    shuffle_seed = models.BigIntegerField(default=0)
+
+    # id soal hasil sampling (urut kanonik), ditetapkan saat start; None = semua soal aktif paket
+    drawn_questions = models.JSONField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -185,6 +405,8 @@ class Attempt(models.Model):
     score = models.IntegerField(default=0)
     max_score = models.IntegerField(default=0)
 
+    is_archived = False
+
     def __str__(self):
         return f"{self.user} - {self.package} - {self.mode} - {self.status}"
 
@@ -203,8 +425,171 @@ class AttemptAnswer(models.Model):
     answered_at = models.DateTimeField(null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # nomor urut perubahan terakhir dari client (batch sync, idempotent)
+    client_seq = models.PositiveIntegerField(default=0)
+
+    # pilihan terpilih sebagai bitmask ordinal (urut order_index, id dari pilihan soal)
+    # dipakai langsung saat EXAM_ANSWER_STORAGE = "packed", lihat exam/answers.py
+    choice_mask = models.BigIntegerField(default=0)
+
     class Meta:
         unique_together = [("attempt", "question")]
 
     def __str__(self):
         return f"{self.attempt_id} - Q{self.question_id}"
+
+
+class UserPackageStats(models.Model):
+    """
+    Ringkasan attempt SUBMITTED user per paket (termasuk yang sudah diarsip).
+    Diupdate di transaksi yang sama dengan submit, lihat exam/stats.py.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="package_stats")
+    package = models.ForeignKey(Package, on_delete=models.CASCADE, related_name="user_stats")
+
+    attempt_count = models.PositiveIntegerField(default=0)
+    score_sum = models.BigIntegerField(default=0)
+    best_score = models.IntegerField(null=True, blank=True)
+    last_submitted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = [("user", "package")]
+
+    def __str__(self):
+        return f"{self.user} - {self.package}: {self.attempt_count}x, best {self.best_score}"
+
+
+class ArchivedAttempt(models.Model):
+    """
+    Attempt lama (SUBMITTED/EXPIRED) yang sudah dipindah dari tabel Attempt
+    oleh `manage.py archive_attempts`. id = id Attempt asli, jadi URL hasil tetap sama.
+    Jawaban disimpan ringkas sebagai JSON, plus snapshot skor & hitungan.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_attempts")
+    package = models.ForeignKey(Package, on_delete=models.CASCADE, related_name="archived_attempts")
+
+    mode = models.CharField(max_length=10, choices=Attempt.Mode.choices)
+    status = models.CharField(max_length=15, choices=Attempt.Status.choices)
+
+    started_at = models.DateTimeField()
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    finalized_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    duration_seconds = models.PositiveIntegerField(default=0)
+
+    question_order = models.CharField(
+        max_length=20, choices=Package.QuestionOrder.choices, default=Package.QuestionOrder.FIXED
+    )
+    shuffle_choices = models.BooleanField(default=False)
+    shuffle_seed = models.BigIntegerField(default=0)
+    drawn_questions = models.JSONField(null=True, blank=True)
+
+    score = models.IntegerField(default=0)
+    max_score = models.IntegerField(default=0)
+    total_questions = models.PositiveIntegerField(default=0)
+    answered_count = models.PositiveIntegerField(default=0)
+    flagged_count = models.PositiveIntegerField(default=0)
+
+    # {"<question_id>": [choice_id, ...]} hanya soal yang dijawab; flagged = [question_id, ...]
+    answers = models.JSONField(default=dict, blank=True)
+    flagged = models.JSONField(default=list, blank=True)
+
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    is_archived = True
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["user", "package"])]
+
+    def answer_map(self):
+        """Bentuk sama dengan exam.answers.load_answers()."""
+        flagged = set(self.flagged)
+        qids = {int(k) for k in self.answers} | flagged
+        return {
+            qid: {"choices": self.answers.get(str(qid), []), "flagged": qid in flagged, "client_seq": 0}
+            for qid in qids
+        }
+
+    def __str__(self):
+        return f"{self.user} - {self.package} - {self.mode} - {self.status} (archived)"
+
+
+class PackageScoreBucket(models.Model):
+    """
+    Histogram skor terbaik per peserta untuk satu paket (hanya mode TRYOUT).
+    Satu baris per nilai skor; dipakai exam/ranking.py untuk rank & persentil.
+    """
+    package = models.ForeignKey(Package, on_delete=models.CASCADE, related_name="score_buckets")
+    score = models.IntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [("package", "score")]
+
+    def __str__(self):
+        return f"{self.package_id} - {self.score}: {self.count}"
+
+
+class PackageRankEntry(models.Model):
+    """Skor terbaik tiap user per paket (leaderboard). Diupdate saat submit."""
+    package = models.ForeignKey(Package, on_delete=models.CASCADE, related_name="rank_entries")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="rank_entries")
+    best_score = models.IntegerField(default=0)
+    best_attempt_id = models.BigIntegerField(null=True, blank=True)  # bisa sudah di arsip
+    achieved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = [("package", "user")]
+        indexes = [models.Index(fields=["package", "-best_score", "achieved_at"])]
+
+    def __str__(self):
+        return f"{self.user} - {self.package}: {self.best_score}"
+
+
+class QuestionStats(models.Model):
+    """
+    Hasil item analysis per soal (lihat exam/item_analysis.py).
+    Disimpan juga jumlah-jumlah mentah (sum_*) supaya refresh bisa inkremental:
+    attempt baru cukup ditambahkan, tidak perlu scan ulang semua jawaban.
+    x = skor soal (0..1, dinormalisasi ke max soal), y = skor total attempt.
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+
+    n = models.PositiveIntegerField(default=0)
+    blank_count = models.PositiveIntegerField(default=0)
+    choice_counts = models.JSONField(default=dict, blank=True)  # {"<choice_id>": jumlah dipilih}
+
+    sum_x = models.FloatField(default=0)
+    sum_xx = models.FloatField(default=0)
+    sum_y = models.FloatField(default=0)
+    sum_yy = models.FloatField(default=0)
+    sum_xy = models.FloatField(default=0)
+
+    # p-value (tingkat kesukaran, 0..1) & point-biserial (daya beda, -1..1)
+    difficulty = models.FloatField(null=True, blank=True)
+    discrimination = models.FloatField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def selection_rate(self, choice_id: int):
+        if not self.n:
+            return None
+        return self.choice_counts.get(str(choice_id), 0) / self.n
+
+    def __str__(self):
+        return f"Stats Q{self.question_id}"
+
+
+class PackageItemAnalysis(models.Model):
+    """Penanda sampai kapan attempt paket ini sudah masuk QuestionStats."""
+    package = models.OneToOneField(Package, on_delete=models.CASCADE, primary_key=True, related_name="item_analysis")
+    analyzed_until = models.DateTimeField(null=True, blank=True)  # finalized_at terakhir yang sudah dihitung
+    attempts_count = models.PositiveIntegerField(default=0)
+    # versi konten saat dihitung; kalau kunci/soal berubah, hitung ulang penuh
+    content_version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Item analysis {self.package}"
@@ -0,0 +1,80 @@
+from __future__ import annotations
+import random
+import secrets
+import string
+from typing import Any, Dict, List, TypeVar
+
+from .models import Package
+
+# Urutan soal/pilihan per attempt diturunkan dari Attempt.shuffle_seed, tidak ada
+# permutasi yang disimpan per soal. spec = Attempt atau AttemptClaims (atribut sama):
+# question_order, shuffle_choices, shuffle_seed.
+
+T = TypeVar("T")
+
+
+def new_shuffle_seed() -> int:
+    # muat di BigIntegerField signed, 0 dicadangkan untuk "tanpa acak"
+    return secrets.randbits(62) + 1
+
+
+def _get(item: Any, name: str):
+    return item[name] if isinstance(item, dict) else getattr(item, name)
+
+
+def order_questions(spec, items: List[T]) -> List[T]:
+    """
+    items: soal dalam urutan kanonik (order_index, id), Question atau dict manifest.
+    SHUFFLE_IN_SECTION: urutan section tetap (sesuai kemunculan pertama), soal diacak di dalamnya.
+    """
+    mode = getattr(spec, "question_order", Package.QuestionOrder.FIXED)
+    if mode == Package.QuestionOrder.FIXED or not spec.shuffle_seed:
+        return list(items)
+
+    rng = random.Random(spec.shuffle_seed)
+    if mode == Package.QuestionOrder.SHUFFLE:
+        out = list(items)
+        rng.shuffle(out)
+        return out
+
+    groups: Dict[Any, List[T]] = {}
+    for item in items:
+        groups.setdefault(_get(item, "section_id"), []).append(item)
+    out = []
+    for group in groups.values():
+        rng.shuffle(group)
+        out.extend(group)
+    return out
+
+
+def order_choices(spec, question_id: int, items: List[T]) -> List[T]:
+    """
+    Acak pilihan satu soal (deterministik per attempt + soal).
+    Kalau label aslinya A, B, C, ... label ikut diurutkan ulang supaya tetap A, B, C
+    di layar: dict disalin, objek Choice diubah in-memory saja (jangan di-save()).
+    """
+    if not getattr(spec, "shuffle_choices", False) or not spec.shuffle_seed:
+        return list(items)
+
+    out = list(items)
+    random.Random(f"{spec.shuffle_seed}:{question_id}").shuffle(out)
+
+    letters = string.ascii_uppercase[: len(items)]
+    if [_get(c, "label") for c in items] == list(letters):
+        relabeled = []
+        for c, letter in zip(out, letters):
+            if isinstance(c, dict):
+                c = {**c, "label": letter}
+            else:
+                c.label = letter
+            relabeled.append(c)
+        out = relabeled
+    return out
+
+
+def order_bundle_questions(spec, questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Soal bundle/manifest (list of dict) dengan urutan soal & pilihan milik attempt ini."""
+    ordered = order_questions(spec, questions)
+    if not getattr(spec, "shuffle_choices", False) or not spec.shuffle_seed:
+        return ordered
+    return [{**q, "choices": order_choices(spec, q["id"], q["choices"])} for q in ordered]
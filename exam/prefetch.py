@@ -0,0 +1,77 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from .models import Package
+
+
+# Hint media untuk soal-soal berikutnya, diambil dari manifest attempt (sudah di-cache),
+# supaya gambar/audio soal berikut sudah ada di cache browser saat user pindah soal.
+# Gambar: <link rel=preload as=image imagesrcset> dengan srcset & sizes yang sama
+# dengan <picture> di fragment player, jadi kandidat yang diunduh = yang nanti dipakai.
+# Audio: <link rel=prefetch> untuk varian pertama (Opus) atau file asli.
+
+# harus sama dengan sizes di exam/fragments/player_*.html
+QUESTION_SIZES = "(max-width: 900px) 100vw, 800px"
+CHOICE_SIZES = "320px"
+
+
+def prefetch_ahead(package: Package) -> Optional[int]:
+    """Jumlah soal berikutnya yang medianya dimuat duluan; None = semua soal."""
+    if package.prefetch_all_media:
+        return None
+    return getattr(settings, "EXAM_PREFETCH_AHEAD", 3)
+
+
+def _image_hint(item: Dict[str, Any], sizes: str) -> Dict[str, str]:
+    hint = {"rel": "preload", "as": "image", "href": item["image"]}
+    sources = item.get("image_sources") or []
+    if sources:
+        hint.update(imagesrcset=sources[0]["srcset"], imagesizes=sizes, type=sources[0]["type"])
+    return hint
+
+
+def _audio_hint(item: Dict[str, Any]) -> Dict[str, str]:
+    sources = item.get("audio_sources") or []
+    return {"rel": "prefetch", "href": sources[0]["url"] if sources else item["audio"]}
+
+
+def media_hints(entry: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Hint untuk satu soal manifest (gambar/audio soal + pilihannya)."""
+    hints = []
+    for item, sizes in [(entry, QUESTION_SIZES)] + [(c, CHOICE_SIZES) for c in entry.get("choices", [])]:
+        if item.get("image"):
+            hints.append(_image_hint(item, sizes))
+        if item.get("audio"):
+            hints.append(_audio_hint(item))
+    return hints
+
+
+def upcoming_hints(entries: List[Dict[str, Any]], idx: int, ahead: Optional[int]) -> List[Dict[str, str]]:
+    """entries = manifest soal dalam urutan attempt; hint untuk soal setelah idx."""
+    upcoming = entries[idx + 1:] if ahead is None else entries[idx + 1: idx + 1 + ahead]
+    hints, seen = [], set()
+    for entry in upcoming:
+        for hint in media_hints(entry):
+            if hint["href"] not in seen:
+                seen.add(hint["href"])
+                hints.append(hint)
+    return hints
+
+
+def link_header(hints: List[Dict[str, str]]) -> str:
+    """
+    Header Link untuk media soal yang sedang dibuka: CDN/proxy yang mendukung
+    (mis. Cloudflare, nginx early_hints) meneruskannya sebagai 103 Early Hints.
+    """
+    parts = []
+    for hint in hints:
+        if hint["rel"] != "preload":
+            continue
+        attrs = [f"<{hint['href']}>", "rel=preload", f"as={hint['as']}"]
+        for key in ("imagesrcset", "imagesizes", "type"):
+            if key in hint:
+                attrs.append(f'{key}="{hint[key]}"')
+        parts.append("; ".join(attrs))
+    return ", ".join(parts)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+
+from .models import ArchivedAttempt, Attempt, Package, PackageRankEntry, PackageScoreBucket
+
+
+# Ranking hanya dari attempt TRYOUT yang SUBMITTED; satu peserta = skor terbaiknya.
+# Rank dihitung dari histogram skor (PackageScoreBucket): jumlah baris <= jumlah nilai
+# skor berbeda, dan dibaca lewat index (package, score), bukan ORDER BY semua attempt.
+
+
+@dataclass
+class RankInfo:
+    rank: int
+    total: int
+    percentile: float  # % peserta dengan skor <= skor ini
+
+
+def _counts_ranked(attempt) -> bool:
+    return attempt.mode == Attempt.Mode.TRYOUT and attempt.status == Attempt.Status.SUBMITTED
+
+
+def _bump_bucket(package_id: int, score: int, delta: int):
+    if delta > 0:
+        PackageScoreBucket.objects.bulk_create(
+            [PackageScoreBucket(package_id=package_id, score=score, count=0)], ignore_conflicts=True
+        )
+    PackageScoreBucket.objects.filter(package_id=package_id, score=score).update(count=F("count") + delta)
+
+
+def record_submission(attempt: Attempt) -> Optional[PackageRankEntry]:
+    """
+    Update leaderboard setelah attempt di-submit (dipanggil sesudah skor disimpan).
+    Histogram hanya berubah kalau skor terbaik user naik.
+    """
+    if not _counts_ranked(attempt):
+        return None
+
+    with transaction.atomic():
+        PackageRankEntry.objects.bulk_create(
+            [PackageRankEntry(package_id=attempt.package_id, user_id=attempt.user_id, best_attempt_id=None)],
+            ignore_conflicts=True,
+        )
+        entry = PackageRankEntry.objects.select_for_update().get(
+            package_id=attempt.package_id, user_id=attempt.user_id
+        )
+        if entry.best_attempt_id is None:
+            _bump_bucket(attempt.package_id, attempt.score, +1)
+        elif attempt.score > entry.best_score:
+            _bump_bucket(attempt.package_id, entry.best_score, -1)
+            _bump_bucket(attempt.package_id, attempt.score, +1)
+        else:
+            return entry
+
+        entry.best_score = attempt.score
+        entry.best_attempt_id = attempt.id
+        entry.achieved_at = attempt.submitted_at
+        entry.save(update_fields=["best_score", "best_attempt_id", "achieved_at"])
+    return entry
+
+
+def rank_for_score(package_id: int, score: int) -> RankInfo:
+    """Posisi skor ini di antara skor terbaik semua peserta paket (satu query)."""
+    agg = PackageScoreBucket.objects.filter(package_id=package_id).aggregate(
+        total=Sum("count"), above=Sum("count", filter=Q(score__gt=score))
+    )
+    total = agg["total"] or 0
+    above = agg["above"] or 0
+    if not total:
+        return RankInfo(rank=1, total=0, percentile=0.0)
+    return RankInfo(rank=above + 1, total=total, percentile=round(100.0 * (total - above) / total, 1))
+
+
+def rank_for_attempt(attempt) -> Optional[RankInfo]:
+    if not _counts_ranked(attempt):
+        return None
+    return rank_for_score(attempt.package_id, attempt.score)
+
+
+def rank_for_user(user, package: Package) -> Optional[RankInfo]:
+    entry = PackageRankEntry.objects.filter(package=package, user=user).only("best_score").first()
+    if entry is None:
+        return None
+    return rank_for_score(package.id, entry.best_score)
+
+
+def top_n(package: Package, n: int = 10) -> List[PackageRankEntry]:
+    """Leaderboard: skor tertinggi dulu, seri -> yang lebih dulu mencapainya."""
+    return list(
+        PackageRankEntry.objects.filter(package=package)
+        .select_related("user")
+        .order_by("-best_score", "achieved_at", "id")[:n]
+    )
+
+
+def rebuild_rankings(package_ids: Optional[Iterable[int]] = None, chunk_size: int = 2000) -> Dict[int, int]:
+    """
+    Hitung ulang leaderboard & histogram dari data historis (tabel aktif + arsip).
+    Return package_id -> jumlah peserta.
+    """
+    if package_ids is None:
+        package_ids = Package.objects.values_list("id", flat=True)
+
+    result: Dict[int, int] = {}
+    for package_id in list(package_ids):
+        best: Dict[int, tuple] = {}  # user_id -> (score, submitted_at, attempt_id)
+        for model in (Attempt, ArchivedAttempt):
+            rows = (
+                model.objects.filter(
+                    package_id=package_id, mode=Attempt.Mode.TRYOUT, status=Attempt.Status.SUBMITTED
+                )
+                .values_list("user_id", "score", "submitted_at", "id")
+                .iterator(chunk_size=chunk_size)
+            )
+            for user_id, score, submitted_at, attempt_id in rows:
+                cur = best.get(user_id)
+                if (
+                    cur is None
+                    or score > cur[0]
+                    or (score == cur[0] and submitted_at and (cur[1] is None or submitted_at < cur[1]))
+                ):
+                    best[user_id] = (score, submitted_at, attempt_id)
+
+        buckets: Dict[int, int] = {}
+        for score, _, _ in best.values():
+            buckets[score] = buckets.get(score, 0) + 1
+
+        with transaction.atomic():
+            PackageRankEntry.objects.filter(package_id=package_id).delete()
+            PackageScoreBucket.objects.filter(package_id=package_id).delete()
+            PackageRankEntry.objects.bulk_create(
+                [
+                    PackageRankEntry(
+                        package_id=package_id, user_id=user_id,
+                        best_score=score, best_attempt_id=attempt_id, achieved_at=submitted_at,
+                    )
+                    for user_id, (score, submitted_at, attempt_id) in best.items()
+                ],
+                batch_size=chunk_size,
+            )
+            PackageScoreBucket.objects.bulk_create(
+                [PackageScoreBucket(package_id=package_id, score=s, count=c) for s, c in buckets.items()]
+            )
+        result[package_id] = len(best)
+    return result
@@ -0,0 +1,116 @@
+from __future__ import annotations
+import random
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Count
+
+from .models import Package, Question, SamplingRule
+
+
+# batas tingkat kesukaran dari p-value (proporsi benar): >= EASY mudah, < HARD sulit
+EASY_P = 0.7
+HARD_P = 0.3
+
+
+def _stratum(p: Optional[float]) -> str:
+    if p is None:
+        return "unknown"
+    if p >= EASY_P:
+        return "easy"
+    if p < HARD_P:
+        return "hard"
+    return "medium"
+
+
+def _allocate(sizes: Dict[str, int], count: int) -> Dict[str, int]:
+    """Bagi `count` secara proporsional ke tiap strata (largest remainder)."""
+    total = sum(sizes.values())
+    quotas = {k: count * n / total for k, n in sizes.items()}
+    alloc = {k: min(sizes[k], int(q)) for k, q in quotas.items()}
+    rest = count - sum(alloc.values())
+    for k in sorted(quotas, key=lambda k: quotas[k] - int(quotas[k]), reverse=True):
+        if rest <= 0:
+            break
+        if alloc[k] < sizes[k]:
+            alloc[k] += 1
+            rest -= 1
+    return alloc
+
+
+def _draw(rng: random.Random, pool: List[Tuple[int, Optional[float]]], count: int, stratify: bool) -> List[int]:
+    if count >= len(pool):
+        return [qid for qid, _ in pool]
+    if not stratify:
+        return [qid for qid, _ in rng.sample(pool, count)]
+
+    strata: Dict[str, List[int]] = {}
+    for qid, p in pool:
+        strata.setdefault(_stratum(p), []).append(qid)
+    drawn: List[int] = []
+    for key, n in _allocate({k: len(v) for k, v in strata.items()}, count).items():
+        drawn.extend(rng.sample(strata[key], n))
+    return drawn
+
+
+def _rule_order(rules: List[SamplingRule]) -> List[SamplingRule]:
+    # aturan per section dulu, baru aturan "semua soal" mengambil dari sisanya
+    return sorted(rules, key=lambda r: (r.section_id is None, r.order_index, r.id))
+
+
+def draw_questions(package: Package, seed: int) -> Optional[List[int]]:
+    """
+    Ambil soal untuk attempt baru sesuai SamplingRule paket.
+    Return list id soal (urut kanonik order_index, id), atau None kalau paket
+    tidak punya aturan (attempt mengerjakan semua soal aktif).
+    Satu query untuk aturan + satu query (id, section, p-value) untuk seluruh bank.
+    """
+    rules = list(SamplingRule.objects.filter(package=package))
+    if not rules:
+        return None
+
+    bank = list(
+        Question.objects.filter(package=package, is_active=True)
+        .order_by("order_index", "id")
+        .values_list("id", "section_id", "stats__difficulty")
+    )
+    rank = {qid: i for i, (qid, _, _) in enumerate(bank)}
+
+    rng = random.Random(seed)
+    taken = set()
+    for rule in _rule_order(rules):
+        pool = [
+            (qid, p) for qid, section_id, p in bank
+            if qid not in taken and (rule.section_id is None or section_id == rule.section_id)
+        ]
+        taken.update(_draw(rng, pool, rule.count, rule.stratify_by_difficulty))
+
+    return sorted(taken, key=rank.__getitem__)
+
+
+def exam_size(package: Package) -> int:
+    """
+    Jumlah soal yang dikerjakan per attempt (untuk halaman detail/start).
+    Sama dengan hasil draw_questions: tiap aturan dapat min(count, soal aktif yang tersisa
+    di section-nya), jadi section yang soalnya kurang tidak ikut menggelembungkan total.
+    """
+    rules = list(package.sampling_rules.all())
+    if not rules:
+        return package.question_count
+
+    available = dict(
+        Question.objects.filter(package=package, is_active=True)
+        .values_list("section_id")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    size = 0
+    for rule in _rule_order(rules):
+        if rule.section_id is None:
+            # aturan "semua soal" datang terakhir: ambil dari sisa seluruh section
+            take = min(rule.count, sum(available.values()))
+            available = {None: sum(available.values()) - take}
+        else:
+            take = min(rule.count, available.get(rule.section_id, 0))
+            available[rule.section_id] = available.get(rule.section_id, 0) - take
+        size += take
+    return size
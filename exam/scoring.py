@@ -1,8 +1,8 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, List, Set, Tuple
+from typing import Any, Dict, List, Set, Tuple
 
-from .models import Attempt, AttemptAnswer, Choice, Question
+from .models import Question
 
 
 @dataclass
@@ -17,7 +17,7 @@ def _set_equals(a: Set[int], b: Set[int]) -> bool:
     return a == b
 
 
-def score_attempt(attempt: Attempt) -> ScoreBreakdown:
+def score_answers(manifest: Dict[str, Any], answers: Dict[int, Dict[str, Any]]) -> ScoreBreakdown:
     """
     Rules (MVP, bisa kamu ubah nanti):
     - SINGLE / TRUE_FALSE:
@@ -30,42 +30,31 @@ def score_attempt(attempt: Attempt) -> ScoreBreakdown:
         skor = sum(points pilihan yang dipilih)
         max per soal = sum(points pilihan benar) (atau bisa aturan lain)
     """
-    questions: List[Question] = list(
-        Question.objects.filter(package=attempt.package, is_active=True).prefetch_related("choices")
-        .order_by("order_index", "id")
-    )
-
-    answers = (
-        AttemptAnswer.objects.filter(attempt=attempt, question__in=questions)
-        .prefetch_related("choices")
-    )
-    ans_map: Dict[int, AttemptAnswer] = {a.question_id: a for a in answers}
-
     total_score = 0
     max_score = 0
     per_question: Dict[int, int] = {}
     per_question_max: Dict[int, int] = {}
 
-    for q in questions:
-        a = ans_map.get(q.id)
-        selected_ids: Set[int] = set(a.choices.values_list("id", flat=True)) if a else set()
+    for q in manifest["questions"]:
+        a = answers.get(q["id"])
+        selected_ids: Set[int] = set(a["choices"]) if a else set()
 
-        choices: List[Choice] = list(q.choices.all())
-        correct_ids = {c.id for c in choices if c.is_correct}
+        choices: List[Dict[str, Any]] = q["choices"]
+        correct_ids = {c["id"] for c in choices if c["is_correct"]}
 
-        if q.answer_type in (Question.AnswerType.SINGLE, Question.AnswerType.TRUE_FALSE):
+        if q["answer_type"] in (Question.AnswerType.SINGLE, Question.AnswerType.TRUE_FALSE):
             # treat as single
             q_max = 1
             q_score = 1 if (len(selected_ids) == 1 and next(iter(selected_ids)) in correct_ids) else 0
 
-        elif q.answer_type == Question.AnswerType.MULTI:
+        elif q["answer_type"] == Question.AnswerType.MULTI:
             q_max = 1
             q_score = 1 if _set_equals(selected_ids, correct_ids) and len(correct_ids) > 0 else 0
 
-        elif q.answer_type == Question.AnswerType.WEIGHTED:
+        elif q["answer_type"] == Question.AnswerType.WEIGHTED:
             # sum points of selected
-            selected_points = sum(c.points for c in choices if c.id in selected_ids)
-            correct_points = sum(c.points for c in choices if c.is_correct)
+            selected_points = sum(c["points"] for c in choices if c["id"] in selected_ids)
+            correct_points = sum(c["points"] for c in choices if c["is_correct"])
             q_score = int(selected_points)
             q_max = int(correct_points)
 
@@ -74,10 +63,10 @@ def score_attempt(attempt: Attempt) -> ScoreBreakdown:
             q_max = 1
             q_score = 1 if (len(selected_ids) == 1 and next(iter(selected_ids)) in correct_ids) else 0
 
-        per_question[q.id] = q_score
+        per_question[q["id"]] = q_score
         total_score += q_score
         max_score += q_max
-        per_question_max[q.id] = q_max
+        per_question_max[q["id"]] = q_max
 
     return ScoreBreakdown(
         total_score=total_score,
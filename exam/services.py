@@ -1,15 +1,31 @@
 from __future__ import annotations
+import time
 from dataclasses import dataclass
+from typing import List, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
 from django.utils import timezone
 from .models import Attempt
 
 
+ATTEMPT_TOKEN_SALT = "exam.attempt-token"
+# status attempt + content_version package untuk heartbeat TRYOUT (jalur tanpa query)
+ATTEMPT_STATE_CACHE_KEY = "exam:attempt-state:{}"
+
+
 @dataclass
 class AttemptTimeInfo:
     remaining_seconds: int
     is_expired: bool
 
 
+def _time_info(duration_seconds: int, elapsed: int) -> AttemptTimeInfo:
+    remaining = max(0, int(duration_seconds) - elapsed)
+    return AttemptTimeInfo(remaining_seconds=remaining, is_expired=(remaining <= 0))
+
+
 def get_remaining_seconds(attempt: Attempt) -> AttemptTimeInfo:
     """
     TRYOUT: strict -> remaining = duration - (now - started_at)
@@ -20,5 +36,125 @@ def get_remaining_seconds(attempt: Attempt) -> AttemptTimeInfo:
     else:
         elapsed = int(attempt.elapsed_seconds)
 
-    remaining = max(0, int(attempt.duration_seconds) - elapsed)
-    return AttemptTimeInfo(remaining_seconds=remaining, is_expired=(remaining <= 0))
+    return _time_info(attempt.duration_seconds, elapsed)
+
+
+@dataclass
+class AttemptClaims:
+    """
+    Isi token attempt yang sudah diverifikasi (HMAC).
+    Cukup untuk otorisasi + hitung sisa waktu TRYOUT tanpa query DB.
+    """
+    attempt_id: int
+    user_id: int
+    package_id: int
+    content_version: int
+    mode: str
+    started_at: float  # epoch seconds
+    duration_seconds: int
+    # urutan soal/pilihan (lihat exam/ordering.py); default untuk token lama
+    question_order: str = "FIXED"
+    shuffle_choices: bool = False
+    shuffle_seed: int = 0
+    # soal hasil sampling; tidak ikut di token (bisa panjang), diisi dari DB oleh caller
+    drawn_questions: Optional[List[int]] = None
+
+    @property
+    def deadline(self) -> float:
+        # batas akhir TRYOUT (epoch seconds)
+        return self.started_at + self.duration_seconds
+
+    def time_info(self) -> AttemptTimeInfo:
+        # hanya valid untuk TRYOUT; LEARN butuh elapsed_seconds dari DB
+        return _time_info(self.duration_seconds, int(time.time() - self.started_at))
+
+
+def claims_for_attempt(attempt: Attempt) -> AttemptClaims:
+    return AttemptClaims(
+        attempt_id=attempt.id,
+        user_id=attempt.user_id,
+        package_id=attempt.package_id,
+        content_version=attempt.package.content_version,
+        mode=attempt.mode,
+        started_at=attempt.started_at.timestamp(),
+        duration_seconds=int(attempt.duration_seconds),
+        question_order=attempt.question_order,
+        shuffle_choices=attempt.shuffle_choices,
+        shuffle_seed=attempt.shuffle_seed,
+        drawn_questions=attempt.drawn_questions,
+    )
+
+
+def issue_attempt_token(attempt: Attempt) -> str:
+    c = claims_for_attempt(attempt)
+    payload = {
+        "a": c.attempt_id,
+        "u": c.user_id,
+        "p": c.package_id,
+        "v": c.content_version,
+        "m": c.mode,
+        "s": c.started_at,
+        "d": c.duration_seconds,
+    }
+    if c.shuffle_seed:
+        payload.update({"qo": c.question_order, "sc": c.shuffle_choices, "r": c.shuffle_seed})
+    return signing.dumps(payload, salt=ATTEMPT_TOKEN_SALT, compress=True)
+
+
+def read_attempt_token(token: Optional[str], attempt_id: int) -> Optional[AttemptClaims]:
+    """
+    Return AttemptClaims jika token valid, belum kadaluarsa, dan milik attempt_id.
+    Return None selain itu (caller fallback ke jalur DB/session).
+    """
+    if not token:
+        return None
+    try:
+        data = signing.loads(
+            token,
+            salt=ATTEMPT_TOKEN_SALT,
+            max_age=getattr(settings, "ATTEMPT_TOKEN_MAX_AGE", 6 * 60 * 60),
+        )
+    except signing.BadSignature:
+        return None
+
+    if data.get("a") != attempt_id:
+        return None
+
+    return AttemptClaims(
+        attempt_id=data["a"],
+        user_id=data["u"],
+        package_id=data["p"],
+        content_version=data["v"],
+        mode=data["m"],
+        started_at=data["s"],
+        duration_seconds=data["d"],
+        question_order=data.get("qo", "FIXED"),
+        shuffle_choices=data.get("sc", False),
+        shuffle_seed=data.get("r", 0),
+    )
+
+
+def attempt_state(attempt_id: int) -> Optional[dict]:
+    """
+    {"status", "content_version"} attempt dari cache (ATTEMPT_STATE_CACHE_SECONDS), None kalau
+    attempt tidak ada lagi (sudah diarsip / dihapus). Dipakai heartbeat TRYOUT supaya token
+    dari attempt yang sudah di-submit atau dari versi isi lama tidak terus dilayani.
+    Transisi keluar dari IN_PROGRESS memanggil forget_attempt_state, jadi cache tidak tertinggal;
+    content_version cukup mengikuti TTL.
+    """
+    key = ATTEMPT_STATE_CACHE_KEY.format(attempt_id)
+    state = cache.get(key)
+    if state is None:
+        row = (
+            Attempt.objects.filter(id=attempt_id)
+            .values_list("status", "package__content_version")
+            .first()
+        )
+        # attempt hilang di-cache juga (status None) supaya tidak di-query tiap heartbeat
+        state = {"status": row[0] if row else None, "content_version": row[1] if row else None}
+        cache.set(key, state, getattr(settings, "ATTEMPT_STATE_CACHE_SECONDS", 15))
+    return state if state["status"] is not None else None
+
+
+def forget_attempt_state(*attempt_ids: int):
+    cache.delete_many([ATTEMPT_STATE_CACHE_KEY.format(i) for i in attempt_ids])
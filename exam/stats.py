@@ -0,0 +1,80 @@
+from __future__ import annotations
+from typing import Dict, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+
+from .models import ArchivedAttempt, Attempt, Package, UserPackageStats
+
+
+def record_user_submission(attempt: Attempt) -> UserPackageStats:
+    """
+    Tambahkan attempt yang baru SUBMITTED ke UserPackageStats.
+    Panggil di dalam transaksi yang sama dengan attempt.save() saat submit.
+    """
+    with transaction.atomic():
+        UserPackageStats.objects.bulk_create(
+            [UserPackageStats(user_id=attempt.user_id, package_id=attempt.package_id)], ignore_conflicts=True
+        )
+        st = UserPackageStats.objects.select_for_update().get(user_id=attempt.user_id, package_id=attempt.package_id)
+        st.attempt_count += 1
+        st.score_sum += attempt.score
+        if st.best_score is None or attempt.score > st.best_score:
+            st.best_score = attempt.score
+        if attempt.submitted_at and (st.last_submitted_at is None or attempt.submitted_at > st.last_submitted_at):
+            st.last_submitted_at = attempt.submitted_at
+        st.save(update_fields=["attempt_count", "score_sum", "best_score", "last_submitted_at"])
+    return st
+
+
+def user_package_stats(user, package: Package) -> Optional[UserPackageStats]:
+    return UserPackageStats.objects.filter(user=user, package=package).first()
+
+
+def user_average_score(user) -> float:
+    agg = UserPackageStats.objects.filter(user=user).aggregate(n=Sum("attempt_count"), s=Sum("score_sum"))
+    return (agg["s"] / agg["n"]) if agg["n"] else 0
+
+
+def rebuild_user_package_stats(package_ids=None) -> int:
+    """
+    Hitung ulang UserPackageStats dari attempt SUBMITTED (tabel aktif + arsip),
+    satu query GROUP BY per tabel. Return jumlah baris.
+    """
+    merged: Dict[Tuple[int, int], dict] = {}
+    for model in (Attempt, ArchivedAttempt):
+        qs = model.objects.filter(status=Attempt.Status.SUBMITTED)
+        if package_ids is not None:
+            qs = qs.filter(package_id__in=package_ids)
+        rows = (
+            qs.order_by()
+            .values("user_id", "package_id")
+            .annotate(n=Count("id"), s=Sum("score"), best=Max("score"), last=Max("submitted_at"))
+        )
+        for r in rows:
+            cur = merged.setdefault(
+                (r["user_id"], r["package_id"]), {"n": 0, "s": 0, "best": None, "last": None}
+            )
+            cur["n"] += r["n"]
+            cur["s"] += r["s"] or 0
+            if cur["best"] is None or r["best"] > cur["best"]:
+                cur["best"] = r["best"]
+            if r["last"] and (cur["last"] is None or r["last"] > cur["last"]):
+                cur["last"] = r["last"]
+
+    with transaction.atomic():
+        existing = UserPackageStats.objects.all()
+        if package_ids is not None:
+            existing = existing.filter(package_id__in=package_ids)
+        existing.delete()
+        UserPackageStats.objects.bulk_create(
+            [
+                UserPackageStats(
+                    user_id=user_id, package_id=package_id,
+                    attempt_count=v["n"], score_sum=v["s"], best_score=v["best"], last_submitted_at=v["last"],
+                )
+                for (user_id, package_id), v in merged.items()
+            ],
+            batch_size=1000,
+        )
+    return len(merged)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+from datetime import timedelta
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .answers import load_answers_bulk
+from .manifest import get_attempt_manifest
+from .models import Attempt
+from .ranking import record_submission
+from .scoring import score_answers
+from .services import forget_attempt_state
+from .stats import record_user_submission
+
+
+# Submit dua tahap: request cukup menandai attempt SUBMITTING (satu UPDATE),
+# skor dihitung worker (manage.py process_submissions) per batch.
+# EXAM_SUBMIT_ASYNC = False -> langsung dihitung di request seperti dulu.
+
+
+def submit_async() -> bool:
+    return getattr(settings, "EXAM_SUBMIT_ASYNC", False)
+
+
+def request_submit(attempt: Attempt) -> bool:
+    """
+    IN_PROGRESS -> SUBMITTING. submitted_at = waktu user submit (bukan waktu dinilai).
+    Return False kalau attempt sudah tidak IN_PROGRESS (double submit, tab lain).
+    """
+    now = timezone.now()
+    updated = Attempt.objects.filter(id=attempt.id, status=Attempt.Status.IN_PROGRESS).update(
+        status=Attempt.Status.SUBMITTING, submitted_at=now
+    )
+    if updated:
+        attempt.status = Attempt.Status.SUBMITTING
+        attempt.submitted_at = now
+        forget_attempt_state(attempt.id)
+    return bool(updated)
+
+
+def _finalize(attempts: List[Attempt], answers: Dict[int, dict]) -> int:
+    """Nilai & tutup attempt SUBMITTING. Dipanggil di dalam transaksi. Return jumlah yang selesai."""
+    done = 0
+    for attempt in attempts:
+        breakdown = score_answers(get_attempt_manifest(attempt), answers.get(attempt.id, {}))
+        # UPDATE bersyarat: kalau worker lain sudah menutupnya, jangan hitung statistik dua kali
+        now = timezone.now()
+        updated = Attempt.objects.filter(id=attempt.id, status=Attempt.Status.SUBMITTING).update(
+            status=Attempt.Status.SUBMITTED, score=breakdown.total_score, max_score=breakdown.max_score,
+            finalized_at=now,
+        )
+        if not updated:
+            continue
+        attempt.status = Attempt.Status.SUBMITTED
+        attempt.finalized_at = now
+        attempt.score = breakdown.total_score
+        attempt.max_score = breakdown.max_score
+        record_user_submission(attempt)
+        record_submission(attempt)
+        done += 1
+    return done
+
+
+def finalize_attempt(attempt: Attempt) -> bool:
+    """Nilai satu attempt SUBMITTING sekarang juga (mode sync / fallback halaman hasil)."""
+    with transaction.atomic():
+        return bool(_finalize([attempt], load_answers_bulk([attempt.id])))
+
+
+def submit_attempt(attempt: Attempt) -> bool:
+    """Submit dari request: tandai SUBMITTING, lalu nilai langsung kalau tidak async."""
+    if not request_submit(attempt):
+        return False
+    if not submit_async():
+        finalize_attempt(attempt)
+    return True
+
+
+def process_pending(batch_size: int = 200) -> int:
+    """
+    Ambil satu batch attempt SUBMITTING (yang paling lama menunggu dulu) dan nilai
+    dalam satu transaksi. Di Postgres baris dikunci dengan SKIP LOCKED supaya beberapa
+    worker bisa jalan paralel tanpa rebutan; di SQLite penulisan memang serial.
+    """
+    with transaction.atomic():
+        qs = Attempt.objects.filter(status=Attempt.Status.SUBMITTING).select_related("package")
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True, of=("self",))
+        batch = list(qs.order_by("submitted_at", "id")[:batch_size])
+        if not batch:
+            return 0
+        return _finalize(batch, load_answers_bulk([a.id for a in batch]))
+
+
+def stale_submission(attempt: Attempt) -> bool:
+    """True kalau attempt sudah terlalu lama SUBMITTING (worker mati/tidak jalan)."""
+    if attempt.status != Attempt.Status.SUBMITTING or attempt.submitted_at is None:
+        return False
+    wait = timedelta(seconds=getattr(settings, "EXAM_SUBMIT_FALLBACK_SECONDS", 30))
+    return timezone.now() - attempt.submitted_at > wait
+
+
+def expire_overdue() -> int:
+    """
+    TRYOUT yang waktunya habis tapi tidak pernah di-submit (tab ditutup) ikut dinilai:
+    ditandai SUBMITTING dengan submitted_at = deadline. Ditunggu dulu selama
+    ATTEMPT_SYNC_GRACE_SECONDS supaya journal offline yang telat masih bisa masuk.
+    """
+    grace = timedelta(seconds=getattr(settings, "ATTEMPT_SYNC_GRACE_SECONDS", 60))
+    now = timezone.now()
+    rows = Attempt.objects.filter(
+        status=Attempt.Status.IN_PROGRESS, mode=Attempt.Mode.TRYOUT, started_at__lt=now - grace
+    ).values_list("id", "started_at", "duration_seconds")
+
+    expired = 0
+    for attempt_id, started_at, duration in rows:
+        deadline = started_at + timedelta(seconds=duration)
+        if deadline + grace > now:
+            continue
+        if Attempt.objects.filter(id=attempt_id, status=Attempt.Status.IN_PROGRESS).update(
+            status=Attempt.Status.SUBMITTING, submitted_at=deadline
+        ):
+            forget_attempt_state(attempt_id)
+            expired += 1
+
+    if expired and not submit_async():
+        while process_pending():
+            pass
+    return expired
@@ -0,0 +1,256 @@
+from __future__ import annotations
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .answers import choice_slots, load_answers, pack_choice_ids, packed_storage
+from .models import AttemptAnswer, Question
+
+
+# journal offline bisa panjang; tetap dibatasi per request (client kirim bertahap)
+MAX_CHANGES_PER_SYNC = 1000
+
+
+class SyncError(ValueError):
+    pass
+
+
+@dataclass
+class AnswerChange:
+    question_id: int
+    client_seq: int
+    choice_ids: Optional[List[int]] = None  # None = pilihan tidak diubah
+    flagged: Optional[bool] = None          # None = flag tidak diubah
+    client_ts: Optional[float] = None       # waktu perubahan di client (epoch ms), untuk journal offline
+
+
+@dataclass
+class SyncWindow:
+    """
+    Batas waktu untuk journal offline.
+    clock_offset: server_time - client_time (detik), dari sent_at pada request.
+    start/end: jendela attempt (epoch seconds); end None = tanpa batas (LEARN).
+    now: jam server saat batch diterima.
+    """
+    clock_offset: float
+    start: float
+    end: Optional[float] = None
+    now: float = field(default_factory=time.time)
+
+    def server_time(self, client_ts_ms: Optional[float]) -> float:
+        """
+        Waktu perubahan menurut jam server. Tanpa client_ts = waktu batch diterima;
+        client_ts tidak boleh lebih baru dari waktu server (jam client maju).
+        """
+        if client_ts_ms is None:
+            return self.now
+        return min(client_ts_ms / 1000.0 + self.clock_offset, self.now)
+
+    def contains(self, ts: float) -> bool:
+        return ts >= self.start and (self.end is None or ts <= self.end)
+
+
+def parse_changes(raw: Any) -> List[AnswerChange]:
+    """
+    Validasi payload client: list of {question_id, client_seq, choice_ids?, flagged?}.
+    Raises SyncError kalau formatnya salah.
+    """
+    if not isinstance(raw, list):
+        raise SyncError("changes must be a list")
+    if len(raw) > MAX_CHANGES_PER_SYNC:
+        raise SyncError(f"Too many changes (max {MAX_CHANGES_PER_SYNC})")
+
+    changes: List[AnswerChange] = []
+    for item in raw:
+        if not isinstance(item, dict):
+            raise SyncError("change must be an object")
+        try:
+            change = AnswerChange(
+                question_id=int(item["question_id"]),
+                client_seq=int(item["client_seq"]),
+            )
+            if item.get("choice_ids") is not None:
+                change.choice_ids = [int(x) for x in item["choice_ids"]]
+            if item.get("flagged") is not None:
+                change.flagged = bool(item["flagged"])
+            if item.get("client_ts") is not None:
+                change.client_ts = float(item["client_ts"])
+        except (KeyError, TypeError, ValueError):
+            raise SyncError(f"Invalid change: {item!r}")
+        if change.client_seq <= 0:
+            raise SyncError("client_seq must be positive")
+        changes.append(change)
+    return changes
+
+
+def _collapse(changes: List[AnswerChange]) -> Dict[int, AnswerChange]:
+    """
+    Gabungkan beberapa perubahan untuk soal yang sama (urut client_seq),
+    field yang terakhir menang.
+    """
+    merged: Dict[int, AnswerChange] = {}
+    for ch in sorted(changes, key=lambda c: c.client_seq):
+        cur = merged.get(ch.question_id)
+        if cur is None:
+            merged[ch.question_id] = AnswerChange(
+                ch.question_id, ch.client_seq, ch.choice_ids, ch.flagged, ch.client_ts
+            )
+            continue
+        cur.client_seq = ch.client_seq
+        if ch.choice_ids is not None:
+            cur.choice_ids = ch.choice_ids
+        if ch.flagged is not None:
+            cur.flagged = ch.flagged
+        if ch.client_ts is not None:
+            cur.client_ts = ch.client_ts
+    return merged
+
+
+def answer_state(attempt_id: int, question_ids, choice_order: Optional[Dict[int, List[int]]] = None) -> Dict[str, Dict[str, Any]]:
+    """State jawaban untuk client (key = str(question_id))."""
+    question_ids = list(question_ids)
+    if choice_order is None:
+        choice_order = choice_slots(question_ids)
+    state = load_answers(attempt_id, choice_order, question_ids)
+    return {str(qid): st for qid, st in state.items()}
+
+
+def _ack(changes: List[AnswerChange], rejected: Dict[str, str]) -> int:
+    """Seq terbesar sebelum perubahan pertama yang ditolak (rejected: key str(client_seq))."""
+    ack = 0
+    for ch in sorted(changes, key=lambda c: c.client_seq):
+        if str(ch.client_seq) in rejected:
+            break
+        ack = ch.client_seq
+    return ack
+
+
+def apply_answer_changes(
+    attempt_id: int,
+    package_id: int,
+    changes: List[AnswerChange],
+    window: Optional[SyncWindow] = None,
+    allowed_ids: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """
+    Terapkan banyak perubahan jawaban sekaligus dalam satu transaksi.
+
+    - Perubahan dengan client_seq <= client_seq tersimpan diabaikan (idempotent,
+      aman di-retry / dikirim ulang).
+    - Pilihan disimpan sebagai choice_mask; di mode m2m tabel through juga
+      diganti pakai bulk delete + bulk_create, bukan clear()/add() per soal.
+    - allowed_ids: soal hasil sampling attempt (None = semua soal aktif paket).
+    - Dengan window (journal offline): client_ts dinormalisasi ke jam server;
+      perubahan di luar jendela attempt ditolak, dan perubahan yang lebih tua
+      dari updated_at jawaban di server kalah (last-writer-wins).
+    Return {"applied": [...], "rejected": {str(client_seq): alasan}, "ack": seq, "state": {...}}.
+    ack = seq terbesar yang semua perubahan sampai seq itu diterima (diterapkan atau
+    duplikat); perubahan yang ditolak tidak ikut di-ack, client membuangnya lewat "rejected".
+    rejected per client_seq: beberapa perubahan untuk soal yang sama bisa ditolak dengan alasan berbeda.
+    """
+    rejected: Dict[str, str] = {}
+
+    def reject(ch: AnswerChange, reason: str):
+        rejected[str(ch.client_seq)] = reason
+
+    if window is not None:
+        kept = []
+        for ch in changes:
+            # perubahan tanpa client_ts dihitung pada waktu batch diterima (jam server),
+            # jadi setelah waktu habis hanya perubahan dari journal yang bisa masuk
+            if not window.contains(window.server_time(ch.client_ts)):
+                reject(ch, "outside_window")
+                continue
+            kept.append(ch)
+        accepted = kept
+    else:
+        accepted = changes
+
+    merged = _collapse(accepted)
+    event_time: Dict[int, float] = {}
+    if window is not None:
+        event_time = {
+            qid: window.server_time(ch.client_ts)
+            for qid, ch in merged.items() if ch.client_ts is not None
+        }
+    if not merged:
+        return {"applied": [], "rejected": rejected, "ack": _ack(changes, rejected), "state": {}}
+
+    valid_qids = set(
+        Question.objects.filter(package_id=package_id, is_active=True, id__in=merged.keys())
+        .values_list("id", flat=True)
+    )
+    if allowed_ids is not None:
+        valid_qids &= set(allowed_ids)
+    unknown = set(merged) - valid_qids
+    if unknown:
+        raise SyncError(f"Unknown questions: {sorted(unknown)}")
+
+    choice_order = choice_slots(valid_qids)
+
+    Through = AttemptAnswer.choices.through
+    now = timezone.now()
+
+    with transaction.atomic():
+        AttemptAnswer.objects.bulk_create(
+            [AttemptAnswer(attempt_id=attempt_id, question_id=qid) for qid in valid_qids],
+            ignore_conflicts=True,
+        )
+        answers = list(
+            AttemptAnswer.objects.select_for_update()
+            .filter(attempt_id=attempt_id, question_id__in=valid_qids)
+        )
+
+        to_update: List[AttemptAnswer] = []
+        replace_ids: List[int] = []
+        new_links = []
+        for a in answers:
+            ch = merged[a.question_id]
+            if ch.client_seq <= a.client_seq:
+                continue  # sudah pernah diterapkan
+            ts = event_time.get(a.question_id)
+            touched = a.answered_at is not None or a.flagged
+            if ts is not None and touched and a.updated_at.timestamp() > ts:
+                # server sudah punya perubahan yang lebih baru (mis. dari device lain)
+                for c in accepted:
+                    if c.question_id == a.question_id:
+                        reject(c, "conflict")
+                continue
+
+            a.client_seq = ch.client_seq
+            a.updated_at = now
+            if ch.flagged is not None:
+                a.flagged = ch.flagged
+            if ch.choice_ids is not None:
+                # pilihan dari soal lain diam-diam dibuang (sama seperti autosave)
+                wanted = set(ch.choice_ids)
+                picked = [cid for cid in choice_order[a.question_id] if cid is not None and cid in wanted]
+                a.choice_mask = pack_choice_ids(picked, choice_order[a.question_id])
+                a.answered_at = now if picked else None
+                replace_ids.append(a.id)
+                new_links.extend(Through(attemptanswer_id=a.id, choice_id=cid) for cid in picked)
+            to_update.append(a)
+
+        if replace_ids and not packed_storage():
+            Through.objects.filter(attemptanswer_id__in=replace_ids).delete()
+            Through.objects.bulk_create(new_links)
+        if to_update:
+            AttemptAnswer.objects.bulk_update(
+                to_update, ["client_seq", "updated_at", "flagged", "answered_at", "choice_mask"]
+            )
+
+    return {
+        "applied": sorted(a.question_id for a in to_update),
+        "rejected": rejected,
+        "ack": _ack(changes, rejected),
+        "state": answer_state(attempt_id, valid_qids, choice_order),
+    }
+
+
+def last_client_seq(attempt_id: int) -> int:
+    """Titik resume journal: seq terbesar yang sudah diterima server."""
+    return AttemptAnswer.objects.filter(attempt_id=attempt_id).aggregate(m=Max("client_seq"))["m"] or 0
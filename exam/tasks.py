@@ -0,0 +1,52 @@
+from core.jobs import task
+
+from .audio import generate_audio_derivatives
+from .images import generate_derivatives
+from .item_analysis import refresh_item_stats
+from .media import fetch_media
+from .models import Package
+from .ranking import rebuild_rankings
+from .stats import rebuild_user_package_stats
+from .submission import expire_overdue, process_pending
+
+
+# Job untuk core.jobs (manage.py run_workers). Jadwal periodik: settings.JOBS_PERIODIC.
+
+
+@task("exam.process_submissions")
+def process_submissions(batch_size: int = 200):
+    while process_pending(batch_size=batch_size):
+        pass
+
+
+@task("exam.expire_attempts")
+def expire_attempts():
+    expire_overdue()
+
+
+@task("exam.fetch_media", max_attempts=5)
+def fetch_media_job(model: str, pk: int, field: str, url: str):
+    fetch_media(model, pk, field, url)
+
+
+@task("exam.image_derivatives")
+def image_derivatives(model: str, pk: int, force: bool = False):
+    generate_derivatives(model, pk, force=force)
+
+
+@task("exam.audio_derivatives")
+def audio_derivatives(model: str, pk: int, force: bool = False):
+    generate_audio_derivatives(model, pk, force=force)
+
+
+@task("exam.analyze_items")
+def analyze_items(package_id=None, full: bool = False):
+    packages = Package.objects.all() if package_id is None else Package.objects.filter(id=package_id)
+    for package in packages:
+        refresh_item_stats(package, full=full)
+
+
+@task("exam.rebuild_stats")
+def rebuild_stats(package_ids=None):
+    rebuild_rankings(package_ids)
+    rebuild_user_package_stats(package_ids)
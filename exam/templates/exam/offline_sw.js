@@ -0,0 +1,49 @@
+// Service worker player offline.
+// Halaman player single-page, bundle soal & media: network-first, fallback ke cache
+// supaya attempt tetap bisa dibuka lagi saat koneksi putus.
+// Jawaban TIDAK lewat sini: journal-nya ada di localStorage halaman player.
+const CACHE = "tryout-offline-v1";
+const CACHEABLE = /^\/attempts\/\d+\/(play|bundle)\/$/;
+
+self.addEventListener("install", () => self.skipWaiting());
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    caches.keys()
+      .then(keys => Promise.all(keys.filter(k => k !== CACHE).map(k => caches.delete(k))))
+      .then(() => self.clients.claim())
+  );
+});
+
+self.addEventListener("fetch", (event) => {
+  const req = event.request;
+  const url = new URL(req.url);
+  if (req.method !== "GET" || url.origin !== self.location.origin) return;
+
+  const isMedia = url.pathname.startsWith("{{ media_url }}");
+  if (!CACHEABLE.test(url.pathname) && !isMedia) return;
+
+  // file media tidak pernah ditimpa (nama unik per upload/turunan): cache-first,
+  // jadi media yang sudah di-prefetch tidak diunduh ulang
+  if (isMedia) {
+    event.respondWith(
+      caches.open(CACHE).then(cache => cache.match(req).then(hit => hit || fetch(req).then(res => {
+        if (res.status === 200) cache.put(req, res.clone());
+        return res;
+      })))
+    );
+    return;
+  }
+
+  event.respondWith(
+    fetch(req)
+      .then(res => {
+        if (res.ok) {
+          const copy = res.clone();
+          caches.open(CACHE).then(cache => cache.put(req, copy));
+        }
+        return res;
+      })
+      .catch(() => caches.match(req).then(hit => hit || Response.error()))
+  );
+});
@@ -6,10 +6,15 @@ urlpatterns = [
     path("packages/<slug:slug>/", views.package_detail, name="package_detail"),
     path("packages/<slug:slug>/start/", views.start_attempt, name="start_attempt"),
     path("attempts/<int:attempt_id>/", views.attempt_player, name="attempt_player"),
+    path("attempts/<int:attempt_id>/play/", views.attempt_player_spa, name="attempt_player_spa"),
+    path("attempts/<int:attempt_id>/bundle/", views.attempt_bundle, name="attempt_bundle"),
     path("attempts/<int:attempt_id>/submit/", views.attempt_submit, name="attempt_submit"),
     path("attempts/<int:attempt_id>/result/", views.attempt_result, name="attempt_result"),
+    path("attempts/<int:attempt_id>/status/", views.attempt_status, name="attempt_status"),
     path("attempts/<int:attempt_id>/review/", views.attempt_review, name="attempt_review"),
     path("attempts/<int:attempt_id>/autosave/", views.attempt_autosave, name="attempt_autosave"),
+    path("attempts/<int:attempt_id>/sync/", views.attempt_sync, name="attempt_sync"),
+    path("attempts/sw.js", views.offline_service_worker, name="offline_service_worker"),
     path("packages/<slug:slug>/favorite/", views.toggle_favorite, name="toggle_favorite"),
     path("packages/<slug:slug>/purchase/", views.purchase_package, name="purchase_package"),
     path("packages/<slug:slug>/analysis/", views.package_analysis, name="package_analysis"),
@@ -1,16 +1,38 @@
+import json
+import time
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
-from django.db.models import Q
-from django.http import JsonResponse
+from django.db.models import Count, Max, Q
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.gzip import gzip_page
 from django.contrib import messages
 from django.urls import reverse
 
+from core.db_router import replica_reads
+
+from .answers import choice_order_from_manifest, load_answers, ordinal_slots, set_selection
+from .fragments import question_fragments
+from .archive import get_user_attempt, latest_submitted_attempt
+from .ranking import rank_for_attempt, rank_for_user, top_n
+from .stats import user_package_stats
+from .submission import finalize_attempt, stale_submission, submit_attempt
+from .manifest import bundle_questions, get_attempt_manifest
+from .prefetch import link_header, media_hints, prefetch_ahead, upcoming_hints
+from .ordering import new_shuffle_seed, order_bundle_questions, order_choices, order_questions
+from .sampling import draw_questions, exam_size
 from .models import Attempt, AttemptAnswer, Choice, Package, Question, UserPackage
-from .services import get_remaining_seconds
-from .scoring import score_attempt
+from .services import (
+    attempt_state, claims_for_attempt, get_remaining_seconds, issue_attempt_token, read_attempt_token,
+)
+from .sync import SyncError, SyncWindow, apply_answer_changes, last_client_seq, parse_changes
+from .scoring import score_answers
+
+ATTEMPT_TOKEN_HEADER = "X-Attempt-Token"
 
 def _require_package_access(request, package):
     """
@@ -23,6 +45,122 @@ def _require_package_access(request, package):
             return redirect("package_detail", slug=package.slug)
     return None
 
+
+def _remember_attempt_token(request, attempt):
+    """
+    Terbitkan token attempt dan simpan di session supaya player bisa
+    memakainya untuk autosave/heartbeat.
+    """
+    token = issue_attempt_token(attempt)
+    tokens = request.session.get("attempt_tokens", {})
+    tokens[str(attempt.id)] = token
+    # cukup simpan beberapa attempt terakhir
+    request.session["attempt_tokens"] = dict(list(tokens.items())[-5:])
+    return token
+
+
+def _attempt_token_for(request, attempt):
+    token = request.session.get("attempt_tokens", {}).get(str(attempt.id))
+    claims = read_attempt_token(token, attempt.id)
+    if claims is None or claims.content_version != attempt.package.content_version:
+        token = _remember_attempt_token(request, attempt)
+    return token
+
+
+def _posted_choice_ids(request):
+    ids = []
+    for raw in request.POST.getlist("choice"):
+        try:
+            ids.append(int(raw))
+        except ValueError:
+            continue
+    return ids
+
+
+def _attempt_questions(package_id, drawn_questions, with_choices=False):
+    """
+    Soal (objek Question) yang dikerjakan attempt, urut kanonik: semua soal aktif,
+    atau hanya hasil sampling (urutan mengikuti drawn_questions, sama dengan manifest).
+    """
+    qs = Question.objects.filter(package_id=package_id, is_active=True).order_by("order_index", "id")
+    if with_choices:
+        qs = qs.prefetch_related("choices")
+    if drawn_questions is None:
+        return list(qs)
+    pos = {qid: i for i, qid in enumerate(drawn_questions)}
+    return sorted(qs.filter(id__in=drawn_questions), key=lambda q: pos[q.id])
+
+
+def _answer_counts(attempt):
+    """(total, answered, blank, flagged) untuk halaman submit/result."""
+    manifest = get_attempt_manifest(attempt)
+    answers = load_answers(attempt.id, choice_order_from_manifest(manifest))
+    total = len(manifest["questions"])
+    answered = sum(1 for a in answers.values() if a["choices"])
+    flagged = sum(1 for a in answers.values() if a["flagged"])
+    return total, answered, total - answered, flagged
+
+
+def _attempt_claims(request, attempt_id):
+    return read_attempt_token(request.headers.get(ATTEMPT_TOKEN_HEADER), attempt_id)
+
+
+def _login_required_json():
+    # endpoint JSON (fetch): jangan redirect ke halaman login
+    return JsonResponse({"ok": False, "error": "Login required"}, status=401)
+
+
+def _stale_token_json():
+    # isi package sudah berubah sejak token terbit: player dimuat ulang (token & soal baru)
+    return JsonResponse({"ok": False, "error": "Stale attempt token", "reload": True}, status=409)
+
+
+def _hot_attempt(request, attempt_id, grace_seconds=0):
+    """
+    Otorisasi untuk endpoint tulis jawaban (autosave/sync).
+    Pakai token attempt kalau ada; kalau tidak, fallback ke session + DB.
+    grace_seconds: toleransi setelah waktu TRYOUT habis (journal offline yang telat).
+    Return (claims, current_index, None) atau (None, None, error_response).
+    """
+    claims = _attempt_claims(request, attempt_id)
+    if claims is not None:
+        # Token valid: otorisasi & timer dari token, DB cuma untuk status (+ soal hasil sampling)
+        row = (
+            Attempt.objects.filter(id=claims.attempt_id, status=Attempt.Status.IN_PROGRESS)
+            .values_list("current_index", "drawn_questions", "package__content_version")
+            .first()
+        )
+        if row is None:
+            return None, None, JsonResponse({"ok": False, "error": "Attempt not active"}, status=400)
+        current_index, claims.drawn_questions, content_version = row
+        if content_version != claims.content_version:
+            return None, None, _stale_token_json()
+
+    else:
+        if not request.user.is_authenticated:
+            return None, None, _login_required_json()
+
+        attempt = get_object_or_404(Attempt.objects.select_related("package"), id=attempt_id, user=request.user)
+
+        # 🔒 Access control
+        guard = _require_package_access(request, attempt.package)
+        if guard:
+            return None, None, JsonResponse({"ok": False, "forbidden": True}, status=403)
+
+        if attempt.status != Attempt.Status.IN_PROGRESS:
+            return None, None, JsonResponse({"ok": False, "error": "Attempt not active"}, status=400)
+
+        claims = claims_for_attempt(attempt)
+        current_index = attempt.current_index
+
+    # Strict tryout: kalau habis, kasih sinyal expired
+    if claims.mode == Attempt.Mode.TRYOUT and time.time() >= claims.deadline + grace_seconds:
+        return None, None, JsonResponse({"ok": False, "expired": True}, status=200)
+
+    return claims, current_index, None
+
+
+@replica_reads
 def package_list(request):
     q = request.GET.get("q", "")
     cat = request.GET.get("category", "")
@@ -49,23 +187,25 @@ def package_list(request):
     })
 
 
+@replica_reads
 def package_detail(request, slug):
     package = get_object_or_404(Package.objects.select_related("category").prefetch_related("sections"), slug=slug, is_active=True)
-    q_count = package.questions.filter(is_active=True).count()
+    q_count = exam_size(package)
 
     up = None
     max_score = None
     last_attempt_date = None
+    my_rank = None
 
     if request.user.is_authenticated:
         up = UserPackage.objects.filter(user=request.user, package=package).first()
         
-        # Get attempts stats
-        attempts = Attempt.objects.filter(user=request.user, package=package, status=Attempt.Status.SUBMITTED)
-        if attempts.exists():
-            from django.db.models import Max
-            max_score = attempts.aggregate(Max("score"))["score__max"]
-            last_attempt_date = attempts.latest("submitted_at").submitted_at
+        # Get attempts stats (satu baris ringkasan, sudah termasuk arsip)
+        stats = user_package_stats(request.user, package)
+        if stats:
+            max_score = stats.best_score
+            last_attempt_date = stats.last_submitted_at
+        my_rank = rank_for_user(request.user, package)
 
     return render(request, "exam/package_detail.html", {
         "package": package,
@@ -73,6 +213,8 @@ def package_detail(request, slug):
         "up": up,
         "max_score": max_score,
         "last_attempt_date": last_attempt_date,
+        "my_rank": my_rank,
+        "leaderboard": top_n(package, 10),
     })
 
 
@@ -105,10 +247,13 @@ def start_attempt(request, slug):
     if request.method == "POST":
         action = request.POST.get("action")
         if action == "continue" and existing:
+            existing.package = package
+            _remember_attempt_token(request, existing)
             return redirect("attempt_player", attempt_id=existing.id)
 
         if action == "new":
             duration_seconds = int(package.duration_minutes) * 60
+            seed = new_shuffle_seed()
             attempt = Attempt.objects.create(
                 user=request.user,
                 package=package,
@@ -116,10 +261,15 @@ def start_attempt(request, slug):
                 status=Attempt.Status.IN_PROGRESS,
                 duration_seconds=duration_seconds,
                 current_index=0,
+                question_order=package.question_order,
+                shuffle_choices=package.shuffle_choices,
+                shuffle_seed=seed,
+                drawn_questions=draw_questions(package, seed),
             )
+            _remember_attempt_token(request, attempt)
             return redirect("attempt_player", attempt_id=attempt.id)
 
-    q_count = package.questions.filter(is_active=True).count()
+    q_count = exam_size(package)
     return render(
         request,
         "exam/start_attempt.html",
@@ -145,11 +295,9 @@ def attempt_player(request, attempt_id: int):
     if attempt.status != Attempt.Status.IN_PROGRESS:
         return redirect("attempt_result", attempt_id=attempt.id)
 
-    # get question list
-    questions = list(
-        Question.objects.filter(package=attempt.package, is_active=True)
-        .prefetch_related("choices")
-        .order_by("order_index", "id")
+    # get question list (soal & urutan milik attempt ini)
+    questions = order_questions(
+        attempt, _attempt_questions(attempt.package_id, attempt.drawn_questions, with_choices=True)
     )
     if not questions:
         raise Http404("Paket belum punya soal aktif.")
@@ -185,6 +333,7 @@ def attempt_player(request, attempt_id: int):
 
     # ambil/siapkan AttemptAnswer utk current question
     answer_obj, _ = AttemptAnswer.objects.get_or_create(attempt=attempt, question=current_question)
+    current_choice_ids = ordinal_slots((c.id, c.ordinal) for c in current_question.choices.all())
 
     if request.method == "POST":
         action = request.POST.get("action")  # bisa None kalau user klik jump/nav
@@ -197,21 +346,14 @@ def attempt_player(request, attempt_id: int):
 
         if action == "clear":
             with transaction.atomic():
-                answer_obj.choices.clear()
-                answer_obj.answered_at = None
+                set_selection(answer_obj, [], current_choice_ids)
                 answer_obj.save()
             return redirect(f"{request.path}?q={idx}")
 
         # 2) default: SAVE jawaban sekarang dulu (untuk nav/jump/submit)
-        selected_ids = request.POST.getlist("choice")
+        selected_ids = _posted_choice_ids(request)
         with transaction.atomic():
-            answer_obj.choices.clear()
-            if selected_ids:
-                choices = Choice.objects.filter(question=current_question, id__in=selected_ids)
-                answer_obj.choices.add(*choices)
-                answer_obj.answered_at = timezone.now()
-            else:
-                answer_obj.answered_at = None
+            set_selection(answer_obj, selected_ids, current_choice_ids, now=timezone.now())
             answer_obj.save()
 
         # 3) submit
@@ -245,17 +387,16 @@ def attempt_player(request, attempt_id: int):
     # - flagged: yellow (prioritas di bawah current)
     # - answered: green
     # - else: red
-    answers_map = {
-        a.question_id: a
-        for a in AttemptAnswer.objects.filter(attempt=attempt, question__in=questions).prefetch_related("choices")
-    }
+    answers_map = load_answers(
+        attempt.id, {q.id: ordinal_slots((c.id, c.ordinal) for c in q.choices.all()) for q in questions}
+    )
 
     grid = []
     counts = {"answered": 0, "blank": 0, "flagged": 0, "total": len(questions)}
     for i, q in enumerate(questions):
         a = answers_map.get(q.id)
-        is_answered = bool(a and a.choices.all())
-        is_flagged = bool(a and a.flagged)
+        is_answered = bool(a and a["choices"])
+        is_flagged = bool(a and a["flagged"])
 
         if is_answered:
             counts["answered"] += 1
@@ -275,33 +416,44 @@ def attempt_player(request, attempt_id: int):
 
         grid.append({"num": i + 1, "idx": i, "status": status})
 
-    selected_ids = set(answer_obj.choices.values_list("id", flat=True))
+    current = answers_map.get(current_question.id)
+    selected_ids = set(current["choices"]) if current else set()
     is_multi = current_question.answer_type in (Question.AnswerType.MULTI,)
+    current_choices = order_choices(attempt, current_question.id, list(current_question.choices.all()))
+    # isi soal/pilihan dari cache fragment; status user ditempel di template
+    fragments = question_fragments(attempt.package, [current_question], "player")[current_question.id]
+    for c in current_choices:
+        c.body_html = fragments.choices.get(c.id, "")
+
+    # media soal berikutnya dimuat duluan (dari manifest yang sudah di-cache)
+    manifest_by_id = {entry["id"]: entry for entry in get_attempt_manifest(attempt)["questions"]}
+    entries = [manifest_by_id.get(q.id, {}) for q in questions]
+    prefetch_hints = upcoming_hints(entries, idx, prefetch_ahead(attempt.package))
 
     # Build choices_view (khusus LEARN) supaya template bisa highlight tanpa operasi "in"
     choices_view = None
     if attempt.mode == Attempt.Mode.LEARN:
-        correct_ids = set(current_question.choices.filter(is_correct=True).values_list("id", flat=True))
+        correct_ids = {c.id for c in current_question.choices.all() if c.is_correct}
         choices_view = []
-        for c in current_question.choices.all():
+        for c in current_choices:
             choices_view.append({
                 "id": c.id,
                 "label": c.label,
-                "text": c.text,
-                "image": c.image,
-                "audio": c.audio,
+                "body_html": c.body_html,
                 "points": c.points,
                 "is_selected": c.id in selected_ids,
                 "is_correct": c.id in correct_ids,   # untuk non-weighted
             })
 
-    return render(
+    response = render(
         request,
         "exam/attempt_player.html",
         {
             "attempt": attempt,
             "questions": questions,
             "current_question": current_question,
+            "current_choices": current_choices,
+            "fragments": fragments,
             "idx": idx,
             "grid": grid,
             "counts": counts,
@@ -310,46 +462,124 @@ def attempt_player(request, attempt_id: int):
             "answer_obj": answer_obj,
             "time_info": time_info,
             "choices_view": choices_view,
+            "prefetch_hints": prefetch_hints,
+            "attempt_token": _attempt_token_for(request, attempt),
         },
     )
+    current_link = link_header(media_hints(entries[idx]))
+    if current_link:
+        response["Link"] = current_link
+    return response
 
 
 @login_required
-def attempt_submit(request, attempt_id: int):
-    attempt = get_object_or_404(Attempt, id=attempt_id, user=request.user)
+def attempt_player_spa(request, attempt_id: int):
+    """
+    Player single-page: soal diambil sekali lewat attempt_bundle,
+    navigasi di browser, yang dikirim ke server cuma perubahan jawaban.
+    """
+    attempt = get_object_or_404(Attempt.objects.select_related("package"), id=attempt_id, user=request.user)
 
     # 🔒 Access control
     guard = _require_package_access(request, attempt.package)
     if guard:
         return guard
-    
+
     if attempt.status != Attempt.Status.IN_PROGRESS:
         return redirect("attempt_result", attempt_id=attempt.id)
 
-    questions = list(Question.objects.filter(package=attempt.package, is_active=True).order_by("order_index", "id"))
-    answers = AttemptAnswer.objects.filter(attempt=attempt, question__in=questions).prefetch_related("choices")
+    time_info = get_remaining_seconds(attempt)
+    if attempt.mode == Attempt.Mode.TRYOUT and time_info.is_expired:
+        return redirect("attempt_submit", attempt_id=attempt.id)
 
-    answered = 0
-    blank = 0
-    flagged = 0
-    for a in answers:
-        if a.flagged:
-            flagged += 1
-        if a.choices.exists():
-            answered += 1
+    return render(
+        request,
+        "exam/attempt_player_spa.html",
+        {
+            "attempt": attempt,
+            "time_info": time_info,
+            "attempt_token": _attempt_token_for(request, attempt),
+        },
+    )
 
-    total = len(questions)
-    blank = total - answered
 
-    if request.method == "POST":
-        breakdown = score_attempt(attempt)
+@login_required
+@gzip_page
+def attempt_bundle(request, attempt_id: int):
+    """
+    JSON berisi seluruh soal package + jawaban/flag user saat ini.
+    Bagian soal berasal dari manifest yang di-cache per content_version (+ media_version);
+    ETag = versi package + jejak jawaban, jadi reload tanpa perubahan -> 304.
+    """
+    attempt = get_object_or_404(Attempt.objects.select_related("package"), id=attempt_id, user=request.user)
+
+    # 🔒 Access control
+    guard = _require_package_access(request, attempt.package)
+    if guard:
+        return JsonResponse({"ok": False, "forbidden": True}, status=403)
+
+    package = attempt.package
+    answers_qs = AttemptAnswer.objects.filter(attempt=attempt)
+    stamp = answers_qs.aggregate(n=Count("id"), ts=Max("updated_at"))
+    ts = stamp["ts"].timestamp() if stamp["ts"] else 0
+    etag = f'"{package.id}-{package.content_version}-{package.media_version}-{int(package.prefetch_all_media)}-{attempt.mode}-{stamp["n"]}-{ts:.6f}"'
+
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponse(status=304)
+        response["ETag"] = etag
+        return response
+
+    manifest = get_attempt_manifest(attempt)
+    answers = {
+        str(qid): st
+        for qid, st in load_answers(attempt.id, choice_order_from_manifest(manifest)).items()
+    }
+    time_info = get_remaining_seconds(attempt)
+
+    response = JsonResponse({
+        "ok": True,
+        "attempt": {
+            "id": attempt.id,
+            "mode": attempt.mode,
+            "status": attempt.status,
+            "current_index": attempt.current_index,
+            "remaining_seconds": time_info.remaining_seconds,
+            "expired": time_info.is_expired,
+        },
+        "package": {
+            "id": package.id,
+            "title": package.title,
+            "version": manifest["version"],
+        },
+        "questions": order_bundle_questions(
+            attempt, bundle_questions(manifest, reveal=(attempt.mode == Attempt.Mode.LEARN))
+        ),
+        "answers": answers,
+        # null = muat media semua soal di awal (Package.prefetch_all_media)
+        "prefetch_ahead": prefetch_ahead(package),
+    })
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
 
-        attempt.status = Attempt.Status.SUBMITTED
-        attempt.submitted_at = timezone.now()
-        attempt.score = breakdown.total_score
-        attempt.max_score = breakdown.max_score
-        attempt.save(update_fields=["status", "submitted_at", "score", "max_score"])
+@login_required
+def attempt_submit(request, attempt_id: int):
+    attempt = get_object_or_404(Attempt, id=attempt_id, user=request.user)
+
+    # 🔒 Access control
+    guard = _require_package_access(request, attempt.package)
+    if guard:
+        return guard
+    
+    if attempt.status != Attempt.Status.IN_PROGRESS:
+        return redirect("attempt_result", attempt_id=attempt.id)
+
+    total, answered, blank, flagged = _answer_counts(attempt)
 
+    if request.method == "POST":
+        # skor dihitung worker (EXAM_SUBMIT_ASYNC) atau langsung di sini
+        submit_attempt(attempt)
         return redirect("attempt_result", attempt_id=attempt.id)
 
 
@@ -367,27 +597,26 @@ def attempt_submit(request, attempt_id: int):
 
 
 @login_required
+@replica_reads
 def attempt_result(request, attempt_id: int):
-    attempt = get_object_or_404(Attempt, id=attempt_id, user=request.user)
+    attempt = get_user_attempt(attempt_id, request.user)
 
     # 🔒 Access control
     guard = _require_package_access(request, attempt.package)
     if guard:
         return guard
 
-    questions = list(Question.objects.filter(package=attempt.package, is_active=True).order_by("order_index", "id"))
-    answers = AttemptAnswer.objects.filter(attempt=attempt, question__in=questions).prefetch_related("choices")
+    if attempt.status == Attempt.Status.SUBMITTING:
+        # worker belum sempat menilai; kalau kelamaan, nilai di request ini saja
+        if not (stale_submission(attempt) and finalize_attempt(attempt)):
+            return render(request, "exam/attempt_processing.html", {"attempt": attempt})
+        attempt.refresh_from_db()
 
-    answered = 0
-    flagged = 0
-    for a in answers:
-        if a.flagged:
-            flagged += 1
-        if a.choices.exists():
-            answered += 1
-
-    total = len(questions)
-    blank = total - answered
+    if attempt.is_archived:
+        total, answered, flagged = attempt.total_questions, attempt.answered_count, attempt.flagged_count
+        blank = total - answered
+    else:
+        total, answered, blank, flagged = _answer_counts(attempt)
 
     return render(
         request,
@@ -398,29 +627,44 @@ def attempt_result(request, attempt_id: int):
             "answered": answered,
             "blank": blank,
             "flagged": flagged,
+            "rank": rank_for_attempt(attempt),
         },
     )
 
 
 @login_required
-def attempt_review(request, attempt_id: int):
+def attempt_status(request, attempt_id: int):
+    """Dipoll halaman hasil selama attempt masih SUBMITTING."""
     attempt = get_object_or_404(Attempt, id=attempt_id, user=request.user)
+    if stale_submission(attempt):
+        finalize_attempt(attempt)
+        attempt.refresh_from_db()
+    return JsonResponse({
+        "ok": True,
+        "status": attempt.status,
+        "ready": attempt.status != Attempt.Status.SUBMITTING,
+    })
+
+
+@login_required
+@replica_reads
+def attempt_review(request, attempt_id: int):
+    attempt = get_user_attempt(attempt_id, request.user)
 
     # 🔒 Access control
     guard = _require_package_access(request, attempt.package)
     if guard:
         return guard
     
-    questions = list(
-        Question.objects.filter(package=attempt.package, is_active=True)
-        .prefetch_related("choices")
-        .order_by("order_index", "id")
+    questions = order_questions(
+        attempt, _attempt_questions(attempt.package_id, attempt.drawn_questions, with_choices=True)
     )
-    answers = (
-        AttemptAnswer.objects.filter(attempt=attempt, question__in=questions)
-        .prefetch_related("choices")
-    )
-    ans_map = {a.question_id: a for a in answers}
+    if attempt.is_archived:
+        ans_map = attempt.answer_map()
+    else:
+        ans_map = load_answers(
+            attempt.id, {qq.id: ordinal_slots((c.id, c.ordinal) for c in qq.choices.all()) for qq in questions}
+        )
 
     counts = {"total": len(questions)}
 
@@ -433,23 +677,22 @@ def attempt_review(request, attempt_id: int):
 
     q = questions[idx]
     a = ans_map.get(q.id)
-    breakdown = score_attempt(attempt)
+    breakdown = score_answers(get_attempt_manifest(attempt), ans_map)
     q_score = breakdown.per_question.get(q.id, 0)
     q_max = breakdown.per_question_max.get(q.id, 0)
 
-    selected_ids = set(a.choices.values_list("id", flat=True)) if a else set()
-    correct_ids = set(q.choices.filter(is_correct=True).values_list("id", flat=True))
+    selected_ids = set(a["choices"]) if a else set()
+    correct_ids = {c.id for c in q.choices.all() if c.is_correct}
 
     # build pilihan untuk template (tanpa "in" di template)
+    fragments = question_fragments(attempt.package, [q], "review")[q.id]
     choices_view = []
-    for c in q.choices.all():
+    for c in order_choices(attempt, q.id, list(q.choices.all())):
         is_sel = c.id in selected_ids
         is_cor = c.id in correct_ids
         choices_view.append({
             "label": c.label,
-            "text": c.text,
-            "image": c.image,
-            "audio": c.audio,
+            "body_html": fragments.choices.get(c.id, ""),
             "points": c.points,
             "is_selected": is_sel,
             "is_correct": is_cor,
@@ -459,8 +702,8 @@ def attempt_review(request, attempt_id: int):
     grid = []
     for i, qq in enumerate(questions):
         aa = ans_map.get(qq.id)
-        sel = set(aa.choices.values_list("id", flat=True)) if aa else set()
-        cor = set(qq.choices.filter(is_correct=True).values_list("id", flat=True))
+        sel = set(aa["choices"]) if aa else set()
+        cor = {c.id for c in qq.choices.all() if c.is_correct}
 
         if i == idx:
             status = "current"
@@ -470,7 +713,7 @@ def attempt_review(request, attempt_id: int):
             else:
                 status = "answered" if (sel == cor and len(cor) > 0) else "wrong"
 
-        if i != idx and aa and aa.flagged:
+        if i != idx and aa and aa["flagged"]:
             status = "flagged"
 
         grid.append({"num": i + 1, "idx": i, "status": status})
@@ -484,6 +727,7 @@ def attempt_review(request, attempt_id: int):
             "idx": idx,
             "counts": counts,
             "q": q,
+            "fragments": fragments,
             "grid": grid,
             "choices_view": choices_view,
             "q_score": q_score,
@@ -492,58 +736,131 @@ def attempt_review(request, attempt_id: int):
     )
 
 
-@login_required
 def attempt_autosave(request, attempt_id: int):
     if request.method != "POST":
         return JsonResponse({"ok": False, "error": "POST only"}, status=405)
 
-    attempt = get_object_or_404(Attempt, id=attempt_id, user=request.user)
-
-    # 🔒 Access control
-    guard = _require_package_access(request, attempt.package)
-    if guard:
-        return JsonResponse({"ok": False, "forbidden": True}, status=403)
-    
-    if attempt.status != Attempt.Status.IN_PROGRESS:
-        return JsonResponse({"ok": False, "error": "Attempt not active"}, status=400)
-
-    # Strict tryout: kalau habis, kasih sinyal expired
-    time_info = get_remaining_seconds(attempt)
-    if attempt.mode == Attempt.Mode.TRYOUT and time_info.is_expired:
-        return JsonResponse({"ok": False, "expired": True}, status=200)
+    claims, current_index, error = _hot_attempt(request, attempt_id)
+    if error:
+        return error
+    package_id = claims.package_id
 
     # idx soal yang aktif dikirim oleh client
     try:
-        idx = int(request.POST.get("idx", attempt.current_index))
+        idx = int(request.POST.get("idx", current_index))
     except ValueError:
-        idx = attempt.current_index
+        idx = current_index
 
-    questions = list(
-        Question.objects.filter(package=attempt.package, is_active=True)
-        .order_by("order_index", "id")
-    )
+    questions = order_questions(claims, _attempt_questions(package_id, claims.drawn_questions))
     if not questions:
         return JsonResponse({"ok": False, "error": "No questions"}, status=400)
 
-    idx = max(0, min(len(questions) - 1, idx))
-    q = questions[idx]
+    # question_id lebih aman daripada idx (dipakai player single-page)
+    question_id = request.POST.get("question_id")
+    if question_id:
+        q = next((x for x in questions if str(x.id) == question_id), None)
+        if q is None:
+            return JsonResponse({"ok": False, "error": "Unknown question"}, status=400)
+    else:
+        idx = max(0, min(len(questions) - 1, idx))
+        q = questions[idx]
 
-    answer_obj, _ = AttemptAnswer.objects.get_or_create(attempt=attempt, question=q)
+    answer_obj, _ = AttemptAnswer.objects.get_or_create(attempt_id=attempt_id, question=q)
 
-    selected_ids = request.POST.getlist("choice")
+    if request.POST.get("action") == "flag":
+        answer_obj.flagged = request.POST.get("flagged") == "1"
+        answer_obj.save(update_fields=["flagged", "updated_at"])
+        return JsonResponse({"ok": True, "saved": True})
+
+    choice_ids = ordinal_slots(Choice.objects.filter(question=q).values_list("id", "ordinal"))
     with transaction.atomic():
-        answer_obj.choices.clear()
-        if selected_ids:
-            choices = Choice.objects.filter(question=q, id__in=selected_ids)
-            answer_obj.choices.add(*choices)
-            answer_obj.answered_at = timezone.now()
-        else:
-            answer_obj.answered_at = None
+        set_selection(answer_obj, _posted_choice_ids(request), choice_ids, now=timezone.now())
         answer_obj.save()
 
     return JsonResponse({"ok": True, "saved": True})
 
 
+def attempt_sync(request, attempt_id: int):
+    """
+    Batch sync jawaban: body JSON {"changes": [{question_id, choice_ids, flagged, client_seq}, ...]}.
+    Semua perubahan diterapkan dalam satu transaksi; kirim ulang batch yang sama aman
+    karena client_seq yang sudah diterapkan diabaikan.
+
+    Mode offline (journal): client menambahkan "sent_at" (epoch ms) di body dan
+    "client_ts" per perubahan. Journal boleh datang sampai ATTEMPT_SYNC_GRACE_SECONDS
+    (jam server) setelah waktu habis, tapi perubahan yang dibuat di luar jendela attempt
+    ditolak; setelah waktu habis perubahan tanpa client_ts selalu ditolak.
+    GET = handshake untuk resume: seq terakhir yang diterima + sisa waktu dari server.
+    """
+    if request.method not in ("GET", "POST"):
+        return JsonResponse({"ok": False, "error": "GET/POST only"}, status=405)
+
+    grace = getattr(settings, "ATTEMPT_SYNC_GRACE_SECONDS", 60)
+    claims, _, error = _hot_attempt(request, attempt_id, grace_seconds=grace)
+    if error:
+        return error
+
+    if request.method == "GET":
+        attempt = Attempt.objects.get(id=claims.attempt_id)
+        time_info = get_remaining_seconds(attempt)
+        return JsonResponse({
+            "ok": True,
+            "ack": last_client_seq(claims.attempt_id),
+            "server_time": int(time.time() * 1000),
+            "remaining_seconds": time_info.remaining_seconds,
+            "expired": time_info.is_expired,
+        })
+
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "Invalid JSON"}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({"ok": False, "error": "Invalid payload"}, status=400)
+
+    window = None
+    sent_at = payload.get("sent_at")
+    if sent_at is not None:
+        try:
+            offset = time.time() - float(sent_at) / 1000.0
+        except (TypeError, ValueError):
+            return JsonResponse({"ok": False, "error": "Invalid sent_at"}, status=400)
+        window = SyncWindow(
+            clock_offset=offset,
+            start=claims.started_at,
+            end=claims.deadline if claims.mode == Attempt.Mode.TRYOUT else None,
+        )
+    elif claims.mode == Attempt.Mode.TRYOUT and time.time() >= claims.deadline:
+        # tanpa journal tidak ada toleransi
+        return JsonResponse({"ok": False, "expired": True}, status=200)
+
+    try:
+        changes = parse_changes(payload.get("changes"))
+        result = apply_answer_changes(
+            claims.attempt_id, claims.package_id, changes, window=window, allowed_ids=claims.drawn_questions
+        )
+    except SyncError as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
+
+    return JsonResponse({"ok": True, **result})
+
+
+def offline_service_worker(request):
+    """
+    Service worker untuk player offline. Disajikan dari /attempts/ supaya
+    scope-nya mencakup halaman player & bundle.
+    """
+    response = render(
+        request,
+        "exam/offline_sw.js",
+        {"media_url": settings.MEDIA_URL},
+        content_type="application/javascript",
+    )
+    response["Service-Worker-Allowed"] = "/attempts/"
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
 @login_required
 def toggle_favorite(request, slug):
     if request.method != "POST":
@@ -572,17 +889,43 @@ def purchase_package(request, slug):
     return redirect("package_detail", slug=slug)
 
 
-@login_required
 def attempt_heartbeat(request, attempt_id: int):
     if request.method != "POST":
         return JsonResponse({"ok": False, "error": "POST only"}, status=405)
 
-    attempt = get_object_or_404(Attempt, id=attempt_id, user=request.user)
+    claims = _attempt_claims(request, attempt_id)
+    if claims is not None and claims.mode == Attempt.Mode.TRYOUT:
+        # TRYOUT: timer dihitung dari started_at di token; status & versi dari cache (bukan query tiap detak)
+        state = attempt_state(claims.attempt_id)
+        if state is None or state["status"] != Attempt.Status.IN_PROGRESS:
+            return JsonResponse({"ok": False, "error": "Attempt not active"}, status=400)
+        if state["content_version"] != claims.content_version:
+            return _stale_token_json()
+        time_info = claims.time_info()
+        return JsonResponse({
+            "ok": True,
+            "remaining_seconds": time_info.remaining_seconds,
+            "expired": time_info.is_expired,
+            "mode": claims.mode,
+        })
 
-    # 🔒 Access control
-    guard = _require_package_access(request, attempt.package)
-    if guard:
-        return JsonResponse({"ok": False, "forbidden": True}, status=403)
+    if claims is not None:
+        # LEARN mengubah elapsed_seconds -> perlu DB, tapi access check sudah dari token
+        attempt = get_object_or_404(
+            Attempt.objects.select_related("package"), id=claims.attempt_id, user_id=claims.user_id
+        )
+        if attempt.package.content_version != claims.content_version:
+            return _stale_token_json()
+    else:
+        if not request.user.is_authenticated:
+            return _login_required_json()
+
+        attempt = get_object_or_404(Attempt, id=attempt_id, user=request.user)
+
+        # 🔒 Access control
+        guard = _require_package_access(request, attempt.package)
+        if guard:
+            return JsonResponse({"ok": False, "forbidden": True}, status=403)
     
     if attempt.status != Attempt.Status.IN_PROGRESS:
         return JsonResponse({"ok": False, "error": "Attempt not active"}, status=400)
@@ -616,27 +959,27 @@ def attempt_heartbeat(request, attempt_id: int):
 
 
 @login_required
+@replica_reads
 def package_analysis(request, slug):
     package = get_object_or_404(Package, slug=slug, is_active=True)
     
-    # Ambil attempt terakhir yang sudah submitted
-    attempt = Attempt.objects.filter(
-        user=request.user, 
-        package=package, 
-        status=Attempt.Status.SUBMITTED
-    ).order_by("-submitted_at").first()
+    # Ambil attempt terakhir yang sudah submitted (bisa dari arsip)
+    attempt = latest_submitted_attempt(request.user, package)
     
     if not attempt:
         messages.warning(request, "Anda belum menyelesaikan tryout untuk paket ini.")
         return redirect("package_detail", slug=slug)
 
     # Calculate per-section score
-    # 1. Get all questions with sections
-    questions = Question.objects.filter(package=package, is_active=True).select_related("section")
+    # 1. Get all questions with sections (dari manifest)
+    manifest = get_attempt_manifest(attempt)
+    questions = manifest["questions"]
     
     # 2. Get all answers for this attempt
-    answers = AttemptAnswer.objects.filter(attempt=attempt).prefetch_related("choices")
-    ans_map = {a.question_id: a for a in answers}
+    if attempt.is_archived:
+        ans_map = attempt.answer_map()
+    else:
+        ans_map = load_answers(attempt.id, choice_order_from_manifest(manifest))
 
     # Data structure: { "Section Name": { "correct": 0, "total": 0, "score": 0, "max_score": 0 } }
     sections_data = {}
@@ -645,7 +988,7 @@ def package_analysis(request, slug):
     total_questions = len(questions)
 
     for q in questions:
-        sec_name = q.section.title if q.section else "General"
+        sec_name = q["section"] or "General"
         if sec_name not in sections_data:
             sections_data[sec_name] = {"correct": 0, "total": 0, "score": 0, "max_score": 0}
             
@@ -653,13 +996,12 @@ def package_analysis(request, slug):
         data["total"] += 1
         
         # Scoring logic (simplified for standard SINGLE choice)
-        a = ans_map.get(q.id)
+        a = ans_map.get(q["id"])
         if a:
-            selected = set(a.choices.values_list("id", flat=True))
-            corrects = set(q.choices.filter(is_correct=True).values_list("id", flat=True))
+            selected = set(a["choices"])
+            corrects = {c["id"] for c in q["choices"] if c["is_correct"]}
             
             if selected and selected == corrects:
-                is_correct = True
                 data["correct"] += 1
                 total_correct += 1
                 
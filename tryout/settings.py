@@ -75,12 +75,68 @@ WSGI_APPLICATION = 'tryout.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Profil dipilih lewat env DB_ENGINE:
+# - "sqlite" (default): satu node. WAL + synchronous=NORMAL + busy timeout supaya
+#   autosave/heartbeat paralel tidak langsung "database is locked".
+#   DB_SQLITE_TUNING=0 -> setting bawaan (untuk pembanding benchmark); journal_mode
+#   di-set balik ke DELETE karena WAL tersimpan permanen di file database.
+# - "postgres": produksi. Pool koneksi (DB_POOL_MAX > 0, psycopg[pool]) atau koneksi
+#   persisten (CONN_MAX_AGE), plus statement_timeout.
+# Benchmark: python manage.py bench_autosave --threads 8 --seconds 10
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgres":
+    DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", 0))
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get("DB_NAME", "tryout"),
+            'USER': os.environ.get("DB_USER", "tryout"),
+            'PASSWORD': os.environ.get("DB_PASSWORD", ""),
+            'HOST': os.environ.get("DB_HOST", "localhost"),
+            'PORT': os.environ.get("DB_PORT", "5432"),
+            # pool tidak boleh digabung dengan koneksi persisten
+            'CONN_MAX_AGE': 0 if DB_POOL_MAX else int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'options': "-c statement_timeout=%d" % int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 5000)),
+                'connect_timeout': int(os.environ.get("DB_CONNECT_TIMEOUT", 5)),
+            },
+        }
     }
-}
+    if DB_POOL_MAX:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get("DB_POOL_MIN", 2)),
+            'max_size': DB_POOL_MAX,
+            'timeout': int(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get("DB_NAME", BASE_DIR / 'db.sqlite3'),
+        }
+    }
+    if os.environ.get("DB_SQLITE_TUNING", "1") == "1":
+        DATABASES['default']['OPTIONS'] = {
+            # busy timeout (detik): tunggu lock, jangan langsung error
+            'timeout': int(os.environ.get("DB_SQLITE_TIMEOUT", 20)),
+            # ambil write lock di awal transaksi: tidak ada deadlock upgrade read->write
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"
+                "PRAGMA busy_timeout=%d;"
+                "PRAGMA mmap_size=%d;"
+                "PRAGMA cache_size=-20000;"
+                "PRAGMA temp_store=MEMORY;"
+            ) % (
+                int(os.environ.get("DB_SQLITE_TIMEOUT", 20)) * 1000,
+                int(os.environ.get("DB_SQLITE_MMAP_BYTES", 128 * 1024 * 1024)),
+            ),
+        }
+    else:
+        DATABASES['default']['OPTIONS'] = {'init_command': "PRAGMA journal_mode=DELETE;"}
 
 
 # Password validation
@@ -123,4 +179,75 @@ LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/"
 
 MEDIA_URL = "/media/"
-MEDIA_ROOT = os.path.join(BASE_DIR, "media")
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# Token attempt (autosave/heartbeat tanpa query session/attempt), detik
+ATTEMPT_TOKEN_MAX_AGE = int(os.environ.get("ATTEMPT_TOKEN_MAX_AGE", 6 * 60 * 60))
+# Cache status attempt untuk heartbeat TRYOUT (exam.services.attempt_state), detik
+ATTEMPT_STATE_CACHE_SECONDS = int(os.environ.get("ATTEMPT_STATE_CACHE_SECONDS", 15))
+
+# Toleransi journal offline yang datang setelah waktu TRYOUT habis (jam server), detik.
+# Sengaja kecil: sent_at/client_ts berasal dari jam client.
+ATTEMPT_SYNC_GRACE_SECONDS = int(os.environ.get("ATTEMPT_SYNC_GRACE_SECONDS", 60))
+
+# Penyimpanan pilihan jawaban: "m2m" (default) atau "packed" (bitmask di AttemptAnswer.choice_mask)
+# Pindah mode: python manage.py convert_answer_storage --to packed|m2m
+EXAM_ANSWER_STORAGE = os.environ.get("EXAM_ANSWER_STORAGE", "m2m")
+
+# Attempt selesai yang lebih tua dari ini dipindah ke arsip (manage.py archive_attempts)
+ARCHIVE_ATTEMPTS_AFTER_DAYS = int(os.environ.get("ARCHIVE_ATTEMPTS_AFTER_DAYS", 180))
+
+# Submit: True -> attempt ditandai SUBMITTING dan dinilai oleh `manage.py process_submissions`
+# Kalau belum dinilai setelah FALLBACK detik, halaman hasil menilainya sendiri.
+EXAM_SUBMIT_ASYNC = os.environ.get("EXAM_SUBMIT_ASYNC", "0") == "1"
+EXAM_SUBMIT_FALLBACK_SECONDS = int(os.environ.get("EXAM_SUBMIT_FALLBACK_SECONDS", 30))
+
+# Job queue di database (core/jobs.py), dijalankan `python manage.py run_workers --processes N --threads M`.
+# JOBS_EAGER=1: job langsung dijalankan saat enqueue, di dalam request (dev tanpa worker saja).
+JOBS_EAGER = os.environ.get("JOBS_EAGER", "0") == "1"
+# batas waktu satu job (default semua task), heartbeat lease, dan berapa lama lease tanpa heartbeat
+# sebelum job dianggap yatim dan di-requeue
+JOBS_TIMEOUT_SECONDS = int(os.environ.get("JOBS_TIMEOUT_SECONDS", 15 * 60))
+JOBS_HEARTBEAT_SECONDS = int(os.environ.get("JOBS_HEARTBEAT_SECONDS", 30))
+JOBS_LEASE_SECONDS = int(os.environ.get("JOBS_LEASE_SECONDS", 120))
+JOBS_RETRY_BACKOFF_SECONDS = int(os.environ.get("JOBS_RETRY_BACKOFF_SECONDS", 10))
+JOBS_KEEP_DAYS = int(os.environ.get("JOBS_KEEP_DAYS", 7))
+# nama job -> interval (detik), di-enqueue oleh run_workers
+JOBS_PERIODIC = {
+    "exam.process_submissions": 2,
+    "exam.expire_attempts": 60,
+    "core.purge_jobs": 24 * 60 * 60,
+}
+
+# Read replica (core/db_router.py). DB_REPLICAS dipisah koma: host Postgres, atau path
+# file untuk SQLite (uji lokal: salin db.sqlite3 ke file kedua). Kosong = tanpa replica.
+DB_REPLICAS = [r.strip() for r in os.environ.get("DB_REPLICAS", "").split(",") if r.strip()]
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 10))
+for _i, _replica in enumerate(DB_REPLICAS, start=1):
+    DATABASES[f"replica{_i}"] = {
+        **DATABASES["default"],
+        ("HOST" if DB_ENGINE == "postgres" else "NAME"): _replica,
+        # saat test, replica = koneksi ke database test default
+        "TEST": {"MIRROR": "default"},
+    }
+if DB_REPLICAS:
+    DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+    MIDDLEWARE.insert(0, "core.db_router.ReplicaStickyMiddleware")
+
+# Turunan gambar soal/pilihan (exam/images.py, manage.py generate_media_derivatives)
+EXAM_IMAGE_WIDTHS = [int(w) for w in os.environ.get("EXAM_IMAGE_WIDTHS", "320,640,1024").split(",")]
+
+# Audio soal/pilihan (exam/audio.py): transcode ke Opus + AAC dengan ffmpeg
+EXAM_AUDIO_KBPS = int(os.environ.get("EXAM_AUDIO_KBPS", 48))
+EXAM_FFMPEG = os.environ.get("EXAM_FFMPEG", "ffmpeg")
+EXAM_FFPROBE = os.environ.get("EXAM_FFPROBE", "ffprobe")
+
+# Serve /media/ lewat core/media_serve.py walau DEBUG=0.
+# MEDIA_SENDFILE_HEADER: "X-Accel-Redirect" (nginx, internal location MEDIA_SENDFILE_PREFIX)
+# atau "X-Sendfile" (Apache/lighttpd). Kosong = Django yang mengirim file.
+MEDIA_SERVE = os.environ.get("MEDIA_SERVE", "0") == "1"
+MEDIA_SENDFILE_HEADER = os.environ.get("MEDIA_SENDFILE_HEADER", "")
+MEDIA_SENDFILE_PREFIX = os.environ.get("MEDIA_SENDFILE_PREFIX", "/protected-media/")
+
+# Player: media berapa soal berikutnya yang dimuat duluan (exam/prefetch.py)
+EXAM_PREFETCH_AHEAD = int(os.environ.get("EXAM_PREFETCH_AHEAD", 3))
@@ -15,9 +15,10 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core.media_serve import serve_media
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -26,5 +27,9 @@ urlpatterns = [
     path("", include("exam.urls")),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# media lewat Django (Range + ETag); di produksi biasanya web server langsung,
+# atau MEDIA_SERVE=1 + MEDIA_SENDFILE_HEADER supaya tetap zero-copy
+if settings.DEBUG or getattr(settings, "MEDIA_SERVE", False):
+    urlpatterns += [
+        re_path(r"^%s(?P<path>.*)$" % settings.MEDIA_URL.lstrip("/"), serve_media, name="media"),
+    ]
\ No newline at end of file